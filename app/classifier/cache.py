@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from app import config
+from app.schemas.classification_schema import ClassificationResult
+
+
+class ClassificationCache:
+    """
+    Bounded LRU cache of classification results with an optional TTL.
+    Entries belong to one classifier snapshot version; seeing a newer version drops
+    everything, and results computed against an older version are never stored.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float = 0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _adopt_version(self, version: int) -> bool:
+        # Caller holds the lock; returns False for results of an outdated snapshot
+        if version > self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+        return version == self._version
+
+    def get(self, key: Hashable, version: int) -> Optional[ClassificationResult]:
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key) if self._adopt_version(version) else None
+            if entry is not None and entry[0] and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, result: ClassificationResult):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0
+        with self._lock:
+            if not self._adopt_version(version):
+                return
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+classification_cache = ClassificationCache(config.CLASSIFY_CACHE_SIZE, config.CLASSIFY_CACHE_TTL)
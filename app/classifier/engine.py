@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import config
+from app.classifier.cache import classification_cache
+from app.classifier.overrides import current_seq, ensure_overrides
+from app.classifier.snapshot import ClassifierSnapshot, ensure_version, get_snapshot, install_snapshot
+from app.db.db import SessionLocal
+from app.metrics import drain_stage_metrics, merge_stage_metrics
+from app.schemas.classification_schema import ClassificationRequest, ClassificationResult
+from app.services.classification_service import classify_batch_service, error_result, validate_and_hydrate
+
+logger = logging.getLogger(__name__)
+
+# --- Bulk classification engine ---
+# A long-lived process pool, started and stopped with the app. Each worker holds its
+# own read-only classifier snapshot, so chunks are classified without the GIL or a DB session.
+_executor: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+# Latest cache counters reported by each worker, keyed by pid
+_worker_cache_stats: Dict[int, Dict] = {}
+
+
+def _init_worker(snapshot: ClassifierSnapshot):
+    # The pool already runs one process per core; keep rapidfuzz single-threaded inside it
+    config.SEMANTIC_WORKERS = 1
+    install_snapshot(snapshot)
+
+
+def _classify_chunk(version: int, merchant_seq: int, override_seq: int, payloads: List[ClassificationRequest]):
+    ensure_version(version, merchant_seq)
+    ensure_overrides(override_seq)
+    results = classify_batch_service(payloads, None)
+    # Stage timings recorded in the worker travel back with the chunk and are merged by the parent
+    return results, os.getpid(), classification_cache.stats(), drain_stage_metrics()
+
+
+def start_engine(pool_size: int = config.CLASSIFY_POOL_SIZE):
+    global _executor, _pool_size
+    if _executor is not None or pool_size <= 0:
+        return
+    _pool_size = pool_size
+    # spawn: workers must not inherit the parent's DB connections or server threads
+    _executor = ProcessPoolExecutor(
+        max_workers=pool_size,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(get_snapshot(),),
+    )
+    logger.info(f"Classification engine started: workers={pool_size}, chunk_size={config.CLASSIFY_CHUNK_SIZE}")
+
+
+def stop_engine():
+    global _executor
+    if _executor is None:
+        return
+    _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+    _worker_cache_stats.clear()
+    logger.info("Classification engine stopped")
+
+
+def classify_bulk(payloads: List[ClassificationRequest], db: Session) -> List[ClassificationResult]:
+    """
+    Classifies payloads on the worker pool and returns results in input order.
+    Falls back to classifying in the calling thread when the pool is disabled.
+    """
+    executor = _executor
+    if executor is None or not payloads:
+        return classify_batch_service(payloads, db)
+
+    submitted = _submit_chunks(executor, payloads)
+    if submitted is None:
+        return classify_batch_service(payloads, db)
+    results: List[ClassificationResult] = []
+    for chunk, future in zip(*submitted):
+        try:
+            outcome = future.result()
+        except Exception as e:
+            outcome = e
+        _collect_chunk(executor, chunk, outcome, results)
+    return results
+
+
+async def classify_bulk_async(payloads: List[ClassificationRequest]) -> List[ClassificationResult]:
+    """
+    classify_bulk for the event loop: chunk results are awaited rather than waited on, so no
+    thread is held while the pool works. Without a pool the batch is classified on a thread.
+    """
+    executor = _executor
+    submitted = _submit_chunks(executor, payloads) if executor is not None and payloads else None
+    if submitted is None:
+        return await asyncio.to_thread(classify_batch_service, payloads, None)
+    chunks, futures = submitted
+    outcomes = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+    results: List[ClassificationResult] = []
+    for chunk, outcome in zip(chunks, outcomes):
+        _collect_chunk(executor, chunk, outcome, results)
+    return results
+
+
+def _submit_chunks(executor: ProcessPoolExecutor, payloads: List[ClassificationRequest]):
+    # Spread small batches over all workers, cap chunk size for large ones
+    chunk_size = max(1, min(config.CLASSIFY_CHUNK_SIZE, math.ceil(len(payloads) / _pool_size)))
+    chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+    snapshot = get_snapshot()
+    override_seq = current_seq()
+    try:
+        return chunks, [executor.submit(_classify_chunk, snapshot.version, snapshot.merchant_seq, override_seq, chunk)
+                        for chunk in chunks]
+    except BrokenProcessPool:
+        _restart_engine(executor)
+        return None
+
+
+def _collect_chunk(executor: ProcessPoolExecutor, chunk: List[ClassificationRequest], outcome,
+                   results: List[ClassificationResult]):
+    if not isinstance(outcome, BaseException):
+        chunk_results, pid, cache_stats, stage_metrics = outcome
+        results.extend(chunk_results)
+        _worker_cache_stats[pid] = cache_stats
+        merge_stage_metrics(stage_metrics)
+        return
+    # A crashed worker only costs the transactions of its own chunk
+    logger.error(f"Classification chunk failed: size={len(chunk)}, error={outcome}")
+    results.extend(error_result(payload.id, "Classification worker failed") for payload in chunk)
+    if isinstance(outcome, BrokenProcessPool):
+        _restart_engine(executor)
+
+
+def classify_validated(transactions: List[ClassificationRequest], db: Session) -> List[ClassificationResult]:
+    """
+    Validates and hydrates the batch set-based, classifies the valid transactions on the pool
+    and returns results in input order, with an error result for each rejected transaction.
+    """
+    hydrated, errors = validate_and_hydrate(transactions, db)
+    if not errors:
+        return classify_bulk(hydrated, db)
+    results = iter(classify_bulk([txn for i, txn in enumerate(hydrated) if i not in errors], db))
+    return [error_result(txn.id, errors[i]) if i in errors else next(results) for i, txn in enumerate(hydrated)]
+
+
+def _validate_and_hydrate_in_session(transactions: List[ClassificationRequest]):
+    db = SessionLocal()
+    try:
+        return validate_and_hydrate(transactions, db)
+    finally:
+        db.close()
+
+
+async def classify_validated_async(transactions: List[ClassificationRequest]) -> List[ClassificationResult]:
+    """
+    classify_validated for the event loop: validation and hydration run on a thread with their
+    own sync session, and the pool's chunk results are awaited.
+    """
+    hydrated, errors = await asyncio.to_thread(_validate_and_hydrate_in_session, transactions)
+    results = iter(await classify_bulk_async([txn for i, txn in enumerate(hydrated) if i not in errors]))
+    return [error_result(txn.id, errors[i]) if i in errors else next(results) for i, txn in enumerate(hydrated)]
+
+
+def _restart_engine(broken: ProcessPoolExecutor):
+    global _executor
+    if _executor is not broken:
+        return
+    logger.warning("Classification worker pool is broken, restarting it")
+    _executor = None
+    _worker_cache_stats.clear()
+    broken.shutdown(wait=False, cancel_futures=True)
+    start_engine(_pool_size)
+
+
+def cache_stats() -> Dict:
+    """Cache counters of this process plus the last ones reported by each pool worker."""
+    processes = {"main": classification_cache.stats()}
+    processes.update({f"worker-{pid}": stats for pid, stats in _worker_cache_stats.items()})
+    totals = {
+        counter: sum(stats[counter] for stats in processes.values())
+        for counter in ("size", "hits", "misses", "evictions", "invalidations")
+    }
+    return {"total": totals, "processes": processes}
@@ -0,0 +1,101 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# --- Boundary modes ---
+# None matches anywhere (plain substring, the historical behaviour).
+# "word" needs a non-alphanumeric character (or the text edge) on both sides, so "gap"
+# no longer fires inside "singapore"; "start" / "end" only check one side.
+BOUNDARY_WORD = "word"
+BOUNDARY_START = "start"
+BOUNDARY_END = "end"
+BOUNDARY_MODES = (None, BOUNDARY_WORD, BOUNDARY_START, BOUNDARY_END)
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed list of keywords.
+    find() scans the text once and returns the ids (list positions) of every keyword
+    that occurs in it, so the cost grows with the text length, not the number of keywords.
+    Keywords may also be token tuples matched against a token list (boundary None only).
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Optional[str]]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._lengths: List[int] = []
+        self._check_start: List[bool] = []
+        self._check_end: List[bool] = []
+
+        for pattern_id, (keyword, boundary) in enumerate(keywords):
+            if boundary not in BOUNDARY_MODES:
+                raise ValueError(f"Unknown boundary mode for '{keyword}': {boundary}")
+            self._lengths.append(len(keyword))
+            # Boundaries only make sense next to an alphanumeric edge of the keyword
+            self._check_start.append(bool(keyword) and boundary in (BOUNDARY_WORD, BOUNDARY_START)
+                                     and keyword[0].isalnum())
+            self._check_end.append(bool(keyword) and boundary in (BOUNDARY_WORD, BOUNDARY_END)
+                                   and keyword[-1].isalnum())
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                node = nxt
+            self._out[node] = self._out[node] + (pattern_id,)
+
+        self._build_links()
+
+    def _build_links(self):
+        goto, out = self._goto, self._out
+        fail = [0] * len(goto)
+        # Nearest node on the failure chain that has outputs, -1 if none
+        report = [-1] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(ch, 0)
+                fail[child] = target if target != child else 0
+                report[child] = fail[child] if out[fail[child]] else report[fail[child]]
+        self._fail = fail
+        self._report = report
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def find(self, text: str) -> List[int]:
+        """Returns the sorted, de-duplicated ids of all keywords found in text."""
+        goto, fail, out, report = self._goto, self._fail, self._out, self._report
+        lengths, check_start, check_end = self._lengths, self._check_start, self._check_end
+        found = set()
+        node = 0
+        text_len = len(text)
+        for end, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not node:
+                continue
+            state = node if out[node] else report[node]
+            while state > 0:
+                for pattern_id in out[state]:
+                    if pattern_id in found:
+                        continue
+                    if check_start[pattern_id]:
+                        start = end - lengths[pattern_id] + 1
+                        if start > 0 and text[start - 1].isalnum():
+                            continue
+                    if check_end[pattern_id] and end + 1 < text_len and text[end + 1].isalnum():
+                        continue
+                    found.add(pattern_id)
+                state = report[state]
+        return sorted(found)
@@ -0,0 +1,63 @@
+"""
+Description normalization: bank descriptors carry processor prefixes, store numbers, card
+suffixes, dates and reference IDs around the part that names the merchant. All of them are
+removed by three compiled regex passes (prefixes, noise, then the separators the noise leaves
+behind), so repeated purchases collapse onto one canonical string:
+
+    "POS DEBIT STARBUCKS STORE #1234 05/12 SEATTLE WA REF 88812" -> "starbucks store seattle wa"
+
+The result is stored in transactions.normalized_description at ingest and reused by the
+classifier (pipeline input and result-cache key); merchant names and aliases go through the
+same function in the classifier snapshot, so both sides of a match see the same text.
+Stored values are recomputed with `python -m app.db.backfill_normalized` when this changes.
+"""
+import re
+from typing import Optional
+
+# Processor / channel prefixes, removed (repeatedly) at the start only
+PREFIXES = (
+    "pos debit", "pos purchase", "pos", "debit card purchase", "debit purchase", "debit card", "dbt crd", "dbt",
+    "checkcard", "check card", "card purchase", "purchase authorized on", "purchase", "recurring payment",
+    "recurring", "ach debit", "ach credit", "ach pmt", "ach", "sq", "tst", "sp", "visa",
+)
+_PREFIX_RE = re.compile(
+    r"^(?:(?:" + "|".join(re.escape(prefix) for prefix in sorted(PREFIXES, key=len, reverse=True))
+    + r")(?:\s*[*#:]\s*|\s+))+"
+)
+
+# Noise anywhere in the text; each alternative must leave merchant names alone
+NOISE_PATTERNS = (
+    # Card suffixes: "card 1234", "acct ending in 1234", "xxxx1234", "****1234"
+    r"\b(?:card|crd|acct|account)\s*(?:no\.?|number|ending(?:\s+in)?|#)?\s*[x*]*\d{4}\b",
+    r"(?:\bx+|\*{2,})\d{4}\b",
+    # Reference IDs: "ref 44120", "conf# ab12cd", "auth: 0099" (the value must contain a digit)
+    r"\b(?:ref|reference|conf|confirmation|trace|txn|auth|id)\s*(?:no\.?|number|#|:)?\s*[a-z0-9-]*\d[a-z0-9-]*\b",
+    # Reference after an asterisk: "amzn mktp us*2k3jd93"
+    r"\*\s*[a-z0-9]*\d[a-z0-9]*\b",
+    # Dates: 05/12, 05/12/2025, 2025-05-12, 05-12-25 (not "7-11")
+    r"\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b",
+    r"\b\d{4}-\d{2}-\d{2}\b",
+    r"\b\d{1,2}-\d{1,2}-\d{2,4}\b",
+    # Store numbers: "#1234", "store no. 12", and standalone numbers of 3+ digits
+    r"#\s*\d+\b",
+    r"\b(?:store|str|unit|loc)\s*no\.?\s*\d+\b",
+    r"\b\d{3,}\b",
+)
+_NOISE_RE = re.compile("|".join(f"(?:{pattern})" for pattern in NOISE_PATTERNS))
+
+# Separators at the edge of a word or standing alone, e.g. what is left of "t-1234" or "402-935-7733".
+# A pass of its own: it has to see the text after the noise is gone.
+_SEPARATOR_RE = re.compile(r"[-:;,.#]+(?!\S)|(?<!\S)[-:;,.#]+")
+
+
+def normalize_description(raw: Optional[str]) -> str:
+    text = (raw or "").lower()
+    text = _PREFIX_RE.sub("", text.lstrip())
+    text = _NOISE_RE.sub(" ", text).replace("*", " ")
+    text = _SEPARATOR_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Merchant names/aliases: normalized like descriptions, unless that leaves nothing (e.g. "POS")."""
+    return normalize_description(name) or (name or "").lower().strip()
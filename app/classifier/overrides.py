@@ -0,0 +1,97 @@
+"""
+User category overrides, consulted before the classification pipeline runs.
+
+Each process keeps the classification_overrides table in memory, keyed by
+(user_id, scope, key) for the two scopes: a merchant_id, or a normalized description.
+A lookup is at most two dict gets, so transactions without an override cost nothing
+measurable. Rows carry a change_seq; syncing applies only the rows newer than the
+last one seen (the reload watcher does this every CLASSIFIER_RELOAD_INTERVAL, pool
+workers before a chunk whose parent has seen newer rows).
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.db import SessionLocal
+from app.models import ClassificationOverrideORM
+
+logger = logging.getLogger(__name__)
+
+SCOPE_MERCHANT = "merchant"
+SCOPE_DESCRIPTOR = "descriptor"
+
+
+def override_reason(scope: str, key: str) -> str:
+    return f"User override for {scope} '{key}'"
+
+
+@dataclass(frozen=True)
+class Override:
+    override_id: int
+    scope: str
+    key: str
+    category: str
+
+    @property
+    def reason(self) -> str:
+        return override_reason(self.scope, self.key)
+
+
+# Readers do plain dict lookups without the lock; a sync applies each change as one
+# dict operation, so a lookup sees either the old or the new override for a key.
+_overrides: Dict[Tuple[str, str, str], Override] = {}
+_seq = 0
+_lock = threading.Lock()
+
+
+def find_override(user_id: Optional[str], merchant_id: Optional[str], normalized: str) -> Optional[Override]:
+    """The user's override for this description, else for this merchant; None on a miss."""
+    if not user_id or not _overrides:
+        return None
+    override = _overrides.get((user_id, SCOPE_DESCRIPTOR, normalized))
+    if override is None and merchant_id:
+        override = _overrides.get((user_id, SCOPE_MERCHANT, merchant_id))
+    return override
+
+
+def current_seq() -> int:
+    return _seq
+
+
+def sync_overrides(db: Session) -> int:
+    """Applies the override rows changed since the last sync; returns how many there were."""
+    global _seq
+    with _lock:
+        rows = db.execute(
+            select(ClassificationOverrideORM.id, ClassificationOverrideORM.user_id, ClassificationOverrideORM.scope,
+                   ClassificationOverrideORM.key, ClassificationOverrideORM.category,
+                   ClassificationOverrideORM.change_seq)
+            .where(ClassificationOverrideORM.change_seq > _seq)
+            .order_by(ClassificationOverrideORM.change_seq)
+        ).all()
+        for row in rows:
+            key = (row.user_id, row.scope, row.key)
+            if row.category is None:
+                _overrides.pop(key, None)
+            else:
+                _overrides[key] = Override(override_id=row.id, scope=row.scope, key=row.key, category=row.category)
+        if rows:
+            _seq = rows[-1].change_seq
+    if rows:
+        logger.info(f"Overrides synced: changes={len(rows)}, seq={_seq}, overrides={len(_overrides)}")
+    return len(rows)
+
+
+def ensure_overrides(seq: int):
+    """Pool workers: catches up with the parent's sequence number before classifying a chunk."""
+    if _seq >= seq:
+        return
+    db = SessionLocal()
+    try:
+        sync_overrides(db)
+    finally:
+        db.close()
@@ -0,0 +1,467 @@
+import dataclasses
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app import config
+from app.classifier.matcher import KeywordMatcher
+from app.classifier.normalize import normalize_name
+from app.classifier.overrides import sync_overrides
+from app.db.db import SessionLocal
+from app.models import MerchantChangeORM, MerchantORM, TaxonomyMccORM, TaxonomyRuleORM, TaxonomyVersionORM
+from app.taxonomy import MCC_CATEGORY_MAP, REGEX_RULES
+
+logger = logging.getLogger(__name__)
+
+# Merchant names shorter than this are too ambiguous to detect in free text
+MIN_DETECTABLE_NAME_LENGTH = 3
+_TOKEN_RE = re.compile(r"[a-z0-9&]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+# --- Snapshot structures ---
+# Everything the pipeline needs, pre-processed once and never mutated afterwards
+@dataclass(frozen=True)
+class MerchantEntry:
+    merchant_id: str
+    display_name: str
+    aliases: Tuple[str, ...]
+    aliases_lower: Tuple[str, ...]
+    default_category: Optional[str]
+    default_category_lower: Optional[str]
+    # display_name + aliases, as used by the semantic similarity stage
+    names: Tuple[str, ...]
+    names_lower: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    keyword: str
+    category: str
+    reason: str
+    boundary: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Taxonomy:
+    version: int
+    mcc_map: Dict[str, str]
+    # (keyword, category, reason[, boundary]), as in app/taxonomy.py
+    rules: Tuple[tuple, ...]
+
+
+# Used until the taxonomy tables are seeded, and by the benchmarks (without a DB)
+DEFAULT_TAXONOMY = Taxonomy(version=0, mcc_map=dict(MCC_CATEGORY_MAP), rules=tuple(REGEX_RULES))
+
+EMPTY_MATCHER = KeywordMatcher(())
+
+
+@dataclass(frozen=True)
+class ClassifierSnapshot:
+    version: int
+    merchants: Dict[str, MerchantEntry]
+    mcc_map: Dict[str, str]
+    regex_rules: Tuple[CompiledRule, ...]
+    # Ids returned by rule_matcher.find() index into regex_rules
+    rule_matcher: KeywordMatcher
+    # Token-level index over every merchant display_name / alias;
+    # ids returned by merchant_matcher.find() index into merchant_names as (merchant_id, name)
+    merchant_matcher: KeywordMatcher
+    merchant_names: Tuple[Tuple[str, str], ...]
+    # taxonomy_versions row the MCC map and rules were loaded from (0: app/taxonomy.py defaults)
+    taxonomy_version: int = 0
+    # Last merchant_changes row applied to the merchants
+    merchant_seq: int = 0
+    # Merchants added, updated or removed since merchant_matcher was built: their names in it
+    # are skipped, and delta_matcher / delta_names index their current names instead
+    changed_merchants: FrozenSet[str] = frozenset()
+    delta_matcher: KeywordMatcher = EMPTY_MATCHER
+    delta_names: Tuple[Tuple[str, str], ...] = ()
+
+
+def _merchant_entry(merchant: MerchantORM) -> MerchantEntry:
+    # Names are normalized like the descriptions they are matched against
+    aliases = tuple(merchant.aliases or [])
+    names = (merchant.display_name,) + aliases
+    default_category = merchant.default_category
+    return MerchantEntry(
+        merchant_id=merchant.merchant_id,
+        display_name=merchant.display_name,
+        aliases=aliases,
+        aliases_lower=tuple(normalize_name(alias) for alias in aliases),
+        default_category=default_category,
+        default_category_lower=default_category.lower() if default_category else None,
+        names=names,
+        names_lower=tuple(normalize_name(name) for name in names),
+    )
+
+
+def _compile_rules(rules) -> Tuple[CompiledRule, ...]:
+    # Rules are (keyword, category, reason) with an optional 4th boundary mode
+    return tuple(
+        CompiledRule(keyword=rule[0].lower(), category=rule[1], reason=rule[2],
+                     boundary=rule[3] if len(rule) > 3 else None)
+        for rule in rules
+    )
+
+
+def _merchant_name_index(merchants: Dict[str, MerchantEntry]):
+    names = []
+    token_keys = []
+    for entry in merchants.values():
+        seen = set()
+        for name, name_lower in zip(entry.names, entry.names_lower):
+            tokens = tuple(tokenize(name_lower))
+            if not tokens or tokens in seen or len("".join(tokens)) < MIN_DETECTABLE_NAME_LENGTH:
+                continue
+            seen.add(tokens)
+            names.append((entry.merchant_id, name))
+            token_keys.append((tokens, None))
+    return KeywordMatcher(token_keys), tuple(names)
+
+
+def _merchant_delta(merchants: Dict[str, MerchantEntry], changed) -> Dict:
+    delta_matcher, delta_names = _merchant_name_index({merchant_id: merchants[merchant_id]
+                                                       for merchant_id in changed if merchant_id in merchants})
+    return dict(changed_merchants=frozenset(changed), delta_matcher=delta_matcher, delta_names=delta_names)
+
+
+def _taxonomy_fields(taxonomy: Taxonomy) -> Dict:
+    regex_rules = _compile_rules(taxonomy.rules)
+    return dict(
+        mcc_map=dict(taxonomy.mcc_map),
+        regex_rules=regex_rules,
+        rule_matcher=KeywordMatcher((rule.keyword, rule.boundary) for rule in regex_rules),
+        taxonomy_version=taxonomy.version,
+    )
+
+
+def latest_taxonomy_version(db: Session) -> Optional[int]:
+    return db.execute(select(func.max(TaxonomyVersionORM.version))).scalar()
+
+
+def load_taxonomy(db: Session) -> Taxonomy:
+    version = latest_taxonomy_version(db)
+    if version is None:
+        return DEFAULT_TAXONOMY
+    mcc_map = dict(db.execute(select(TaxonomyMccORM.mcc, TaxonomyMccORM.category)).all())
+    rules = tuple(
+        (rule.keyword, rule.category, rule.reason, rule.boundary)
+        for rule in db.execute(select(TaxonomyRuleORM).order_by(TaxonomyRuleORM.id)).scalars()
+    )
+    return Taxonomy(version=version, mcc_map=mcc_map, rules=rules)
+
+
+def latest_merchant_seq(db: Session) -> int:
+    return db.execute(select(func.coalesce(func.max(MerchantChangeORM.seq), 0))).scalar()
+
+
+def record_merchant_changes(db: Session, merchant_ids: Optional[Iterable[str]] = None):
+    """
+    Logs merchant writes in the caller's transaction, for every process to apply to its snapshot.
+    Without merchant_ids (many merchants changed, e.g. a file import) snapshots are rebuilt instead.
+    """
+    now = datetime.utcnow()
+    ids = [None] if merchant_ids is None else list(merchant_ids)
+    db.execute(insert(MerchantChangeORM), [{"merchant_id": merchant_id, "changed_at": now} for merchant_id in ids])
+
+
+def build_snapshot(db: Session, version: int) -> ClassifierSnapshot:
+    # Read first: changes committed while the merchants load are applied again by the next sync
+    merchant_seq = latest_merchant_seq(db)
+    return snapshot_from_merchants(db.query(MerchantORM).all(), version, load_taxonomy(db), merchant_seq)
+
+
+def snapshot_from_merchants(merchant_rows, version: int, taxonomy: Taxonomy = DEFAULT_TAXONOMY,
+                            merchant_seq: int = 0) -> ClassifierSnapshot:
+    """Builds a snapshot from MerchantORM-like objects (also used by the benchmarks, without a DB)."""
+    merchants = {m.merchant_id: _merchant_entry(m) for m in merchant_rows}
+    merchant_matcher, merchant_names = _merchant_name_index(merchants)
+    return ClassifierSnapshot(
+        version=version,
+        merchants=merchants,
+        merchant_matcher=merchant_matcher,
+        merchant_names=merchant_names,
+        merchant_seq=merchant_seq,
+        **_taxonomy_fields(taxonomy),
+    )
+
+
+def detect_merchants(snapshot: ClassifierSnapshot, normalized: str) -> List[Tuple[MerchantEntry, str]]:
+    """Returns (merchant, matched name) for every distinct merchant mentioned in the description."""
+    tokens = tokenize(normalized)
+    detected = []
+    seen = set()
+    # Changed merchants are only found through the delta index, with their current names
+    changed = snapshot.changed_merchants
+    for name_id in snapshot.merchant_matcher.find(tokens):
+        merchant_id, name = snapshot.merchant_names[name_id]
+        if merchant_id in seen or merchant_id in changed:
+            continue
+        seen.add(merchant_id)
+        detected.append((snapshot.merchants[merchant_id], name))
+    if snapshot.delta_names:
+        seen = set()
+        for name_id in snapshot.delta_matcher.find(tokens):
+            merchant_id, name = snapshot.delta_names[name_id]
+            if merchant_id in seen:
+                continue
+            seen.add(merchant_id)
+            detected.append((snapshot.merchants[merchant_id], name))
+    return detected
+
+
+# --- Current snapshot ---
+# Readers just grab the module reference; a rebuild replaces it in one assignment,
+# so an in-flight classification always sees one consistent snapshot.
+_snapshot: Optional[ClassifierSnapshot] = None
+_version = 0
+_lock = threading.Lock()
+
+
+def _rebuild(db: Optional[Session]) -> ClassifierSnapshot:
+    global _snapshot
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        snapshot = build_snapshot(db, _version)
+    finally:
+        if own_session:
+            db.close()
+    _snapshot = snapshot
+    logger.info(f"Classifier snapshot v{snapshot.version} built: merchants={len(snapshot.merchants)}, "
+                f"rules={len(snapshot.regex_rules)}, merchant_seq={snapshot.merchant_seq}")
+    return snapshot
+
+
+def load_snapshot(db: Optional[Session] = None) -> ClassifierSnapshot:
+    """Builds the snapshot at startup (or rebuilds the current version)."""
+    with _lock:
+        return _rebuild(db)
+
+
+def sync_merchants(db: Optional[Session] = None) -> ClassifierSnapshot:
+    """
+    Applies the merchant changes logged since the snapshot's merchant_seq and atomically swaps in
+    a new version. Only the changed merchants are read; they are patched into a copy of the
+    merchant map and served from the delta index, while the main merchant index is shared with
+    the previous version. A bulk change, or more than MERCHANT_DELTA_LIMIT merchants at once,
+    rebuilds the snapshot instead.
+    """
+    global _snapshot, _version
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        with _lock:
+            current = _snapshot
+            if current is None:
+                return _rebuild(db)
+            rows = db.execute(
+                select(MerchantChangeORM.seq, MerchantChangeORM.merchant_id)
+                .where(MerchantChangeORM.seq > current.merchant_seq)
+                .order_by(MerchantChangeORM.seq)
+            ).all()
+            if not rows:
+                return current
+            ids = {row.merchant_id for row in rows}
+            if None in ids or len(ids) > config.MERCHANT_DELTA_LIMIT:
+                _version += 1
+                return _rebuild(db)
+            loaded = {
+                merchant.merchant_id: _merchant_entry(merchant)
+                for merchant in db.execute(select(MerchantORM).where(MerchantORM.merchant_id.in_(ids))).scalars()
+            }
+            merchants = dict(current.merchants)
+            for merchant_id in ids:
+                if merchant_id in loaded:
+                    merchants[merchant_id] = loaded[merchant_id]
+                else:
+                    merchants.pop(merchant_id, None)
+            _version += 1
+            snapshot = dataclasses.replace(
+                current, version=_version, merchants=merchants, merchant_seq=rows[-1].seq,
+                **_merchant_delta(merchants, current.changed_merchants | ids),
+            )
+            _snapshot = snapshot
+    finally:
+        if own_session:
+            db.close()
+    logger.info(f"Classifier snapshot v{snapshot.version}: applied merchant changes={len(rows)}, "
+                f"merchant_seq={snapshot.merchant_seq}, delta={len(snapshot.changed_merchants)}")
+    if len(snapshot.changed_merchants) > config.MERCHANT_DELTA_LIMIT:
+        _start_compaction()
+    return snapshot
+
+
+# Folding the delta into the main merchant index costs a full index build, so it runs on its
+# own thread; lookups keep using the main index plus the delta until the swap.
+_compaction: Optional[threading.Thread] = None
+
+
+def _compact_merchant_index():
+    global _snapshot
+    base = _snapshot
+    merchant_matcher, merchant_names = _merchant_name_index(base.merchants)
+    with _lock:
+        current = _snapshot
+        if current.merchant_matcher is not base.merchant_matcher:
+            # Rebuilt meanwhile: the new index is already current
+            return
+        # Merchants patched after `base` was taken stay in the delta
+        changed = {merchant_id for merchant_id in current.changed_merchants
+                   if current.merchants.get(merchant_id) is not base.merchants.get(merchant_id)}
+        # Same merchants, so the version (and the cache) stays
+        _snapshot = dataclasses.replace(current, merchant_matcher=merchant_matcher, merchant_names=merchant_names,
+                                        **_merchant_delta(current.merchants, changed))
+    logger.info(f"Merchant index compacted: names={len(merchant_names)}, delta={len(changed)}")
+
+
+def _start_compaction():
+    global _compaction
+    with _lock:
+        if _compaction is not None and _compaction.is_alive():
+            return
+        _compaction = threading.Thread(target=_compact_merchant_index, name="merchant-index-compaction", daemon=True)
+        _compaction.start()
+
+
+def reload_taxonomy(db: Optional[Session] = None) -> ClassifierSnapshot:
+    """
+    Swaps in a new version with the latest taxonomy. Only the MCC map and the rule matcher are
+    rebuilt (outside the lock); the merchant structures are shared with the current snapshot.
+    """
+    global _snapshot, _version
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        taxonomy = load_taxonomy(db)
+    finally:
+        if own_session:
+            db.close()
+    fields = _taxonomy_fields(taxonomy)
+    with _lock:
+        current = _snapshot
+        if current is None:
+            return _rebuild(None if own_session else db)
+        # Another thread already installed this taxonomy (or a newer one)
+        if taxonomy.version <= current.taxonomy_version:
+            return current
+        _version += 1
+        snapshot = dataclasses.replace(current, version=_version, **fields)
+        _snapshot = snapshot
+    logger.info(f"Classifier snapshot v{snapshot.version} installed taxonomy v{taxonomy.version}: "
+                f"mccs={len(taxonomy.mcc_map)}, rules={len(taxonomy.rules)}")
+    return snapshot
+
+
+def get_snapshot() -> ClassifierSnapshot:
+    snapshot = _snapshot
+    if snapshot is None:
+        return load_snapshot()
+    return snapshot
+
+
+# --- Worker processes ---
+# Pool workers start from a copy of the parent's snapshot and only go back to the
+# database when the parent has moved on to a newer version.
+def install_snapshot(snapshot: ClassifierSnapshot):
+    global _snapshot, _version
+    with _lock:
+        _version = snapshot.version
+        _snapshot = snapshot
+
+
+def ensure_version(version: int, merchant_seq: Optional[int] = None) -> ClassifierSnapshot:
+    global _snapshot, _version
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    db = SessionLocal()
+    try:
+        if snapshot is None or merchant_seq is None:
+            with _lock:
+                _version = version
+                return _rebuild(db)
+        # Same incremental steps as the parent: patch the changed merchants, recompile the taxonomy
+        if snapshot.merchant_seq < merchant_seq:
+            sync_merchants(db)
+        if (latest_taxonomy_version(db) or 0) != _snapshot.taxonomy_version:
+            reload_taxonomy(db)
+    finally:
+        db.close()
+    with _lock:
+        # Numbered like the parent's snapshot, so later chunks of this version skip the checks
+        _version = version
+        _snapshot = dataclasses.replace(_snapshot, version=version)
+        return _snapshot
+
+
+# --- Reload watcher ---
+# Each server process polls the merchant change log and the latest taxonomy version and applies
+# whatever is newer than its snapshot, so a write made through any process reaches all of them
+# within CLASSIFIER_RELOAD_INTERVAL. The new structures are built on the watcher thread and
+# swapped in with one assignment: requests in flight keep the snapshot they started with and
+# never wait. User overrides changed since the previous poll are applied on the same thread.
+_watcher_stop = threading.Event()
+_watcher: Optional[threading.Thread] = None
+
+
+def check_merchants(db: Session) -> bool:
+    """Applies merchant changes made by any process; returns whether there were any."""
+    if latest_merchant_seq(db) <= get_snapshot().merchant_seq:
+        return False
+    sync_merchants(db)
+    return True
+
+
+def check_taxonomy(db: Session) -> bool:
+    """Reloads the taxonomy if the database has a newer version; returns whether it did."""
+    version = latest_taxonomy_version(db)
+    if version is None or version <= get_snapshot().taxonomy_version:
+        return False
+    reload_taxonomy(db)
+    return True
+
+
+def _watch(interval: float):
+    while not _watcher_stop.wait(interval):
+        db = SessionLocal()
+        try:
+            check_merchants(db)
+            check_taxonomy(db)
+            sync_overrides(db)
+        except Exception as e:
+            logger.exception(f"Classifier reload check failed: {e}")
+        finally:
+            db.close()
+
+
+def start_reload_watcher(interval: float = config.CLASSIFIER_RELOAD_INTERVAL):
+    global _watcher
+    if _watcher is not None or interval <= 0:
+        return
+    _watcher_stop.clear()
+    _watcher = threading.Thread(target=_watch, args=(interval,), name="classifier-reload-watcher", daemon=True)
+    _watcher.start()
+    logger.info(f"Classifier reload watcher started: interval={interval}s")
+
+
+def stop_reload_watcher():
+    global _watcher
+    if _watcher is None:
+        return
+    _watcher_stop.set()
+    _watcher.join(timeout=10)
+    _watcher = None
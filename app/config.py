@@ -0,0 +1,91 @@
+import os
+
+# --- Classification ---
+# Threads used by rapidfuzz for the batch semantic similarity matrix (-1 = all cores)
+SEMANTIC_WORKERS = int(os.getenv("SEMANTIC_WORKERS", "-1"))
+
+# --- Bulk classification engine ---
+# Worker processes for /classify/bulk; 0 classifies in the request thread instead
+CLASSIFY_POOL_SIZE = int(os.getenv("CLASSIFY_POOL_SIZE", str(os.cpu_count() or 1)))
+# Upper bound on transactions sent to a worker in one task
+CLASSIFY_CHUNK_SIZE = int(os.getenv("CLASSIFY_CHUNK_SIZE", "100"))
+
+# --- Classification cache ---
+# Max cached results per process (0 disables the cache) and optional TTL in seconds (0 = none)
+CLASSIFY_CACHE_SIZE = int(os.getenv("CLASSIFY_CACHE_SIZE", "10000"))
+CLASSIFY_CACHE_TTL = float(os.getenv("CLASSIFY_CACHE_TTL", "0"))
+
+# --- Streaming classification ---
+# Records classified (and written back) per micro-batch on /classify/bulk/stream
+CLASSIFY_STREAM_BATCH_SIZE = int(os.getenv("CLASSIFY_STREAM_BATCH_SIZE", "200"))
+
+# --- Classification jobs ---
+# Background threads per process that pick up queued jobs (0 disables them)
+CLASSIFY_JOB_WORKERS = int(os.getenv("CLASSIFY_JOB_WORKERS", "1"))
+# Items classified and committed per step of a job
+CLASSIFY_JOB_CHUNK_SIZE = int(os.getenv("CLASSIFY_JOB_CHUNK_SIZE", "1000"))
+# Seconds between polls for new jobs, and after which a silent running job is taken over
+CLASSIFY_JOB_POLL_INTERVAL = float(os.getenv("CLASSIFY_JOB_POLL_INTERVAL", "1.0"))
+CLASSIFY_JOB_LEASE_SECONDS = float(os.getenv("CLASSIFY_JOB_LEASE_SECONDS", "60"))
+# A job is retried after a database error (e.g. a locked database) and fails after this many attempts in a row
+CLASSIFY_JOB_MAX_ATTEMPTS = max(1, int(os.getenv("CLASSIFY_JOB_MAX_ATTEMPTS", "3")))
+# Seconds without a new upload batch after which a job still receiving items is failed
+CLASSIFY_JOB_UPLOAD_TIMEOUT = float(os.getenv("CLASSIFY_JOB_UPLOAD_TIMEOUT", "600"))
+
+# --- Metrics ---
+# In-process pipeline/endpoint metrics served on /metrics (0 turns recording off)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+# Per-stage pipeline timings are recorded for one transaction in this many
+METRICS_STAGE_SAMPLE_EVERY = max(1, int(os.getenv("METRICS_STAGE_SAMPLE_EVERY", "10")))
+
+# --- Logging ---
+# sync: text lines written on the calling thread; async: JSON lines written by a background
+# thread from a bounded queue (records are dropped, never waited on, when it is full)
+LOG_MODE = os.getenv("LOG_MODE", "sync")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of transactions whose per-transaction log lines are written (errors are never sampled)
+LOG_TXN_SAMPLE_RATE = float(os.getenv("LOG_TXN_SAMPLE_RATE", "1.0"))
+
+# --- Transaction listing ---
+# count=estimate counts matching rows only up to this cap
+LIST_COUNT_ESTIMATE_CAP = int(os.getenv("LIST_COUNT_ESTIMATE_CAP", "10000"))
+
+# --- Database ---
+# Unset DATABASE_URL means app.db in the project root; DATABASE_READ_URL defaults to it too.
+# Reads always go through their own engine and connection pool.
+DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+# Connection pool per engine (file-based databases); the read engine defaults to the write settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+# Seconds to wait for a free connection, and after which connections are replaced (-1: never)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+# SQLite pragmas applied to every new connection (empty value skips the pragma)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+# Negative values are KiB: -65536 is a 64 MiB page cache per connection
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-65536")
+SQLITE_BUSY_TIMEOUT_MS = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+# 1 serves the DB-backed routes as async endpoints on AsyncSession/aiosqlite (app/db/async_db.py)
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
+# --- Transaction ingest ---
+# Rows validated, inserted and committed together by POST /transactions/bulk
+TRANSACTION_INGEST_CHUNK_SIZE = int(os.getenv("TRANSACTION_INGEST_CHUNK_SIZE", "5000"))
+# Default rows per chunk for the file importer (python -m app.db.importer)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+# Rows deleted/updated per committed chunk by cascade deletes and bulk mutations
+MUTATION_CHUNK_SIZE = int(os.getenv("MUTATION_CHUNK_SIZE", "5000"))
+
+# Seconds between checks for merchant changes, a newer taxonomy version and changed user overrides
+# (0 disables the background reload)
+CLASSIFIER_RELOAD_INTERVAL = float(os.getenv("CLASSIFIER_RELOAD_INTERVAL", "2.0"))
+# Merchants changed since the snapshot's merchant index was built that are served from a small
+# delta index; past this the main index is rebuilt on a background thread
+MERCHANT_DELTA_LIMIT = int(os.getenv("MERCHANT_DELTA_LIMIT", "1000"))
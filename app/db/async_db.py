@@ -0,0 +1,57 @@
+"""
+Optional async database layer (DB_ASYNC=1), using the same URLs, pool sizes and SQLite
+pragmas as app/db/db.py. SQLite is driven through aiosqlite. Only imported when the async
+stack is enabled, so aiosqlite and greenlet are not needed otherwise.
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app import config
+from app.db.db import (
+    DATABASE_READ_URL,
+    DATABASE_URL,
+    engine_options,
+    install_sqlite_pragmas,
+    is_sqlite_memory,
+)
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver configured for {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _make_async_engine(url: str, pool_size: int, max_overflow: int, read_only: bool = False) -> AsyncEngine:
+    new_engine = create_async_engine(async_url(url), **engine_options(url, pool_size, max_overflow))
+    install_sqlite_pragmas(new_engine.sync_engine, read_only)
+    return new_engine
+
+
+async_engine = _make_async_engine(DATABASE_URL, config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW)
+if is_sqlite_memory(DATABASE_READ_URL):
+    async_read_engine = async_engine
+else:
+    async_read_engine = _make_async_engine(DATABASE_READ_URL, config.DB_READ_POOL_SIZE,
+                                           config.DB_READ_MAX_OVERFLOW, read_only=True)
+# expire_on_commit=False: returned ORM objects are serialized after the session is done with them,
+# where an expired attribute could not be reloaded without an awaitable
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def dispose_async_engines():
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
@@ -0,0 +1,36 @@
+"""
+Recomputes transactions.normalized_description from raw_description.
+
+    python -m app.db.backfill_normalized [--only-missing] [--chunk-size 5000]
+
+Run once for transactions stored before normalization happened at ingest, and again after
+the rules in app/classifier/normalize.py change. Rows are rewritten (and re-indexed for
+search) only where the value changes, one committed chunk at a time, so it can be re-run.
+"""
+import argparse
+import logging
+
+from app import config
+from app.db.db import SessionLocal, engine
+from app.db.migrations import ensure_schema
+from app.services.transaction_service import renormalize_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only-missing", action="store_true", help="Only fill rows without a normalized_description")
+    parser.add_argument("--chunk-size", type=int, default=config.MUTATION_CHUNK_SIZE, help="Rows per commit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        changed = renormalize_transactions(db, args.only_missing, args.chunk_size)
+    finally:
+        db.close()
+    print(f"normalized_description updated: {changed}")
+
+
+if __name__ == "__main__":
+    main()
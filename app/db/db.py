@@ -1,13 +1,77 @@
 import os
-from sqlalchemy import create_engine
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from app import config
+
 # Get the application's root directory
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}"
+DATABASE_URL = config.DATABASE_URL or f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}"
+DATABASE_READ_URL = config.DATABASE_READ_URL or DATABASE_URL
+
+SQLITE_PRAGMAS = (
+    ("journal_mode", config.SQLITE_JOURNAL_MODE),
+    ("synchronous", config.SQLITE_SYNCHRONOUS),
+    ("mmap_size", config.SQLITE_MMAP_SIZE),
+    ("cache_size", config.SQLITE_CACHE_SIZE),
+    ("busy_timeout", config.SQLITE_BUSY_TIMEOUT_MS),
+)
+
+
+def is_sqlite_memory(url: str) -> bool:
+    return url.startswith("sqlite") and (url.rstrip("/").endswith(":memory:") or url.rstrip("/") == "sqlite:")
+
+
+def engine_options(url: str, pool_size: int, max_overflow: int) -> Dict:
+    """create_engine / create_async_engine keyword arguments for a database URL."""
+    kwargs = {"pool_pre_ping": config.DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not is_sqlite_memory(url):
+        # An in-memory SQLite database lives in a single connection, so it keeps SQLAlchemy's default pool
+        kwargs.update(pool_size=pool_size, max_overflow=max_overflow,
+                      pool_timeout=config.DB_POOL_TIMEOUT, pool_recycle=config.DB_POOL_RECYCLE)
+    return kwargs
+
+
+def install_sqlite_pragmas(target: Engine, read_only: bool = False):
+    """Applies SQLITE_PRAGMAS to every new connection of a (sync, or an async engine's sync_engine) SQLite engine."""
+    if target.dialect.name != "sqlite":
+        return
+    pragmas = [(name, value) for name, value in SQLITE_PRAGMAS if value]
+    if read_only:
+        pragmas.append(("query_only", "ON"))
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    @event.listens_for(target, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _make_engine(url: str, pool_size: int, max_overflow: int, read_only: bool = False) -> Engine:
+    new_engine = create_engine(url, **engine_options(url, pool_size, max_overflow))
+    install_sqlite_pragmas(new_engine, read_only)
+    return new_engine
+
+
+# Writes (and anything that reads then writes) go through `engine`; read-only endpoints use
+# `read_engine`, whose pool is sized separately and whose SQLite connections reject writes.
+# With WAL, readers on one engine do not block the writer on the other.
+engine = _make_engine(DATABASE_URL, config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW)
+if is_sqlite_memory(DATABASE_READ_URL):
+    read_engine = engine
+else:
+    read_engine = _make_engine(DATABASE_READ_URL, config.DB_READ_POOL_SIZE, config.DB_READ_MAX_OVERFLOW,
+                               read_only=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 def get_db():
@@ -15,4 +79,25 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def pool_stats() -> Dict[str, Dict]:
+    """Connection pool usage per engine, for the health endpoint."""
+    stats = {}
+    for name, eng in (("write", engine), ("read", read_engine)):
+        pool = eng.pool
+        entry = {"url": eng.url.render_as_string(hide_password=True), "pool": type(pool).__name__}
+        # Only queue-based pools track size and overflow
+        for key, method in (("size", "size"), ("checked_in", "checkedin"),
+                            ("checked_out", "checkedout"), ("overflow", "overflow")):
+            if hasattr(pool, method):
+                entry[key] = getattr(pool, method)()
+        stats[name] = entry
+    return stats
@@ -0,0 +1,316 @@
+"""
+Streaming file importer for users, merchants and transactions.
+
+    python -m app.db.importer users users.csv
+    python -m app.db.importer merchants merchants.ndjson
+    python -m app.db.importer transactions txns.ndjson.gz [--chunk-size 10000] [--classify] [--resume] [--errors errors.ndjson]
+
+Files are CSV or NDJSON (optionally .gz), read one record at a time, so memory stays
+constant whatever the file size. Each chunk is validated with set-based queries, bulk
+inserted and committed (transactions go through the same path as POST /transactions/bulk,
+spending rollups included). After every commit the number of records done is written to
+a checkpoint file (<file>.import-state.json); --resume skips that many records and carries on.
+Re-imported rows are reported as duplicates, never inserted twice.
+
+Transactions without a merchant_id are resolved from their description with the
+classifier's merchant alias index, falling back to --default-merchant.
+CSV columns holding lists or objects (aliases, typical_mccs, geo) take JSON, or
+"|"-separated values for lists.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import config
+from app.classifier.engine import start_engine, stop_engine
+from app.classifier.normalize import normalize_description
+from app.classifier.overrides import sync_overrides
+from app.classifier.snapshot import detect_merchants, load_snapshot, record_merchant_changes
+from app.db.db import SessionLocal, engine
+from app.db.migrations import ensure_schema
+from app.models import MerchantORM, UserORM
+from app.schemas.merchant_schema import MerchantCreate
+from app.schemas.user_schema import UserImport
+from app.services.merchant_index_service import ensure_merchant_index, index_merchants
+from app.services.transaction_service import ingest_transactions_service
+
+LIST_FIELDS = ("aliases", "typical_mccs")
+OBJECT_FIELDS = ("geo",)
+# Distinct descriptions whose resolved merchant is remembered
+RESOLVE_CACHE_SIZE = 100_000
+
+
+# --- Reading ---
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _file_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def _csv_value(field: str, value: str):
+    if value == "":
+        return None
+    if field in LIST_FIELDS:
+        return json.loads(value) if value.startswith("[") else value.split("|")
+    if field in OBJECT_FIELDS:
+        return json.loads(value)
+    return value
+
+
+def iter_records(path: str, fmt: str) -> Iterator[Dict]:
+    """Yields one dict per record; a line that is not valid JSON yields {"_error": ...}."""
+    with _open_text(path) as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                try:
+                    yield {key: _csv_value(key, value) for key, value in row.items() if value not in (None, "")}
+                except ValueError as e:
+                    yield {"_error": f"Invalid CSV value: {e}"}
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {"_error": f"Invalid JSON: {e}"}
+            yield record if isinstance(record, dict) else {"_error": "Record is not a JSON object"}
+
+
+# --- Users and merchants ---
+def _insert_new(db: Session, orm, key: str, rows: List[Dict], errors: List[Dict], indexes: List[int]):
+    # ON CONFLICT DO NOTHING: a row whose key (or unique email) exists is skipped, so resumed chunks are harmless
+    existing = set(db.execute(select(getattr(orm, key)).where(getattr(orm, key).in_([row[key] for row in rows]))).scalars())
+    new_rows = []
+    for index, row in zip(indexes, rows):
+        if row[key] in existing:
+            errors.append({"index": index, "id": row[key], "error": f"{key} already exists"})
+        else:
+            new_rows.append(row)
+    if not new_rows:
+        return 0, new_rows
+    # sqlite3 reports the rows actually inserted by the whole executemany
+    return db.execute(sqlite_insert(orm.__table__).on_conflict_do_nothing(), new_rows).rowcount, new_rows
+
+
+def _import_users_chunk(records: List[Dict], start_index: int, db: Session):
+    rows, indexes, errors = [], [], []
+    for offset, record in enumerate(records):
+        index = start_index + offset
+        try:
+            if "_error" in record:
+                raise ValueError(record["_error"])
+            user = UserImport.model_validate(record)
+        except (ValueError, ValidationError) as e:
+            errors.append({"index": index, "id": record.get("user_id"), "error": str(e)})
+            continue
+        rows.append({"user_id": user.user_id, "name": user.name, "email": str(user.email),
+                     "created_at": user.created_at or datetime.utcnow()})
+        indexes.append(index)
+    inserted, _ = _insert_new(db, UserORM, "user_id", rows, errors, indexes)
+    return inserted, errors
+
+
+def _import_merchants_chunk(records: List[Dict], start_index: int, db: Session):
+    rows, indexes, errors = [], [], []
+    for offset, record in enumerate(records):
+        index = start_index + offset
+        try:
+            if "_error" in record:
+                raise ValueError(record["_error"])
+            merchant = MerchantCreate.model_validate(record)
+        except (ValueError, ValidationError) as e:
+            errors.append({"index": index, "id": record.get("merchant_id"), "error": str(e)})
+            continue
+        rows.append(dict(merchant.model_dump(), created_at=datetime.utcnow()))
+        indexes.append(index)
+    inserted, new_rows = _insert_new(db, MerchantORM, "merchant_id", rows, errors, indexes)
+    # Same commit as the merchants, so a resumed import never leaves them unindexed
+    index_merchants(db, new_rows, replace=False)
+    if new_rows:
+        # Running servers rebuild their classifier snapshot on their next reload check
+        record_merchant_changes(db)
+    return inserted, errors
+
+
+# --- Transactions ---
+def _merchant_resolver(db: Session, default_merchant: Optional[str]) -> Callable[[str], Optional[str]]:
+    snapshot = load_snapshot(db)
+
+    @lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+    def resolve(raw_description: str) -> Optional[str]:
+        detected = detect_merchants(snapshot, normalize_description(raw_description))
+        return detected[0][0].merchant_id if detected else default_merchant
+
+    return resolve
+
+
+def _transactions_chunk_importer(db: Session, default_merchant: Optional[str], classify: bool):
+    resolve = _merchant_resolver(db, default_merchant)
+
+    def import_chunk(records: List[Dict], start_index: int, db: Session):
+        items = []
+        for record in records:
+            if "_error" not in record and not record.get("merchant_id") and record.get("raw_description"):
+                merchant_id = resolve(record["raw_description"])
+                if merchant_id:
+                    record["merchant_id"] = merchant_id
+                else:
+                    record["_error"] = "merchant_id is missing and no merchant was found in raw_description"
+            # Unparseable records still go through ingest, which reports them at their index
+            items.append({} if "_error" in record else record)
+        result = ingest_transactions_service(items, start_index, db, classify=classify)
+        errors = [{"index": error.index, "id": error.transaction_id, "error": error.error} for error in result.errors]
+        for error in errors:
+            record = records[error["index"] - start_index]
+            if "_error" in record:
+                error["error"] = record["_error"]
+        return result.inserted, errors
+
+    return import_chunk
+
+
+# --- Checkpoints ---
+def _checkpoint_path(path: str) -> str:
+    return f"{path}.import-state.json"
+
+
+def _read_checkpoint(path: str, kind: str) -> Dict:
+    checkpoint = _checkpoint_path(path)
+    if not os.path.exists(checkpoint):
+        return {}
+    with open(checkpoint) as f:
+        state = json.load(f)
+    if state.get("kind") != kind:
+        raise SystemExit(f"{checkpoint} belongs to a {state.get('kind')} import, not {kind}")
+    return state
+
+
+def _write_checkpoint(path: str, state: Dict):
+    # Write-then-rename, so an interruption never leaves a truncated checkpoint
+    checkpoint = _checkpoint_path(path)
+    with open(checkpoint + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(checkpoint + ".tmp", checkpoint)
+
+
+# --- Driver ---
+def run_import(kind: str, path: str, fmt: Optional[str] = None, chunk_size: int = config.IMPORT_CHUNK_SIZE,
+               resume: bool = False, classify: bool = False, default_merchant: Optional[str] = "m_uncategorized",
+               errors_path: Optional[str] = None) -> Dict:
+    fmt = _file_format(path, fmt)
+    ensure_schema(engine)
+    db = SessionLocal()
+    ensure_merchant_index(db)
+    state = _read_checkpoint(path, kind) if resume else {}
+    state = {"kind": kind, "path": os.path.abspath(path), "records": state.get("records", 0),
+             "inserted": state.get("inserted", 0), "failed": state.get("failed", 0)}
+    skip = state["records"]
+    if skip:
+        print(f"Resuming {kind} import of {path} after {skip} records", file=sys.stderr)
+
+    if kind == "users":
+        import_chunk = _import_users_chunk
+    elif kind == "merchants":
+        import_chunk = _import_merchants_chunk
+    else:
+        if default_merchant and not db.get(MerchantORM, default_merchant):
+            default_merchant = None
+        import_chunk = _transactions_chunk_importer(db, default_merchant, classify)
+        if classify:
+            # Users' overrides apply to imported transactions as they do to ingested ones
+            sync_overrides(db)
+            start_engine()
+
+    errors_file = open(errors_path, "a" if resume else "w") if errors_path else None
+    started = time.perf_counter()
+    done_this_run = 0
+    try:
+        records = iter_records(path, fmt)
+        for _ in range(skip):
+            if next(records, None) is None:
+                break
+        chunk: List[Dict] = []
+
+        def flush():
+            nonlocal done_this_run
+            try:
+                inserted, errors = import_chunk(chunk, state["records"], db)
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                raise SystemExit(f"Database error in the chunk starting at record {state['records']}: {e}")
+            state["records"] += len(chunk)
+            state["inserted"] += inserted
+            state["failed"] += len(errors)
+            state["updated_at"] = datetime.utcnow().isoformat()
+            _write_checkpoint(path, state)
+            if errors_file:
+                for error in errors:
+                    errors_file.write(json.dumps(error) + "\n")
+                errors_file.flush()
+            done_this_run += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"{kind}: records={state['records']} inserted={state['inserted']} failed={state['failed']} "
+                  f"rate={done_this_run / elapsed if elapsed else 0:,.0f} records/s", file=sys.stderr, flush=True)
+
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                flush()
+                chunk = []
+        if chunk:
+            flush()
+    finally:
+        stop_engine()
+        db.close()
+        if errors_file:
+            errors_file.close()
+    elapsed = time.perf_counter() - started
+    return dict(state, seconds=round(elapsed, 1),
+                records_per_second=round(done_this_run / elapsed, 1) if elapsed else 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=("users", "merchants", "transactions"))
+    parser.add_argument("path", help="CSV or NDJSON file, optionally gzipped")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="Default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=config.IMPORT_CHUNK_SIZE, help="Records per commit")
+    parser.add_argument("--resume", action="store_true", help="Continue after the records in the checkpoint file")
+    parser.add_argument("--classify", action="store_true", help="Classify transactions while importing")
+    parser.add_argument("--default-merchant", default="m_uncategorized",
+                        help="merchant_id for transactions whose merchant cannot be resolved")
+    parser.add_argument("--errors", help="Append rejected records (index, id, error) as NDJSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    summary = run_import(args.kind, args.path, args.format, args.chunk_size, args.resume, args.classify,
+                         args.default_merchant, args.errors)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Recomputes the merchant_aliases / merchant_mccs search index (and its FTS table) from the merchants table.
+
+    python -m app.db.rebuild_merchant_index
+
+Run after merchants were changed outside the API (e.g. direct SQL).
+"""
+import argparse
+import logging
+
+from app.db.db import SessionLocal, engine
+from app.db.migrations import ensure_schema
+from app.services.merchant_index_service import rebuild_merchant_index
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_merchant_index(db)
+    finally:
+        db.close()
+    print(f"merchants indexed: {count}")
+
+
+if __name__ == "__main__":
+    main()
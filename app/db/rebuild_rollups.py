@@ -0,0 +1,33 @@
+"""
+Recomputes the spending_rollups table from the transactions table.
+
+    python -m app.db.rebuild_rollups [--user-id u_123]
+
+Run after bulk changes made outside the API (e.g. direct SQL), or to verify/repair the
+incrementally maintained rollups.
+"""
+import argparse
+import logging
+
+from app.db.db import SessionLocal, engine
+from app.db.migrations import ensure_schema
+from app.services.rollup_service import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", help="Only rebuild this user's rollups")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_rollups(db, args.user_id)
+    finally:
+        db.close()
+    print(f"spending_rollups rows: {count}")
+
+
+if __name__ == "__main__":
+    main()
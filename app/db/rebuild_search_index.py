@@ -0,0 +1,31 @@
+"""
+Re-indexes every transaction in the full-text search index (transaction_fts).
+
+    python -m app.db.rebuild_search_index
+
+Run after a VACUUM (which may renumber the transactions' rowids) or after direct SQL
+changes made with the sync triggers missing.
+"""
+import argparse
+import logging
+
+from app.db.db import SessionLocal, engine
+from app.db.migrations import ensure_schema
+from app.services.search_service import ensure_search_index
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        ensure_search_index(db, rebuild=True)
+    finally:
+        db.close()
+    print("transaction search index rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 
 import app.models as models
+from app.classifier.normalize import normalize_description
+from app.services.merchant_index_service import rebuild_merchant_index
 from db import SessionLocal, engine
 
 #  Ensure tables are created
@@ -131,6 +133,7 @@ def seed():
         session.add(uncategorized)
 
     session.commit()
+    rebuild_merchant_index(session)
 
     # Seed transactions
     for t in TRANSACTIONS:
@@ -149,6 +152,7 @@ def seed():
                 user_id="user_42",
                 merchant_id=merchant.merchant_id if merchant else "m_uncategorized",
                 raw_description=t["raw_description"],
+                normalized_description=normalize_description(t["raw_description"]),
                 amount=t["amount"],
                 currency="INR",
                 mcc=t["mcc"],
@@ -0,0 +1,119 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app import config
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+# Attributes every LogRecord has; anything else on a record came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra` fields such as transaction_id and latency_ms become keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _BackgroundQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread untouched: the message is formatted there, not on
+    the request thread. When the queue is full the record is dropped instead of blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record needs no pickling-safe copy
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging():
+    """
+    LOG_MODE=sync (default) writes text logs on the calling thread, as before.
+    LOG_MODE=async writes JSON lines from a background thread fed by a bounded queue.
+    """
+    global _listener
+    shutdown_logging()
+    root = logging.getLogger()
+    root.setLevel(config.LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if config.LOG_MODE != "async":
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(stream_handler)
+        return
+
+    stream_handler.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    root.addHandler(_BackgroundQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Writes out whatever is still queued and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# --- Per-transaction logging ---
+class TransactionLogger:
+    """
+    Sampled logging for lines emitted once per transaction. Call sample() once per
+    transaction and only log when it returns True, so all lines of a transaction are
+    kept or dropped together and dropped ones cost a single random() call.
+    Messages use %-style args and are only formatted when actually written.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def sample(self) -> bool:
+        rate = config.LOG_TXN_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def log(self, level: int, msg: str, *args, transaction_id: Optional[str] = None,
+            started: Optional[float] = None):
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = {"transaction_id": transaction_id}
+        if started is not None:
+            extra["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self.logger.log(level, msg, *args, extra=extra)
@@ -0,0 +1,235 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app import config
+
+# --- Metric types ---
+# Minimal in-process metrics rendered in the Prometheus text format. Per-request metrics take
+# one uncontended lock and a bisect; per-transaction stage timings only append a row to a
+# buffer that is bucketed with numpy in bulk (StageTimings). Pool workers accumulate locally
+# and ship their counts back with each chunk result (see drain_stage_metrics / merge_stage_metrics).
+
+LATENCY_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float, n: int = 1):
+        # n > 0 records n observations of the same (e.g. amortized per-item) value
+        self.counts[bisect_left(self.buckets, value)] += n
+        self.sum += value * n
+        self.count += n
+
+    def merge(self, counts: List[int], total: float, count: int):
+        for i, bucket_count in enumerate(counts):
+            self.counts[i] += bucket_count
+        self.sum += total
+        self.count += count
+
+
+class LabeledHistogram:
+    def __init__(self, name: str, documentation: str, label: str, buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._children: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _child(self, label_value: str) -> Histogram:
+        child = self._children.get(label_value)
+        if child is None:
+            child = self._children.setdefault(label_value, Histogram(self.buckets))
+        return child
+
+    def observe(self, label_value: str, value: float, n: int = 1):
+        if not config.METRICS_ENABLED:
+            return
+        with self._lock:
+            self._child(label_value).observe(value, n)
+
+    def drain(self) -> Dict[str, Tuple[List[int], float, int]]:
+        with self._lock:
+            drained = {label_value: (child.counts, child.sum, child.count)
+                       for label_value, child in self._children.items() if child.count}
+            self._children = {}
+        return drained
+
+    def merge(self, drained: Dict[str, Tuple[List[int], float, int]]):
+        with self._lock:
+            for label_value, (counts, total, count) in drained.items():
+                self._child(label_value).merge(counts, total, count)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = [(value, list(child.counts), child.sum, child.count)
+                        for value, child in sorted(self._children.items())]
+        for label_value, counts, total, count in children:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {total:.9g}')
+            lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+class LabeledCounter:
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: int = 1):
+        if not config.METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = ",".join(f'{label}="{value}"' for label, value in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+class StageTimings:
+    """
+    Hot-path recorder for a fixed tuple of stages: record() appends one row of durations
+    (NaN for a stage that did not run) and every flush_every rows the buffer is bucketed
+    into the histogram with a few vectorized numpy calls.
+    """
+
+    def __init__(self, histogram: LabeledHistogram, stages: Tuple[str, ...], flush_every: int = 4096):
+        self.histogram = histogram
+        self.stages = stages
+        self._flush_every = flush_every
+        self._bounds = np.array(histogram.buckets, dtype=np.float64)
+        self._pending: List[Tuple[float, ...]] = []
+        self._lock = threading.Lock()
+
+    def record(self, row: Tuple[float, ...]):
+        if not config.METRICS_ENABLED:
+            return
+        pending = self._pending
+        # list.append is atomic under the GIL; no lock on the hot path
+        pending.append(row)
+        if len(pending) >= self._flush_every:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+        matrix = np.array(rows, dtype=np.float64)
+        drained = {}
+        for column, stage in enumerate(self.stages):
+            values = matrix[:, column]
+            values = values[~np.isnan(values)]
+            if values.size:
+                # side="left" puts a value equal to a bound into that bound's ("le") bucket, like bisect_left
+                counts = np.bincount(np.searchsorted(self._bounds, values, side="left"),
+                                     minlength=len(self._bounds) + 1)
+                drained[stage] = (counts.tolist(), float(values.sum()), int(values.size))
+        self.histogram.merge(drained)
+
+
+# --- Registry ---
+STAGE_LATENCY = LabeledHistogram(
+    "classify_stage_duration_seconds",
+    "Time spent per classification pipeline stage, per transaction (sampled, see METRICS_STAGE_SAMPLE_EVERY).",
+    "stage", LATENCY_BUCKETS,
+)
+PIPELINE_STAGES = StageTimings(
+    STAGE_LATENCY, ("merchant_lookup", "semantic_similarity", "mcc_map", "regex_rules", "ranking"),
+)
+REQUEST_LATENCY = LabeledHistogram(
+    "classify_request_duration_seconds",
+    "Classification endpoint latency, until the last response byte.",
+    "endpoint", REQUEST_BUCKETS,
+)
+REQUESTS = LabeledCounter(
+    "classify_requests_total",
+    "Classification endpoint requests by response status class.",
+    ("endpoint", "status"),
+)
+BATCH_SIZE = LabeledHistogram(
+    "classify_batch_size",
+    "Transactions per classification batch (bulk request, stream micro-batch, job chunk).",
+    "source", BATCH_SIZE_BUCKETS,
+)
+REGISTRY = (STAGE_LATENCY, REQUEST_LATENCY, REQUESTS, BATCH_SIZE)
+
+
+def render_metrics() -> str:
+    PIPELINE_STAGES.flush()
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Pool workers ---
+def drain_stage_metrics():
+    PIPELINE_STAGES.flush()
+    return STAGE_LATENCY.drain()
+
+
+def merge_stage_metrics(drained):
+    STAGE_LATENCY.merge(drained)
+
+
+# --- Request instrumentation ---
+# Pure ASGI middleware, so streaming responses are timed until their last chunk
+class MetricsMiddleware:
+    def __init__(self, app, endpoints: Dict[str, str]):
+        # Request path (with and without trailing slash) -> endpoint label
+        self.app = app
+        self.endpoints = {}
+        for path, label in endpoints.items():
+            self.endpoints[path.rstrip("/") or "/"] = label
+            self.endpoints[path.rstrip("/") + "/"] = label
+
+    async def __call__(self, scope, receive, send):
+        endpoint: Optional[str] = None
+        if scope["type"] == "http" and config.METRICS_ENABLED:
+            endpoint = self.endpoints.get(scope["path"])
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.observe(endpoint, time.perf_counter() - start)
+            REQUESTS.inc(endpoint, f"{status // 100}xx")
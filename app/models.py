@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Float
+from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Float, Integer, Boolean, Index, UniqueConstraint
 from datetime import datetime
 
 from app.db.db import Base
@@ -20,8 +20,43 @@ class MerchantORM(Base):
     default_category = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
 
+# One row per merchant write, in commit order. Running processes apply the rows newer than the
+# last seq they saw to their classifier snapshot (app/classifier/snapshot.py); merchant_id is
+# NULL when many merchants changed at once (e.g. a file import) and the snapshot is rebuilt.
+class MerchantChangeORM(Base):
+    __tablename__ = "merchant_changes"
+    seq = Column(Integer, primary_key=True)
+    merchant_id = Column(String, nullable=True)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# Search indexes over merchants.aliases / merchants.typical_mccs (the JSON columns stay the
+# source of truth), maintained by app/services/merchant_index_service.py
+class MerchantAliasORM(Base):
+    __tablename__ = "merchant_aliases"
+    __table_args__ = (
+        UniqueConstraint("merchant_id", "alias_key", name="uq_merchant_aliases_merchant_id_alias_key"),
+        Index("ix_merchant_aliases_alias_key", "alias_key", "merchant_id"),
+    )
+    # Rowid of the merchant_alias_fts trigram index
+    id = Column(Integer, primary_key=True)
+    merchant_id = Column(String, ForeignKey("merchants.merchant_id"), nullable=False)
+    # Lowercased, whitespace-collapsed alias
+    alias_key = Column(String, nullable=False)
+
+class MerchantMccORM(Base):
+    __tablename__ = "merchant_mccs"
+    mcc = Column(String, primary_key=True)
+    merchant_id = Column(String, ForeignKey("merchants.merchant_id"), primary_key=True, index=True)
+
 class TransactionORM(Base):
     __tablename__ = "transactions"
+    # Listing filters + keyset sort (sort column, id), so pages are read straight from the index
+    __table_args__ = (
+        Index("ix_transactions_user_id_posted_at", "user_id", "posted_at", "id"),
+        Index("ix_transactions_merchant_id_posted_at", "merchant_id", "posted_at", "id"),
+        Index("ix_transactions_user_id_category_posted_at", "user_id", "category", "posted_at", "id"),
+        Index("ix_transactions_user_id_amount", "user_id", "amount", "id"),
+    )
     id = Column(String, primary_key=True, index=True)
     user_id = Column(String, ForeignKey("users.user_id"), nullable=False)
     merchant_id = Column(String, ForeignKey("merchants.merchant_id"), nullable=False)
@@ -34,4 +69,94 @@ class TransactionORM(Base):
     channel = Column(String, nullable=True)  # e.g. pos, ecom, atm
     geo = Column(JSON, default=dict)
     account_id = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Latest stored classification; cleared when the classified fields change
+    category = Column(String, nullable=True, index=True)
+    category_confidence = Column(Float, nullable=True)
+    category_reasons = Column(JSON, nullable=True)
+    classifier_version = Column(Integer, nullable=True)
+    classified_at = Column(DateTime, nullable=True)
+
+class ClassificationJobORM(Base):
+    __tablename__ = "classification_jobs"
+    job_id = Column(String, primary_key=True)
+    # receiving -> queued -> running -> completed | cancelled | failed
+    status = Column(String, nullable=False, default="receiving", index=True)
+    total_items = Column(Integer, nullable=False, default=0)
+    # Items are processed in seq order, so this is also the resume cursor
+    processed_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Touched by every upload batch while receiving, and by every chunk while running
+    heartbeat_at = Column(DateTime, nullable=True)
+    # Attempts in a row that hit a database error without making progress
+    attempts = Column(Integer, nullable=False, default=0)
+
+class ClassificationJobItemORM(Base):
+    __tablename__ = "classification_job_items"
+    job_id = Column(String, ForeignKey("classification_jobs.job_id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    transaction_id = Column(String, nullable=True)
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+
+class SpendingRollupORM(Base):
+    __tablename__ = "spending_rollups"
+    # Maintained incrementally by app/services/rollup_service.py; month is "YYYY-MM" of posted_at
+    user_id = Column(String, primary_key=True)
+    month = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    txn_count = Column(Integer, nullable=False, default=0)
+    min_amount = Column(Float, nullable=True)
+    max_amount = Column(Float, nullable=True)
+
+# Classifier taxonomy (MCC map and keyword rules), editable at runtime; app/taxonomy.py holds
+# the defaults it is seeded with. Every edit adds a taxonomy_versions row in the same commit,
+# and running processes reload when they see a newer version (app/classifier/snapshot.py).
+class TaxonomyMccORM(Base):
+    __tablename__ = "taxonomy_mcc_categories"
+    mcc = Column(String, primary_key=True)
+    category = Column(String, nullable=False)
+
+class TaxonomyRuleORM(Base):
+    __tablename__ = "taxonomy_rules"
+    # Rules are evaluated in id order
+    id = Column(Integer, primary_key=True)
+    keyword = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    reason = Column(String, nullable=False)
+    # None (substring), "word", "start" or "end"; see app/classifier/matcher.py
+    boundary = Column(String, nullable=True)
+
+class TaxonomyVersionORM(Base):
+    __tablename__ = "taxonomy_versions"
+    version = Column(Integer, primary_key=True)
+    change = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# Per-user category corrections, checked before the classification pipeline runs.
+# Running processes keep them in memory and apply the rows whose change_seq is newer than
+# the last one they saw (app/classifier/overrides.py), so removals are kept as category=None.
+class ClassificationOverrideORM(Base):
+    __tablename__ = "classification_overrides"
+    __table_args__ = (
+        UniqueConstraint("user_id", "scope", "key", name="uq_classification_overrides_user_id_scope_key"),
+        Index("ix_classification_overrides_change_seq", "change_seq"),
+    )
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, ForeignKey("users.user_id"), nullable=False)
+    # "merchant": key is a merchant_id; "descriptor": key is a normalized description
+    scope = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    category = Column(String, nullable=True)
+    # Transaction whose correction created or last changed the override
+    transaction_id = Column(String, nullable=True)
+    change_seq = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,117 @@
+import json
+from typing import AsyncIterator, Optional, Union
+
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Longest single record accepted in an NDJSON body
+MAX_LINE_BYTES = 1024 * 1024
+# Bodies iter_submitted_items reads; no content type is read as NDJSON (e.g. curl -T)
+SUBMISSION_MEDIA_TYPES = ("application/json", NDJSON_MEDIA_TYPE, "application/jsonl", "application/octet-stream",
+                          "multipart/form-data", "")
+# Multipart field holding the uploaded file, and the size of each read from it
+UPLOAD_FIELD = "file"
+UPLOAD_READ_SIZE = 64 * 1024
+
+
+class NDJSONLineTooLong(ValueError):
+    pass
+
+
+async def _split_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+        if len(buffer) > max_line_bytes:
+            raise NDJSONLineTooLong(f"NDJSON line exceeds {max_line_bytes} bytes")
+    if buffer.strip():
+        yield buffer
+
+
+async def iter_ndjson_lines(request: Request, max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[bytes]:
+    """
+    Yields the non-blank lines of an NDJSON request body as they arrive.
+    Only the current partial line is buffered, so memory does not grow with the body size.
+    """
+    async for line in _split_lines(request.stream(), max_line_bytes):
+        yield line
+
+
+async def _upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(UPLOAD_READ_SIZE):
+        yield chunk
+
+
+def _json_array(raw: bytes) -> list:
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Body is not valid JSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=422, detail="JSON body must be an array of transactions")
+    return body
+
+
+def _media_type(content_type: Optional[str]) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def check_submission_content_type(request: Request):
+    """Rejects a body that iter_submitted_items cannot read with 415 before any work is done."""
+    media_type = _media_type(request.headers.get("content-type"))
+    if media_type not in SUBMISSION_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type '{media_type}'; send application/json, "
+                   f"{NDJSON_MEDIA_TYPE} or a multipart/form-data upload in the '{UPLOAD_FIELD}' field",
+        )
+
+
+async def iter_submitted_items(request: Request) -> AsyncIterator[Union[dict, bytes]]:
+    """
+    Yields the records of a JSON array body (parsed), of an NDJSON body (raw lines, read
+    incrementally; parse them with model_validate_json), or of a multipart/form-data upload
+    of either kind in the `file` field. A .json file or one sent as application/json is read
+    as an array; anything else as NDJSON, streamed from the spooled upload.
+    """
+    check_submission_content_type(request)
+    media_type = _media_type(request.headers.get("content-type"))
+    if media_type == "application/json":
+        for raw in _json_array(await request.body()):
+            yield raw
+    elif media_type == "multipart/form-data":
+        async with request.form() as form:
+            upload = form.get(UPLOAD_FIELD)
+            if not isinstance(upload, UploadFile):
+                raise HTTPException(status_code=422, detail=f"Multipart body has no '{UPLOAD_FIELD}' file field")
+            if _media_type(upload.content_type) == "application/json" or (upload.filename or "").endswith(".json"):
+                for raw in _json_array(await upload.read()):
+                    yield raw
+            else:
+                async for line in _split_lines(_upload_chunks(upload), MAX_LINE_BYTES):
+                    yield line
+    else:
+        async for line in iter_ndjson_lines(request):
+            yield line
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams NDJSON while the request body is still being consumed by the body iterator.
+    StreamingResponse would also read from `receive` to watch for disconnects and steal
+    body messages; here a disconnect surfaces through the request stream instead.
+    Each send waits for the client to drain the socket, which gives natural backpressure.
+    """
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
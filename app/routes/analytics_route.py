@@ -0,0 +1,23 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Path, Query
+from sqlalchemy.orm import Session
+
+from app.db.db import get_read_db
+from app.schemas.analytics_schema import SpendingSummary
+from app.services.rollup_service import get_spending_service
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+@router.get("/spending/{user_id}", response_model=SpendingSummary)
+def get_spending(
+        user_id: str = Path(..., min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="User ID"),
+        month_from: Optional[str] = Query(None, regex=MONTH_PATTERN, description="First month (YYYY-MM), inclusive"),
+        month_to: Optional[str] = Query(None, regex=MONTH_PATTERN, description="Last month (YYYY-MM), inclusive"),
+        category: Optional[str] = Query(None, min_length=1, max_length=64, description="Category"),
+        db: Session = Depends(get_read_db)
+):
+    # Served from the spending_rollups table: one row per month and category, no transaction scan
+    return get_spending_service(user_id, db, month_from, month_to, category)
@@ -0,0 +1,125 @@
+"""
+Async variants of the API routes, served instead of the sync ones when DB_ASYNC=1.
+
+Sync routes run on Starlette's thread pool (40 threads), so many concurrent slow queries
+exhaust it long before the CPU is busy. The hot endpoints get hand-written async variants
+on an AsyncSession whose queries are awaited on aiosqlite instead of holding a pool thread:
+transaction reads build the same statements as their sync services and await them. For
+classification only the waiting is async: validation and result writes run on a thread with
+a sync session (AsyncSession.run_sync would run them on the event loop), /classify runs the
+pipeline on a thread and /classify/bulk awaits the worker pool's futures. Every other route
+stays a sync `def`, which FastAPI runs on the thread pool, so service code with real Python
+work (validation, rollup hooks, snapshot updates on merchant writes) never runs on the event loop.
+"""
+import inspect
+import logging
+from typing import Callable, Dict, List
+
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.classifier.engine import classify_validated_async
+from app.classifier.snapshot import get_snapshot
+from app.db.async_db import get_async_db, get_async_read_db
+from app.db.db import SessionLocal, get_read_db
+from app.metrics import BATCH_SIZE
+from app.models import TransactionORM
+from app.routes import classify_route, transactions_route
+from app.schemas.classification_schema import ClassificationRequest, ClassificationResult
+from app.services.classification_service import pipeline_classify_service, save_classification_results
+from app.services.transaction_service import get_transaction_service_async, list_transactions_service_async
+from app.validators.classification_validator import validate_transaction
+
+logger = logging.getLogger("classification")
+
+
+# --- Classification ---
+def _in_session(work: Callable):
+    # Runs on a worker thread, with a sync session of its own
+    db = SessionLocal()
+    try:
+        return work(db)
+    finally:
+        db.close()
+
+async def classify_transaction_async(payload: ClassificationRequest, db: AsyncSession) -> ClassificationResult:
+    await run_in_threadpool(_in_session, lambda session: validate_transaction(payload, session, payload.id,
+                                                                              TransactionORM))
+    version = get_snapshot().version
+    result = await run_in_threadpool(pipeline_classify_service, payload, None)
+    await run_in_threadpool(_in_session, lambda session: save_classification_results([result], session, version))
+    return result
+
+async def classify_bulk_async(transactions: List[ClassificationRequest], db: AsyncSession) -> List[ClassificationResult]:
+    logger.info(f"Received bulk classification request for {len(transactions)} transactions")
+    BATCH_SIZE.observe("bulk", len(transactions))
+    version = get_snapshot().version
+    results = await classify_validated_async(transactions)
+    await run_in_threadpool(_in_session, lambda session: save_classification_results(results, session, version))
+    return results
+
+# --- Transactions ---
+async def get_transaction_async(transaction_id: str, db: AsyncSession):
+    return await get_transaction_service_async(transaction_id, db)
+
+async def list_transactions_async(db: AsyncSession, **filters):
+    return await list_transactions_service_async(db=db, **filters)
+
+# Sync endpoint -> hand-written async variant taking the same parameters
+ASYNC_OVERRIDES: Dict[Callable, Callable] = {
+    classify_route.classify_transaction: classify_transaction_async,
+    classify_route.classify_bulk: classify_bulk_async,
+    transactions_route.get_transaction: get_transaction_async,
+    transactions_route.list_transactions: list_transactions_async,
+}
+
+
+# --- Router conversion ---
+def _async_signature(endpoint: Callable) -> inspect.Signature:
+    # Same parameters (and so the same validation and OpenAPI schema); `db` now yields an AsyncSession
+    signature = inspect.signature(endpoint)
+    params = []
+    for param in signature.parameters.values():
+        if param.name == "db":
+            read_only = getattr(param.default, "dependency", None) is get_read_db
+            param = param.replace(default=Depends(get_async_read_db if read_only else get_async_db),
+                                  annotation=AsyncSession)
+        params.append(param)
+    return signature.replace(parameters=params)
+
+def build_async_router(router: APIRouter) -> APIRouter:
+    """Copy of a sync router with the endpoints in ASYNC_OVERRIDES replaced; the others are kept as they are."""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+        endpoint = route.endpoint
+        async_endpoint = ASYNC_OVERRIDES.get(endpoint)
+        if async_endpoint is not None:
+            async_endpoint.__signature__ = _async_signature(endpoint)
+            async_endpoint.__name__ = endpoint.__name__
+            async_endpoint.__doc__ = endpoint.__doc__
+            endpoint = async_endpoint
+        async_router.add_api_route(
+            route.path,
+            endpoint,
+            methods=list(route.methods),
+            name=route.name,
+            tags=route.tags,
+            summary=route.summary,
+            description=route.description,
+            status_code=route.status_code,
+            response_model=route.response_model,
+            response_class=route.response_class,
+            response_description=route.response_description,
+            responses=route.responses,
+            response_model_exclude_none=route.response_model_exclude_none,
+            response_model_exclude_unset=route.response_model_exclude_unset,
+            dependencies=route.dependencies,
+            include_in_schema=route.include_in_schema,
+            deprecated=route.deprecated,
+        )
+    return async_router
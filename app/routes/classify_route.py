@@ -1,29 +1,34 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Request, HTTPException, Path, Query
 import json
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from fastapi.responses import StreamingResponse
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 
-from app.schemas.classification_schema import ClassificationRequest, ClassificationResult
-from app.db.db import get_db
-from app.services.classification_service import pipeline_classify_service
+from app.config import CLASSIFY_STREAM_BATCH_SIZE
+from app.ndjson import NDJSONLineTooLong, NDJSONStreamingResponse, iter_ndjson_lines
+from app.schemas.classification_schema import (
+    ClassificationRequest, ClassificationResult, CorrectionRequest, CorrectionResult, OverrideOut,
+)
+from app.db.db import get_db, get_read_db, SessionLocal
+from app.classifier.engine import classify_validated, cache_stats
+from app.classifier.snapshot import get_snapshot
+from app.metrics import BATCH_SIZE
+from app.services.classification_service import pipeline_classify_service, save_classification_results
+from app.services.override_service import correct_transaction_service, delete_override_service, list_overrides_service
 from app.models import TransactionORM
 from app.validators.classification_validator import validate_transaction
 import logging
 
+# Output goes through the root handlers set up by app.logging_config
 logger = logging.getLogger("classification")
-logger.setLevel(logging.INFO)
-if not logger.hasHandlers():
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
 
 router = APIRouter(prefix="/classify", tags=["classification"])
 
-@router.post("/", response_model=ClassificationResult)
+@router.post("/", response_model=ClassificationResult, response_model_exclude_none=True)
 def classify_transaction(payload: ClassificationRequest = Body(..., description="Transaction to classify",
    example={
        "id": "txn_test_multi3",
@@ -36,9 +41,12 @@ def classify_transaction(payload: ClassificationRequest = Body(..., description=
    }),
     db: Session = Depends(get_db)):
         validate_transaction(payload, db, payload.id, TransactionORM)
-        return pipeline_classify_service(payload, db)
+        version = get_snapshot().version
+        result = pipeline_classify_service(payload, db)
+        save_classification_results([result], db, version)
+        return result
 
-@router.post("/bulk", response_model=List[ClassificationResult])
+@router.post("/bulk", response_model=List[ClassificationResult], response_model_exclude_none=True)
 def classify_bulk(transactions: List[ClassificationRequest] = Body(
     ...,
     min_items=1,
@@ -67,75 +75,104 @@ def classify_bulk(transactions: List[ClassificationRequest] = Body(
 ),
 db: Session = Depends(get_db)):
     logger.info(f"Received bulk classification request for {len(transactions)} transactions")
-    txn_ids = [txn.id for txn in transactions if txn.id]
-    # Fetch all relevant transactions in one query
-    txns = db.query(TransactionORM).filter(TransactionORM.id.in_(txn_ids)).all()
-    txn_map = {txn.id: txn for txn in txns}
+    BATCH_SIZE.observe("bulk", len(transactions))
+    # Validated and hydrated with two set-based queries, then chunked over the worker pool;
+    # results come back in input order with per-transaction errors
+    version = get_snapshot().version
+    results = classify_validated(transactions, db)
+    save_classification_results(results, db, version)
+    return results
 
-    def classify(txn_req: ClassificationRequest):
-        # Fill missing fields from db_txn if available
-        db_txn = txn_map.get(txn_req.id)
-        if db_txn:
-            data = txn_req.dict()
-            for field, value in data.items():
-                if (value is None or value == "") and hasattr(db_txn, field):
-                    data[field] = getattr(db_txn, field)
-            txn_req = ClassificationRequest(**data)
-        return pipeline_classify_service(txn_req, db)
+@router.get("/cache/stats")
+def classification_cache_stats():
+    return cache_stats()
 
-    # Parallel processing
-    results = []
-    with ThreadPoolExecutor() as executor:
-        future_to_txn = {executor.submit(classify, txn): txn for txn in transactions}
-        for future in as_completed(future_to_txn):
-            results.append(future.result())
-    return results
+@router.post("/corrections", response_model=CorrectionResult)
+def correct_transaction(payload: CorrectionRequest, db: Session = Depends(get_db)):
+    """
+    Sets the category of a stored transaction and remembers it for the user: later transactions
+    at the same merchant (scope=merchant) or with the same normalized description
+    (scope=descriptor) get this category without running the pipeline.
+    """
+    return correct_transaction_service(payload, db)
 
-@router.post("/classify/bulk/stream")
-def classify_bulk_stream(
-        requests: List[ClassificationRequest] = Body(
-            ...,
-            min_items=1,
-            max_items=1000,
-            description="List of transactions to classify (max 1000)",
-            example=[
-                {
-                    "id": "txn_test_multi3",
-                    "user_id": "user_42",
-                    "merchant_id": "m_store",
-                    "amount": 45.00,
-                    "currency": "USD",
-                    "raw_description": "WALMART STARBUCKS MONTHLY FEE CHARGE",
-                    "mcc": "5399"
-                },
-                {
-                    "id": "txn_test_multi4",
-                    "user_id": "user_42",
-                    "merchant_id": "m_store",
-                    "amount": 45.00,
-                    "currency": "USD",
-                    "raw_description": "WALMART STARBUCKS UBER MONTHLY FEE",
-                    "mcc": "5812"
-                }
-            ]
-        ),
-        db: Session = Depends(get_db)
+@router.get("/overrides", response_model=List[OverrideOut])
+def list_overrides(
+        db: Session = Depends(get_read_db),
+        user_id: str = Query(..., min_length=1, max_length=64, description="Owner of the overrides"),
+        scope: Optional[str] = Query(None, regex="^(merchant|descriptor)$"),
+        limit: int = Query(50, ge=1, le=500),
+        offset: int = Query(0, ge=0)
 ):
-    logger.info(f"Received bulk stream classification request for {len(requests)} transactions")
+    return list_overrides_service(db, user_id, scope, limit, offset)
+
+@router.delete("/overrides/{override_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_override(override_id: int = Path(..., ge=1), db: Session = Depends(get_db)):
+    return delete_override_service(override_id, db)
 
-    def result_generator():
-        yield "["  # start JSON array
-        first = True
-        for req in requests:
+@router.post("/bulk/stream", response_class=NDJSONStreamingResponse)
+async def classify_bulk_stream(request: Request):
+    """
+    Streams NDJSON results for an NDJSON request body of any size.
+    Records are read incrementally and classified in micro-batches of CLASSIFY_STREAM_BATCH_SIZE;
+    each batch is written out before the next one is read. Invalid lines produce
+    {"line": n, "error": ...} in their position in the output; results of a batch that could
+    not be stored carry "stored": false.
+    """
+    logger.info("Received bulk stream classification request")
+
+    async def result_generator():
+        db = SessionLocal()
+        batch = []
+        line_no = 0
+        total = 0
+        try:
             try:
-                result = pipeline_classify_service(req, db)
-                if not first:
-                    yield ","  # add comma between objects
-                else:
-                    first = False
-                yield json.dumps(result.model_dump())
-            except Exception as e:
-                logger.error(f"Error in streaming classify for {req.id}: {e}")
-        yield "]"  # end JSON array
+                async for line in iter_ndjson_lines(request):
+                    line_no += 1
+                    try:
+                        batch.append(ClassificationRequest.model_validate_json(line))
+                    except ValidationError as e:
+                        details = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                        batch.append({"line": line_no, "error": f"Invalid transaction: {details}"})
+                    if len(batch) >= CLASSIFY_STREAM_BATCH_SIZE:
+                        total += len(batch)
+                        yield await run_in_threadpool(_classify_stream_batch, batch, db)
+                        batch = []
+            except NDJSONLineTooLong as e:
+                batch.append({"line": line_no + 1, "error": str(e)})
+            except ClientDisconnect:
+                logger.warning(f"Client disconnected from bulk stream after {line_no} lines")
+                return
+            if batch:
+                total += len(batch)
+                yield await run_in_threadpool(_classify_stream_batch, batch, db)
+            logger.info(f"Bulk stream classification finished: {total} records")
+        finally:
+            db.close()
+
+    return NDJSONStreamingResponse(result_generator())
 
-    return StreamingResponse(result_generator(), media_type="application/json")
\ No newline at end of file
+def _classify_stream_batch(batch: list, db: Session) -> str:
+    BATCH_SIZE.observe("stream", len(batch))
+    requests = [item for item in batch if isinstance(item, ClassificationRequest)]
+    version = get_snapshot().version
+    classified = classify_validated(requests, db) if requests else []
+    stored = True
+    try:
+        save_classification_results(classified, db, version)
+    except HTTPException as e:
+        # The results are still streamed, each marked "stored": false so the caller can retry them
+        logger.warning(f"Bulk stream batch not stored: size={len(classified)}, error={e.detail}")
+        stored = False
+    results = iter(classified)
+    lines = []
+    for item in batch:
+        if isinstance(item, ClassificationRequest):
+            line = next(results).model_dump(exclude_none=True)
+            if not stored:
+                line["stored"] = False
+            lines.append(json.dumps(line))
+        else:
+            lines.append(json.dumps(item))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+import logging
+
+from fastapi import APIRouter, Depends, Path, Query, Request, HTTPException
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from app.db.db import get_db, get_read_db, SessionLocal
+from app.ndjson import NDJSONLineTooLong, check_submission_content_type, iter_submitted_items
+from app.schemas.classification_schema import ClassificationRequest
+from app.schemas.job_schema import JobOut, JobResultsPage
+from app.services.job_service import (
+    create_job_service,
+    add_job_items_service,
+    enqueue_job_service,
+    fail_job_service,
+    get_job_service,
+    get_job_results_service,
+    cancel_job_service,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/classify/jobs", tags=["classification jobs"])
+
+# Submitted records are validated and written to the job in batches of this size
+SUBMIT_BATCH_SIZE = 1000
+
+def _parse_item(raw) -> dict:
+    try:
+        if isinstance(raw, (bytes, str)):
+            return ClassificationRequest.model_validate_json(raw).model_dump(mode="json", exclude_unset=True)
+        return ClassificationRequest.model_validate(raw).model_dump(mode="json", exclude_unset=True)
+    except ValidationError as e:
+        details = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        return {"error": f"Invalid transaction: {details}"}
+
+@router.post("/", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(request: Request):
+    """
+    Accepts transactions as a JSON array, an NDJSON body, or either as a multipart/form-data
+    file upload (field `file`), and returns the job immediately; classification runs in the
+    background workers. Other content types are rejected with 415.
+    """
+    check_submission_content_type(request)
+    db = SessionLocal()
+    try:
+        job = await run_in_threadpool(create_job_service, db)
+        total = 0
+        batch = []
+        try:
+            async for raw in iter_submitted_items(request):
+                batch.append(_parse_item(raw))
+                if len(batch) >= SUBMIT_BATCH_SIZE:
+                    await run_in_threadpool(add_job_items_service, job.job_id, total, batch, db)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                await run_in_threadpool(add_job_items_service, job.job_id, total, batch, db)
+                total += len(batch)
+        except (HTTPException, NDJSONLineTooLong) as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            await run_in_threadpool(fail_job_service, job.job_id, detail, db)
+            raise HTTPException(status_code=e.status_code if isinstance(e, HTTPException) else 422, detail=detail)
+        await run_in_threadpool(enqueue_job_service, job.job_id, total, db)
+        return await run_in_threadpool(get_job_service, job.job_id, db)
+    finally:
+        db.close()
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(
+        job_id: str = Path(..., min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="Job ID"),
+        db: Session = Depends(get_read_db)
+):
+    return get_job_service(job_id, db)
+
+@router.get("/{job_id}/results", response_model=JobResultsPage, response_model_exclude_none=True)
+def get_job_results(
+        job_id: str = Path(..., min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="Job ID"),
+        after: int = Query(-1, ge=-1, description="Return results after this seq (next_after of the previous page)"),
+        limit: int = Query(1000, ge=1, le=10000, description="Page size"),
+        db: Session = Depends(get_read_db)
+):
+    return get_job_results_service(job_id, db, after, limit)
+
+@router.post("/{job_id}/cancel", response_model=JobOut)
+def cancel_job(
+        job_id: str = Path(..., min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="Job ID"),
+        db: Session = Depends(get_db)
+):
+    return cancel_job_service(job_id, db)
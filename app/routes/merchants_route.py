@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from starlette import status
 from typing import List, Optional
 
-from app.db.db import get_db
+from app.db.db import get_db, get_read_db
 from app.schemas.merchant_schema import MerchantOut, MerchantCreate, MerchantUpdate
 from app.services.merchant_service import (
     create_merchant_service,
@@ -33,7 +33,7 @@ def update_merchant(
 @router.get("/{merchant_id}", response_model=MerchantOut)
 def get_merchant(
         merchant_id: str = Path(..., min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="Merchant ID"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     return get_merchant_service(merchant_id, db)
 
@@ -46,10 +46,11 @@ def delete_merchant(
 
 @router.get("/", response_model=List[MerchantOut])
 def list_merchants(
-        db: Session = Depends(get_db),
-        alias: Optional[str] = Query(None, min_length=1, max_length=64, description="Filter by alias substring"),
-        mcc: Optional[str] = Query(None, min_length=3, max_length=4, regex="^[0-9]+$", description="Filter by MCC"),
+        db: Session = Depends(get_read_db),
+        alias: Optional[str] = Query(None, min_length=1, max_length=64, description="Filter by alias (case-insensitive)"),
+        alias_match: str = Query("contains", regex="^(contains|prefix|exact)$", description="How `alias` is matched"),
+        mcc: Optional[str] = Query(None, min_length=3, max_length=4, regex="^[0-9]+$", description="Merchants whose typical MCCs include this MCC"),
         limit: int = Query(50, ge=1, le=200, description="Max number of merchants to return"),
         offset: int = Query(0, ge=0, description="Offset for pagination")
 ):
-    return list_merchants_service(db, alias, mcc, limit, offset)
\ No newline at end of file
+    return list_merchants_service(db, alias, mcc, limit, offset, alias_match)
\ No newline at end of file
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, Path, Query
+from sqlalchemy.orm import Session
+from starlette import status
+from typing import List
+
+from app.db.db import get_db, get_read_db
+from app.schemas.taxonomy_schema import (
+    MccCategoryOut, MccCategoryUpdate, TaxonomyOut, TaxonomyReplace, TaxonomyRuleCreate, TaxonomyRuleOut,
+    TaxonomyRuleUpdate, TaxonomyVersionOut,
+)
+from app.services.taxonomy_service import (
+    create_rule_service,
+    delete_mcc_category_service,
+    delete_rule_service,
+    get_taxonomy_service,
+    list_taxonomy_versions_service,
+    put_mcc_category_service,
+    replace_taxonomy_service,
+    update_rule_service,
+)
+
+# Admin endpoints: every change is a new taxonomy version, picked up by all running processes
+router = APIRouter(prefix="/taxonomy", tags=["taxonomy"])
+
+@router.get("/", response_model=TaxonomyOut)
+def get_taxonomy(db: Session = Depends(get_read_db)):
+    return get_taxonomy_service(db)
+
+@router.put("/", response_model=TaxonomyOut)
+def replace_taxonomy(payload: TaxonomyReplace, db: Session = Depends(get_db)):
+    return replace_taxonomy_service(payload, db)
+
+@router.get("/versions", response_model=List[TaxonomyVersionOut])
+def list_taxonomy_versions(
+        db: Session = Depends(get_read_db),
+        limit: int = Query(50, ge=1, le=500, description="Most recent versions to return")
+):
+    return list_taxonomy_versions_service(db, limit)
+
+@router.put("/mcc/{mcc}", response_model=MccCategoryOut)
+def put_mcc_category(
+        payload: MccCategoryUpdate,
+        mcc: str = Path(..., min_length=3, max_length=4, regex="^[0-9]+$", description="Merchant category code"),
+        db: Session = Depends(get_db)
+):
+    return put_mcc_category_service(mcc, payload, db)
+
+@router.delete("/mcc/{mcc}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_mcc_category(
+        mcc: str = Path(..., min_length=3, max_length=4, regex="^[0-9]+$", description="Merchant category code"),
+        db: Session = Depends(get_db)
+):
+    return delete_mcc_category_service(mcc, db)
+
+@router.post("/rules", response_model=TaxonomyRuleOut, status_code=status.HTTP_201_CREATED)
+def create_rule(payload: TaxonomyRuleCreate, db: Session = Depends(get_db)):
+    return create_rule_service(payload, db)
+
+@router.put("/rules/{rule_id}", response_model=TaxonomyRuleOut)
+def update_rule(payload: TaxonomyRuleUpdate, rule_id: int = Path(..., ge=1), db: Session = Depends(get_db)):
+    return update_rule_service(rule_id, payload, db)
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_rule(rule_id: int = Path(..., ge=1), db: Session = Depends(get_db)):
+    return delete_rule_service(rule_id, db)
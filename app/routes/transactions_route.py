@@ -1,22 +1,30 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import Depends, Query, Path, APIRouter
+from fastapi import Depends, Query, Path, APIRouter, HTTPException, Request
 from requests import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.db.db import get_db
-from app.schemas.transaction_schema import TransactionOut, TransactionCreate, TransactionUpdate
+from app import config
+from app.db.db import get_db, get_read_db, SessionLocal
+from app.ndjson import NDJSONLineTooLong, check_submission_content_type, iter_submitted_items
+from app.schemas.transaction_schema import (
+    TransactionOut, TransactionCreate, TransactionUpdate, BulkIngestResult,
+    TransactionBulkDelete, TransactionBulkUpdate, BulkMutationResult, TransactionSearchResult,
+)
 from app.services.transaction_service import (
     create_transaction_service,
+    ingest_transactions_service,
+    bulk_delete_transactions_service,
+    bulk_update_transactions_service,
     get_transaction_service,
     update_transaction_service,
     delete_transaction_service,
     list_transactions_service, PaginatedTransactions,
+    search_transactions_service,
 )
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
-from fastapi import Depends, Query, Path, APIRouter
-# ... other imports
 
 @router.post("/", response_model=TransactionOut, status_code=201)
 def create_transaction(
@@ -25,10 +33,87 @@ def create_transaction(
 ):
     return create_transaction_service(payload, db)
 
+@router.post("/bulk", response_model=BulkIngestResult)
+async def ingest_transactions(
+        request: Request,
+        classify: bool = Query(False, description="Classify the rows while ingesting and store their category"),
+):
+    """
+    Accepts transactions as a JSON array, an NDJSON body, or either as a multipart/form-data
+    file upload (field `file`); other content types are rejected with 415. Every
+    TRANSACTION_INGEST_CHUNK_SIZE rows are validated set-based, inserted and committed;
+    rejected rows are listed in `errors` by their position in the body.
+    """
+    check_submission_content_type(request)
+    db = SessionLocal()
+    summary = BulkIngestResult(received=0, inserted=0, classified=0, failed=0, errors=[])
+
+    async def flush(chunk):
+        result = await run_in_threadpool(ingest_transactions_service, chunk, summary.received, db, classify)
+        summary.received += result.received
+        summary.inserted += result.inserted
+        summary.classified += result.classified
+        summary.failed += result.failed
+        summary.errors.extend(result.errors)
+
+    try:
+        chunk = []
+        try:
+            async for raw in iter_submitted_items(request):
+                chunk.append(raw)
+                if len(chunk) >= config.TRANSACTION_INGEST_CHUNK_SIZE:
+                    await flush(chunk)
+                    chunk = []
+            if chunk:
+                await flush(chunk)
+        except (HTTPException, NDJSONLineTooLong) as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            # Earlier chunks are already committed
+            raise HTTPException(status_code=e.status_code if isinstance(e, HTTPException) else 422,
+                                detail=f"{detail} (rows ingested before the error: {summary.inserted})")
+        return summary
+    finally:
+        db.close()
+
+@router.post("/bulk/delete", response_model=BulkMutationResult)
+def bulk_delete_transactions(
+        payload: TransactionBulkDelete,
+        db: Session = Depends(get_db)
+):
+    """Deletes the transactions matching `ids` and/or `filter`, MUTATION_CHUNK_SIZE rows per commit."""
+    return bulk_delete_transactions_service(payload, db)
+
+@router.post("/bulk/update", response_model=BulkMutationResult)
+def bulk_update_transactions(
+        payload: TransactionBulkUpdate,
+        db: Session = Depends(get_db)
+):
+    """Applies `changes` (merchant_id, channel, account_id) to the matching transactions, MUTATION_CHUNK_SIZE rows per commit."""
+    return bulk_update_transactions_service(payload, db)
+
+@router.get("/search", response_model=TransactionSearchResult)
+def search_transactions(
+        db: Session = Depends(get_read_db),
+        q: str = Query(..., min_length=1, max_length=256, description="Words to find in the description; all must match, a trailing * matches a prefix"),
+        user_id: Optional[str] = Query(None, min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="User ID"),
+        merchant_id: Optional[str] = Query(None, min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="Merchant ID"),
+        category: Optional[str] = Query(None, min_length=1, max_length=64, description="Category"),
+        date_from: Optional[datetime] = Query(None, description="Start date"),
+        date_to: Optional[datetime] = Query(None, description="End date"),
+        amount_min: Optional[float] = Query(None, ge=0, description="Minimum amount"),
+        amount_max: Optional[float] = Query(None, ge=0, description="Maximum amount"),
+        limit: int = Query(50, ge=1, le=200, description="Page size"),
+        offset: int = Query(0, ge=0, le=10000, description="Offset"),
+):
+    """Full-text search over raw/normalized descriptions, ranked by relevance (bm25), then most recent first."""
+    return search_transactions_service(
+        db, q, user_id, merchant_id, category, date_from, date_to, amount_min, amount_max, limit, offset
+    )
+
 @router.get("/{transaction_id}", response_model=TransactionOut)
 def get_transaction(
         transaction_id: str = Path(..., min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="Transaction ID"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     return get_transaction_service(transaction_id, db)
 
@@ -49,7 +134,7 @@ def delete_transaction(
 
 @router.get("/", response_model=PaginatedTransactions)
 def list_transactions(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         user_id: Optional[str] = Query(None, min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="User ID"),
         merchant_id: Optional[str] = Query(None, min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="Merchant ID"),
         category: Optional[str] = Query(None, min_length=1, max_length=64, description="Category"),
@@ -58,9 +143,11 @@ def list_transactions(
         amount_min: Optional[float] = Query(None, ge=0, description="Minimum amount"),
         amount_max: Optional[float] = Query(None, ge=0, description="Maximum amount"),
         limit: int = Query(50, ge=1, le=200, description="Page size"),
-        offset: int = Query(0, ge=0, description="Offset"),
+        offset: int = Query(0, ge=0, description="Offset (prefer cursor for deep pages)"),
         sort_by: str = Query("posted_at", regex="^(posted_at|amount|created_at)$", description="Sort field"),
-        sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort order")
+        sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort order"),
+        cursor: Optional[str] = Query(None, max_length=512, description="next_cursor from the previous page"),
+        count: str = Query("exact", regex="^(exact|estimate|none)$", description="Total count mode")
 ):
     return list_transactions_service(
         db=db,
@@ -74,5 +161,7 @@ def list_transactions(
         limit=limit,
         offset=offset,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        cursor=cursor,
+        count=count
     )
\ No newline at end of file
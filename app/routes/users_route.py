@@ -3,7 +3,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Query, Path, status, Body
 from sqlalchemy.orm import Session
 
-from app.db.db import get_db
+from app.db.db import get_db, get_read_db
 from app.schemas.user_schema import UserCreate, UserUpdate, UserOut
 from app.services.user_service import (
     create_user_service,
@@ -31,7 +31,7 @@ def create_user(
 @router.get("/{user_id}", response_model=UserOut)
 def get_user(
         user_id: str = Path(..., min_length=1, max_length=64, regex="^[a-zA-Z0-9_-]+$", description="User ID"),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     return get_user_service(user_id, db)
 
@@ -57,7 +57,7 @@ def delete_user(user_id: str = Path(
 
 @router.get("/", response_model=List[UserOut])
 def list_users(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         name: Optional[str] = Query(None, min_length=1, max_length=128, description="Filter by name (contains)"),
         email: Optional[str] = Query(None, min_length=5, max_length=128, description="Filter by email (contains)"),
         limit: int = Query(50, ge=1, le=200, description="Max number of users to return"),
@@ -0,0 +1,18 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class SpendingRollupOut(BaseModel):
+    month: str
+    category: str
+    total_amount: float
+    txn_count: int
+    min_amount: Optional[float]
+    max_amount: Optional[float]
+    avg_amount: float
+
+class SpendingSummary(BaseModel):
+    user_id: str
+    # Totals over the returned items
+    total_amount: float
+    txn_count: int
+    items: List[SpendingRollupOut]
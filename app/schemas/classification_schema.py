@@ -1,6 +1,8 @@
 from typing import List, Dict, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.transaction_schema import TransactionOut
 
 class ClassificationRequest(BaseModel):
     id: str
@@ -10,6 +12,8 @@ class ClassificationRequest(BaseModel):
     amount: Optional[float] = 0
     currency: Optional[str] = None
     raw_description: Optional[str] = None
+    # Filled from the stored transaction; normalized from raw_description when empty
+    normalized_description: Optional[str] = None
     mcc: Optional[str] = None
     channel: Optional[str] = None
     geo: Optional[Dict] = {}
@@ -25,6 +29,33 @@ class ClassificationResult(BaseModel):
     confidence: float
     why: List[str]
     alternatives: List[AlternativeCategory] = []
+    # Only set on bulk results whose transaction could not be classified
+    error: Optional[str] = None
 
 class BulkClassificationRequest(BaseModel):
-    transactions: List[ClassificationRequest]
\ No newline at end of file
+    transactions: List[ClassificationRequest]
+
+class CorrectionRequest(BaseModel):
+    transaction_id: str
+    category: str = Field(..., min_length=1, max_length=128, examples=["Food & Drink > Grocery"])
+    # merchant: the user's transactions at this merchant; descriptor: the user's transactions
+    # with the same normalized description
+    scope: str = Field("merchant", pattern="^(merchant|descriptor)$")
+
+class OverrideOut(BaseModel):
+    id: int
+    user_id: str
+    scope: str
+    key: str
+    category: str
+    transaction_id: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CorrectionResult(BaseModel):
+    override: OverrideOut
+    # The corrected transaction, with the category stored on it
+    transaction: TransactionOut
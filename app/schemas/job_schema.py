@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import List, Optional, Dict
+from pydantic import BaseModel
+
+class JobOut(BaseModel):
+    job_id: str
+    status: str
+    total_items: int
+    processed_items: int
+    failed_items: int
+    progress: float
+    cancel_requested: bool
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+class JobResultItem(BaseModel):
+    seq: int
+    transaction_id: Optional[str]
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+
+class JobResultsPage(BaseModel):
+    job_id: str
+    status: str
+    items: List[JobResultItem]
+    # Pass as `after` to fetch the next page; None once every processed result was returned
+    next_after: Optional[int]
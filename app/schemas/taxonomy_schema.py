@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+# Boundary modes of app/classifier/matcher.py; no boundary matches the keyword as a substring
+BOUNDARY_PATTERN = "^(word|start|end)$"
+
+class MccCategoryUpdate(BaseModel):
+    category: str = Field(..., min_length=1, max_length=128, examples=["Food & Drink > Grocery"])
+
+class MccCategoryOut(BaseModel):
+    mcc: str
+    category: str
+
+    class Config:
+        from_attributes = True
+
+class TaxonomyRuleCreate(BaseModel):
+    keyword: str = Field(..., min_length=1, max_length=128, examples=["trader joe"])
+    category: str = Field(..., min_length=1, max_length=128, examples=["Food & Drink > Grocery"])
+    # Defaults to "Regex rule: '<keyword>'"
+    reason: Optional[str] = Field(None, max_length=256)
+    boundary: Optional[str] = Field(None, pattern=BOUNDARY_PATTERN)
+
+class TaxonomyRuleUpdate(BaseModel):
+    keyword: Optional[str] = Field(None, min_length=1, max_length=128)
+    category: Optional[str] = Field(None, min_length=1, max_length=128)
+    reason: Optional[str] = Field(None, max_length=256)
+    boundary: Optional[str] = Field(None, pattern=BOUNDARY_PATTERN)
+
+class TaxonomyRuleOut(BaseModel):
+    id: int
+    keyword: str
+    category: str
+    reason: str
+    boundary: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class TaxonomyReplace(BaseModel):
+    mcc_categories: Dict[str, str]
+    rules: List[TaxonomyRuleCreate]
+
+class TaxonomyOut(BaseModel):
+    # Latest taxonomy_versions row; every edit adds one
+    version: int
+    mcc_categories: Dict[str, str]
+    rules: List[TaxonomyRuleOut]
+
+class TaxonomyVersionOut(BaseModel):
+    version: int
+    change: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from pydantic import BaseModel, Field
 
 class TransactionCreate(BaseModel):
@@ -39,6 +39,62 @@ class TransactionOut(BaseModel):
     geo: Dict
     account_id: Optional[str]
     created_at: datetime
+    category: Optional[str] = None
+    category_confidence: Optional[float] = None
+    category_reasons: Optional[List[str]] = None
+    classifier_version: Optional[int] = None
+    classified_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+class BulkIngestError(BaseModel):
+    # Position of the record in the submitted array / NDJSON body
+    index: int
+    transaction_id: Optional[str] = None
+    error: str
+
+class BulkIngestResult(BaseModel):
+    received: int
+    inserted: int
+    classified: int
+    failed: int
+    errors: List[BulkIngestError]
+
+class TransactionFilter(BaseModel):
+    user_id: Optional[str] = None
+    merchant_id: Optional[str] = None
+    category: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    amount_min: Optional[float] = None
+    amount_max: Optional[float] = None
+
+class TransactionBulkDelete(BaseModel):
+    # Either ids or filter (or both, which must then both match)
+    ids: Optional[List[str]] = Field(None, max_length=100000)
+    filter: Optional[TransactionFilter] = None
+
+class TransactionBulkChanges(BaseModel):
+    merchant_id: Optional[str] = None
+    channel: Optional[str] = None
+    account_id: Optional[str] = None
+
+class TransactionBulkUpdate(TransactionBulkDelete):
+    changes: TransactionBulkChanges
+
+class BulkMutationResult(BaseModel):
+    affected: int
+    # Committed chunks; each held the write lock for at most MUTATION_CHUNK_SIZE rows
+    chunks: int
+
+class TransactionSearchHit(TransactionOut):
+    # Relevance (negated bm25): higher is a better match
+    score: float = 0.0
+
+class TransactionSearchResult(BaseModel):
+    # The FTS5 expression the search ran
+    query: str
+    limit: int
+    offset: int
+    items: List[TransactionSearchHit]
@@ -63,4 +63,10 @@ class UserOut(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class UserImport(BaseModel):
+    # Rows loaded by the file importer (app/db/importer.py); no password is stored for users
+    user_id: str = Field(..., min_length=3, max_length=64, pattern="^[a-zA-Z0-9_-]+$")
+    name: str = Field(..., min_length=2, max_length=128)
+    email: EmailStr
+    created_at: Optional[datetime] = None
@@ -1,37 +1,55 @@
-from typing import Dict, List
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 from fastapi import HTTPException
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.models import MerchantORM
+from app import config
+from app.classifier.cache import classification_cache
+from app.classifier.normalize import normalize_description
+from app.classifier.overrides import find_override
+from app.classifier.snapshot import detect_merchants, get_snapshot
+from app.logging_config import TransactionLogger
+from app.metrics import PIPELINE_STAGES, STAGE_LATENCY
+from app.models import TransactionORM
 from app.schemas.classification_schema import ClassificationRequest, ClassificationResult
-from app.taxonomy import MCC_CATEGORY_MAP, REGEX_RULES
-import logging
+from app.services.rollup_service import apply_rollup_changes
 
 logger = logging.getLogger("ClassificationService-Pipeline")
+# Per-transaction lines: sampled (LOG_TXN_SAMPLE_RATE) and formatted lazily
+txn_log = TransactionLogger(logger)
+
 # --- Configurable Weights ---
 W_MERCHANT = 0.6
 W_SEMANTIC = 0.2
 W_RULE = 0.2
 
 # --- Helper: normalization ---
-# Just strips and lowercases for now
-# TODO: Enhance with more NLP techniques
-def normalize_description(raw: str) -> str:
-    return raw.lower().replace("*", "").strip()
+# Stored transactions carry the text normalized at ingest; anything else is normalized here
+def normalized_text(payload: ClassificationRequest) -> str:
+    return payload.normalized_description or normalize_description(payload.raw_description)
 
 # --- Semantic similarity check ---
 # defaults threshold to 80%, else None
-def semantic_similarity(desc: str, candidates: List[str], threshold: float = 0.8):
+def semantic_similarity(desc: str, candidates: List[str], threshold: float = 0.8,
+                        candidates_lower: Optional[List[str]] = None):
     """
     Returns (best_match, score) if any candidate exceeds threshold, else None.
-    Score normalized to [0,1].
+    Score normalized to [0,1]. Pass candidates_lower to skip lowering the candidates per call.
     """
+    if candidates_lower is None:
+        candidates_lower = [cand.lower() for cand in candidates]
     best = None
     best_score = 0
-    for cand in candidates:
-        score = fuzz.partial_ratio(desc, cand.lower()) / 100.0
+    for cand, cand_lower in zip(candidates, candidates_lower):
+        score = fuzz.partial_ratio(desc, cand_lower) / 100.0
         if score > best_score:
             best_score = score
             best = cand
@@ -39,30 +57,118 @@ def semantic_similarity(desc: str, candidates: List[str], threshold: float = 0.8
         return best, best_score
     return None
 
-def pipeline_classify_service(payload: ClassificationRequest, db: Session):
+# --- Batch semantic similarity ---
+# Same result per description as semantic_similarity. Descriptions are grouped by their
+# candidate list (in practice: by merchant) and each group is scored in one native
+# rapidfuzz call, so the work stays descriptions x own candidates, not x every merchant name.
+def batch_semantic_similarity(descs: List[str], candidate_lists: List[Sequence[str]], threshold: float = 0.8,
+                              candidate_lists_lower: Optional[List[Sequence[str]]] = None,
+                              workers: Optional[int] = None) -> List[Optional[Tuple[str, float]]]:
+    if workers is None:
+        workers = config.SEMANTIC_WORKERS
+    if candidate_lists_lower is None:
+        candidate_lists_lower = [[cand.lower() for cand in cands] for cands in candidate_lists]
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    for row, cands_lower in enumerate(candidate_lists_lower):
+        if cands_lower:
+            groups.setdefault(tuple(cands_lower), []).append(row)
+
+    matches: List[Optional[Tuple[str, float]]] = [None] * len(descs)
+    for cands_lower, rows in groups.items():
+        # Scores below the threshold come back as 0, which can never be selected
+        matrix = process.cdist([descs[row] for row in rows], cands_lower, scorer=fuzz.partial_ratio,
+                               score_cutoff=threshold * 100, dtype=np.float64, workers=workers)
+        for row, scores in zip(rows, matrix):
+            # argmax keeps the first maximum, like the strict '>' in semantic_similarity
+            best_idx = int(scores.argmax())
+            best_score = scores[best_idx] / 100.0
+            best = candidate_lists[row][best_idx]
+            matches[row] = (best, best_score) if best and best_score >= threshold else None
+    return matches
+
+# Marks that the semantic stage still has to run inside the pipeline
+_NOT_COMPUTED = object()
+
+# --- Stage metrics ---
+# Stage timing is sampled: one transaction in METRICS_STAGE_SAMPLE_EVERY reads the clock, the
+# others get _no_clock (float() == 0.0), so the un-sampled hot path costs a counter tick.
+_clock = time.perf_counter
+_no_clock = float
+_stage_ticks = itertools.count()
+_NAN = float("nan")
+
+def _stage_clock():
+    return _no_clock if next(_stage_ticks) % config.METRICS_STAGE_SAMPLE_EVERY else _clock
+
+def _observe_stages(started: float, merchant_done: float, semantic_done: float, mcc_done: float,
+                    rules_done: float, semantic_timed: bool):
+    # Ranking covers scoring normalization, re-ranking and building the result.
+    # A semantic stage precomputed for the whole batch is recorded (amortized) by classify_batch_service.
+    PIPELINE_STAGES.record((
+        merchant_done - started,
+        semantic_done - merchant_done if semantic_timed else _NAN,
+        mcc_done - semantic_done,
+        rules_done - mcc_done,
+        _clock() - rules_done,
+    ))
+
+# --- Result cache ---
+# The pipeline output only depends on these fields (and the snapshot version)
+def cache_key(payload: ClassificationRequest, normalized: str):
+    return normalized, payload.merchant_id, payload.mcc
+
+def _from_cache(cached: ClassificationResult, payload: ClassificationRequest) -> ClassificationResult:
+    return cached.model_copy(update={"transaction_id": payload.id})
+
+# --- User overrides ---
+# Checked before the cache (results are cached per description, not per user); a miss is at most two dict lookups
+def _override_result(payload: ClassificationRequest, normalized: str) -> Optional[ClassificationResult]:
+    override = find_override(payload.user_id, payload.merchant_id, normalized)
+    if override is None:
+        return None
+    return ClassificationResult(transaction_id=payload.id, category=override.category, confidence=1.0,
+                                why=[override.reason], alternatives=[])
+
+def pipeline_classify_service(payload: ClassificationRequest, db: Session, semantic_match=_NOT_COMPUTED,
+                              check_cache: bool = True, normalized: Optional[str] = None):
     try:
-        logger.info(f"Classifying transaction {payload.id} (merchant_id={payload.merchant_id}, mcc={payload.mcc})")
-        normalized = normalize_description(payload.raw_description)
+        if normalized is None:
+            normalized = normalized_text(payload)
+        overridden = _override_result(payload, normalized)
+        if overridden is not None:
+            return overridden
+        snapshot = get_snapshot()
+        key = cache_key(payload, normalized)
+        if check_cache:
+            cached = classification_cache.get(key, snapshot.version)
+            if cached is not None:
+                return _from_cache(cached, payload)
+        log_txn = txn_log.sample()
+        if log_txn:
+            entered = _clock()
+            txn_log.log(logging.INFO, "Classifying transaction %s (merchant_id=%s, mcc=%s)",
+                        payload.id, payload.merchant_id, payload.mcc, transaction_id=payload.id)
+        log_signals = log_txn and logger.isEnabledFor(logging.DEBUG)
+        clock = _stage_clock()
+        started = clock()
 
         candidates: Dict[str, Dict] = {}
 
         def add_signal(cand_category: str, score: float, cand_reason: str):
-            logger.debug(f"Adding signal: category={cand_category}, score={score:.2f}, reason={cand_reason}")
+            if log_signals:
+                txn_log.log(logging.DEBUG, "Adding signal: category=%s, score=%.2f, reason=%s",
+                            cand_category, score, cand_reason, transaction_id=payload.id)
             if cand_category not in candidates:
                 candidates[cand_category] = {"score": 0.0, "reasons": []}
             candidates[cand_category]["score"] += score
             candidates[cand_category]["reasons"].append(cand_reason)
 
-        # Merchant lookup
-        try:
-            merchant = db.get(MerchantORM, payload.merchant_id)
-        except Exception as e:
-            logger.error(f"Error fetching merchant: {e}")
-            raise HTTPException(status_code=500, detail="Error fetching merchant data")
+        # Merchant lookup (served from the in-memory snapshot, no DB round-trip)
+        merchant = snapshot.merchants.get(payload.merchant_id)
 
         merchant_matched = False
         if merchant:
-            if merchant.default_category and merchant.default_category.lower() in normalized:
+            if merchant.default_category and merchant.default_category_lower in normalized:
                 add_signal(
                     merchant.default_category,
                     W_MERCHANT,
@@ -70,8 +176,8 @@ def pipeline_classify_service(payload: ClassificationRequest, db: Session):
                 )
                 merchant_matched = True
 
-            for alias in (merchant.aliases or []):
-                if alias.lower() in normalized and not merchant_matched:
+            for alias, alias_lower in zip(merchant.aliases, merchant.aliases_lower):
+                if alias_lower in normalized and not merchant_matched:
                     add_signal(
                         merchant.default_category or "Uncategorized",
                         W_MERCHANT,
@@ -79,10 +185,29 @@ def pipeline_classify_service(payload: ClassificationRequest, db: Session):
                     )
                     merchant_matched = True
 
-        # Semantic similarity
+        # Global merchant detection: merchant_id missing, unknown or not mentioned in the description
+        if not merchant_matched:
+            detected_categories = set()
+            for detected, name in detect_merchants(snapshot, normalized):
+                if not detected.default_category or detected.default_category in detected_categories:
+                    continue
+                detected_categories.add(detected.default_category)
+                add_signal(
+                    detected.default_category,
+                    W_MERCHANT,
+                    f"Detected merchant '{name}' → {detected.display_name} in description"
+                )
+
+        merchant_done = clock()
+
+        # Semantic similarity (may have been computed up front for the whole batch)
         try:
-            all_names = [merchant.display_name] + (merchant.aliases or []) if merchant else []
-            match = semantic_similarity(normalized, all_names)
+            if semantic_match is not _NOT_COMPUTED:
+                match = semantic_match
+            elif merchant:
+                match = semantic_similarity(normalized, merchant.names, candidates_lower=merchant.names_lower)
+            else:
+                match = None
         except Exception as e:
             logger.error(f"Error during semantic similarity check: {e}")
             raise HTTPException(status_code=500, detail="Error during semantic similarity check")
@@ -94,30 +219,40 @@ def pipeline_classify_service(payload: ClassificationRequest, db: Session):
                 sim_score * W_SEMANTIC,
                 f"Semantic similarity {sim_score:.2f} with '{best_alias}'"
             )
+        semantic_done = clock()
 
         # MCC map
-        if payload.mcc and payload.mcc in MCC_CATEGORY_MAP:
+        if payload.mcc and payload.mcc in snapshot.mcc_map:
             try:
-                cat = MCC_CATEGORY_MAP[payload.mcc]
+                cat = snapshot.mcc_map[payload.mcc]
                 add_signal(cat, W_RULE, f"MCC {payload.mcc} aligns with {cat}")
             except KeyError:
                 logger.warning(f"MCC {payload.mcc} not found in MCC_CATEGORY_MAP")
+        mcc_done = clock()
 
-        # Regex rules
-        for keyword, category, reason in REGEX_RULES:
-            if keyword in normalized:
-                add_signal(category, W_RULE, reason)
+        # Regex rules: one pass over the description with the compiled keyword automaton
+        for rule_id in snapshot.rule_matcher.find(normalized):
+            rule = snapshot.regex_rules[rule_id]
+            add_signal(rule.category, W_RULE, rule.reason)
+        rules_done = clock()
 
         # Fallback
         if not candidates:
-            logger.warning(f"No strong signals for transaction {payload.id}")
-            return ClassificationResult(
+            if log_txn:
+                txn_log.log(logging.WARNING, "No strong signals for transaction %s", payload.id,
+                            transaction_id=payload.id, started=entered)
+            result = ClassificationResult(
                 transaction_id=payload.id,
                 category="Uncategorized",
                 confidence=0.5,
                 why=["No strong signals"],
                 alternatives=[]
             )
+            classification_cache.put(key, snapshot.version, result)
+            if started:
+                _observe_stages(started, merchant_done, semantic_done, mcc_done, rules_done,
+                                semantic_match is _NOT_COMPUTED)
+            return result
 
         # Normalization
         max_possible_score = W_MERCHANT + W_SEMANTIC + W_RULE
@@ -133,14 +268,21 @@ def pipeline_classify_service(payload: ClassificationRequest, db: Session):
             for c, d in candidates.items() if c != best_cat
         ]
 
-        logger.info(f"Transaction {payload.id} classified as '{best_cat}' with confidence {best_data['score']:.2f}")
-        return ClassificationResult(
+        if log_txn:
+            txn_log.log(logging.INFO, "Transaction %s classified as '%s' with confidence %.2f",
+                        payload.id, best_cat, best_data["score"], transaction_id=payload.id, started=entered)
+        result = ClassificationResult(
             transaction_id=payload.id,
             category=best_cat,
             confidence=round(best_data["score"], 2),
             why=best_data["reasons"],
             alternatives=alternatives
         )
+        classification_cache.put(key, snapshot.version, result)
+        if started:
+            _observe_stages(started, merchant_done, semantic_done, mcc_done, rules_done,
+                            semantic_match is _NOT_COMPUTED)
+        return result
 
     except HTTPException as http_exc:
         logger.error(f"HTTP error: {http_exc.detail}")
@@ -148,3 +290,156 @@ def pipeline_classify_service(payload: ClassificationRequest, db: Session):
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred during classification")
+
+def error_result(transaction_id: str, detail: str) -> ClassificationResult:
+    return ClassificationResult(
+        transaction_id=transaction_id,
+        category="Uncategorized",
+        confidence=0.0,
+        why=[],
+        alternatives=[],
+        error=detail
+    )
+
+def classify_batch_service(payloads: List[ClassificationRequest], db: Session) -> List[ClassificationResult]:
+    """
+    Classifies a batch in input order, running the semantic stage for all items in one call.
+    User overrides and cached results are served first; a transaction that fails gets an
+    error result instead of failing the whole batch.
+    """
+    snapshot = get_snapshot()
+    results: List[Optional[ClassificationResult]] = [None] * len(payloads)
+    misses = []
+    # Normalized once per transaction, for the cache key, the semantic stage and the pipeline
+    normalized = [normalized_text(payload) for payload in payloads]
+    for i, payload in enumerate(payloads):
+        overridden = _override_result(payload, normalized[i])
+        if overridden is not None:
+            results[i] = overridden
+            continue
+        if payload.raw_description is not None:
+            cached = classification_cache.get(cache_key(payload, normalized[i]), snapshot.version)
+            if cached is not None:
+                results[i] = _from_cache(cached, payload)
+                continue
+        misses.append(i)
+    if not misses:
+        return results
+
+    merchants = [snapshot.merchants.get(payloads[i].merchant_id) for i in misses]
+    try:
+        semantic_started = _clock()
+        matches = batch_semantic_similarity(
+            [normalized[i] for i in misses],
+            [merchant.names if merchant else () for merchant in merchants],
+            candidate_lists_lower=[merchant.names_lower if merchant else () for merchant in merchants],
+        )
+        STAGE_LATENCY.observe("semantic_similarity", (_clock() - semantic_started) / len(misses), len(misses))
+    except Exception as e:
+        logger.error(f"Error during batch semantic similarity check: {e}")
+        matches = [_NOT_COMPUTED] * len(misses)
+
+    for i, match in zip(misses, matches):
+        payload = payloads[i]
+        try:
+            results[i] = pipeline_classify_service(payload, db, semantic_match=match, check_cache=False,
+                                                   normalized=normalized[i])
+        except HTTPException as http_exc:
+            results[i] = error_result(payload.id, http_exc.detail)
+    return results
+
+# --- Batch validation and hydration ---
+# Request fields that are filled from the stored transaction when the request leaves them empty
+HYDRATED_FIELDS = tuple(field for field in ClassificationRequest.model_fields if field != "id")
+
+def validate_and_hydrate(transactions: List[ClassificationRequest],
+                         db: Session) -> Tuple[List[ClassificationRequest], Dict[int, str]]:
+    """
+    Set-based counterpart of validate_transaction for batches: one IN query for the stored
+    transactions. Returns the requests with missing fields filled from the stored transaction,
+    plus {index: error} for items with a field that contradicts the stored transaction.
+    Unknown transaction ids are classified from the request alone, as before; merchants come
+    from the classifier snapshot, where an unknown merchant_id falls back to global detection.
+    """
+    txn_ids = {txn.id for txn in transactions if txn.id}
+    stored = {
+        txn.id: txn
+        for txn in db.execute(select(TransactionORM).where(TransactionORM.id.in_(txn_ids))).scalars()
+    } if txn_ids else {}
+
+    hydrated: List[ClassificationRequest] = []
+    errors: Dict[int, str] = {}
+    for index, txn_req in enumerate(transactions):
+        db_txn = stored.get(txn_req.id)
+        if db_txn is None:
+            hydrated.append(txn_req)
+            continue
+        # Only fields the client actually sent are compared (defaults like amount=0 are not)
+        mismatches = [
+            f"Attribute mismatch for {field}: request={value}, db={getattr(db_txn, field)}"
+            for field in txn_req.model_fields_set
+            if (value := getattr(txn_req, field)) not in (None, "") and value != getattr(db_txn, field)
+        ]
+        if mismatches:
+            errors[index] = "; ".join(mismatches)
+        # Stored values are already typed, so fill them in without re-running validation
+        fills = {
+            field: getattr(db_txn, field)
+            for field in HYDRATED_FIELDS
+            if getattr(txn_req, field) in (None, "")
+        }
+        hydrated.append(txn_req.model_copy(update=fills) if fills else txn_req)
+
+    if errors:
+        logger.warning(f"Batch validation: {len(errors)} of {len(transactions)} transactions rejected")
+    return hydrated, errors
+
+# --- Stored results ---
+def save_classification_results(results: List[ClassificationResult], db: Session, version: int,
+                                commit: bool = True) -> int:
+    """
+    Stores category, confidence, reasons and classifier version on the classified transactions.
+    One IN query finds the stored transactions, one executemany UPDATE writes them;
+    error results and ids that are not in the transactions table are skipped.
+    Spending rollups of transactions whose category changed are moved in the same DB transaction.
+    """
+    latest = {result.transaction_id: result for result in results if result.error is None}
+    if not latest:
+        return 0
+    stored = {
+        row.id: row for row in db.execute(
+            select(TransactionORM.id, TransactionORM.user_id, TransactionORM.posted_at,
+                   TransactionORM.amount, TransactionORM.category)
+            .where(TransactionORM.id.in_(list(latest)))
+        )
+    }
+    classified_at = datetime.utcnow()
+    rows = [
+        {
+            "id": txn_id,
+            "category": result.category,
+            "category_confidence": result.confidence,
+            "category_reasons": result.why,
+            "classifier_version": version,
+            "classified_at": classified_at,
+        }
+        for txn_id, result in latest.items() if txn_id in stored
+    ]
+    if not rows:
+        return 0
+    moved = [row for txn_id, row in stored.items() if row.category != latest[txn_id].category]
+    try:
+        db.execute(update(TransactionORM), rows)
+        apply_rollup_changes(
+            db,
+            added=[(row.user_id, row.posted_at, latest[row.id].category, row.amount) for row in moved],
+            removed=[(row.user_id, row.posted_at, row.category, row.amount) for row in moved],
+        )
+        if commit:
+            db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error storing classification results: count={len(rows)}")
+        raise HTTPException(status_code=500, detail="Database error storing classification results") from e
+    logger.info(f"Stored classification results: count={len(rows)}, classifier_version={version}")
+    return len(rows)
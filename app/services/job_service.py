@@ -0,0 +1,335 @@
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import insert, update, select, delete, or_, and_, func
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import config
+from app.classifier.engine import classify_validated
+from app.classifier.snapshot import get_snapshot
+from app.db.db import SessionLocal
+from app.metrics import BATCH_SIZE
+from app.models import ClassificationJobORM, ClassificationJobItemORM
+from app.schemas.classification_schema import ClassificationRequest
+from app.schemas.job_schema import JobOut, JobResultItem, JobResultsPage
+from app.services.classification_service import save_classification_results
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("completed", "cancelled", "failed")
+
+
+# --- Submission ---
+def create_job_service(db: Session) -> ClassificationJobORM:
+    job = ClassificationJobORM(job_id=f"job_{uuid.uuid4().hex}", status="receiving", heartbeat_at=datetime.utcnow())
+    db.add(job)
+    try:
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.error("Database error during job creation")
+        raise HTTPException(status_code=500, detail="Database error during job creation")
+    logger.info(f"Job created: {job.job_id}")
+    return job
+
+def add_job_items_service(job_id: str, start_seq: int, items: List[dict], db: Session):
+    """
+    Stores one batch of submitted items. Each item is either a validated
+    ClassificationRequest payload or an {"error": ...} placeholder for a bad record.
+    """
+    rows = [
+        {
+            "job_id": job_id,
+            "seq": start_seq + offset,
+            "transaction_id": item.get("id"),
+            "payload": None if "error" in item else item,
+            "error": item.get("error"),
+        }
+        for offset, item in enumerate(items)
+    ]
+    try:
+        db.execute(insert(ClassificationJobItemORM), rows)
+        # Keeps the upload from being reaped as stale while it is still making progress
+        db.execute(update(ClassificationJobORM).where(ClassificationJobORM.job_id == job_id)
+                   .values(heartbeat_at=datetime.utcnow()))
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.error(f"Database error storing job items: {job_id}")
+        raise HTTPException(status_code=500, detail="Database error storing job items")
+
+def enqueue_job_service(job_id: str, total_items: int, db: Session):
+    # Conditional on "receiving": a cancel that arrived during the upload keeps the job cancelled
+    values = {"status": "queued"} if total_items else {"status": "completed", "finished_at": datetime.utcnow()}
+    queued = db.execute(
+        update(ClassificationJobORM)
+        .where(ClassificationJobORM.job_id == job_id, ClassificationJobORM.status == "receiving")
+        .values(total_items=total_items, **values)
+    ).rowcount
+    if not queued:
+        db.execute(update(ClassificationJobORM).where(ClassificationJobORM.job_id == job_id)
+                   .values(total_items=total_items))
+    db.commit()
+    if queued:
+        logger.info(f"Job queued: {job_id} (items={total_items})")
+    else:
+        logger.info(f"Job cancelled or failed during upload, not queued: {job_id} (items={total_items})")
+
+def fail_job_service(job_id: str, error: str, db: Session):
+    db.execute(
+        update(ClassificationJobORM)
+        .where(ClassificationJobORM.job_id == job_id, ClassificationJobORM.status.not_in(FINISHED_STATUSES))
+        .values(status="failed", error=error, finished_at=datetime.utcnow())
+    )
+    db.commit()
+    logger.error(f"Job failed: {job_id}: {error}")
+
+def retry_job_service(job_id: str, error: str, db: Session):
+    """
+    Hands a job whose worker hit a database error back to the queue, to resume from its cursor.
+    After CLASSIFY_JOB_MAX_ATTEMPTS attempts in a row without progress the job fails instead.
+    """
+    attempts = (db.execute(select(ClassificationJobORM.attempts).where(ClassificationJobORM.job_id == job_id))
+                .scalar() or 0) + 1
+    if attempts >= config.CLASSIFY_JOB_MAX_ATTEMPTS:
+        fail_job_service(job_id, error, db)
+        return
+    db.execute(
+        update(ClassificationJobORM)
+        .where(ClassificationJobORM.job_id == job_id, ClassificationJobORM.status == "running")
+        .values(status="queued", attempts=attempts)
+    )
+    db.commit()
+    logger.warning(f"Job released for retry: {job_id} (attempt {attempts} of {config.CLASSIFY_JOB_MAX_ATTEMPTS})")
+
+
+# --- Status, results, cancellation ---
+def _job_out(job: ClassificationJobORM) -> JobOut:
+    return JobOut(
+        job_id=job.job_id,
+        status=job.status,
+        total_items=job.total_items,
+        processed_items=job.processed_items,
+        failed_items=job.failed_items,
+        progress=round(job.processed_items / job.total_items, 4) if job.total_items else 1.0,
+        cancel_requested=job.cancel_requested,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+def _get_job(job_id: str, db: Session) -> ClassificationJobORM:
+    job = db.get(ClassificationJobORM, job_id)
+    if not job:
+        logger.warning(f"Job not found: {job_id}")
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def get_job_service(job_id: str, db: Session) -> JobOut:
+    return _job_out(_get_job(job_id, db))
+
+def get_job_results_service(job_id: str, db: Session, after: int = -1, limit: int = 1000) -> JobResultsPage:
+    job = _get_job(job_id, db)
+    # Only items below the cursor are final; keyset pagination on seq
+    rows = db.execute(
+        select(ClassificationJobItemORM)
+        .where(
+            ClassificationJobItemORM.job_id == job_id,
+            ClassificationJobItemORM.seq > after,
+            ClassificationJobItemORM.seq < job.processed_items,
+        )
+        .order_by(ClassificationJobItemORM.seq)
+        .limit(limit)
+    ).scalars().all()
+    items = [
+        JobResultItem(seq=row.seq, transaction_id=row.transaction_id, result=row.result, error=row.error)
+        for row in rows
+    ]
+    if rows:
+        next_after = rows[-1].seq
+    else:
+        # Nothing new yet: poll again with the same cursor until the job is finished
+        next_after = None if job.status in FINISHED_STATUSES else after
+    return JobResultsPage(job_id=job.job_id, status=job.status, items=items, next_after=next_after)
+
+def cancel_job_service(job_id: str, db: Session) -> JobOut:
+    job = _get_job(job_id, db)
+    if job.status in FINISHED_STATUSES:
+        logger.warning(f"Job already finished, cannot cancel: {job_id}")
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    job.cancel_requested = True
+    if job.status in ("queued", "receiving"):
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+    db.commit()
+    logger.info(f"Job cancellation requested: {job_id}")
+    return _job_out(job)
+
+
+# --- Workers ---
+def _claim_job(db: Session) -> Optional[str]:
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=config.CLASSIFY_JOB_LEASE_SECONDS)
+    claimable = or_(
+        ClassificationJobORM.status == "queued",
+        # A running job whose worker stopped heartbeating (e.g. the process restarted)
+        and_(ClassificationJobORM.status == "running", ClassificationJobORM.heartbeat_at < lease_expired),
+    )
+    job_id = db.execute(
+        select(ClassificationJobORM.job_id).where(claimable).order_by(ClassificationJobORM.created_at).limit(1)
+    ).scalar()
+    if job_id is None:
+        return None
+    # The conditional update makes the claim atomic across threads and processes
+    claimed = db.execute(
+        update(ClassificationJobORM)
+        .where(ClassificationJobORM.job_id == job_id, claimable)
+        .values(status="running", heartbeat_at=now, started_at=func.coalesce(ClassificationJobORM.started_at, now))
+    ).rowcount
+    db.commit()
+    return job_id if claimed else None
+
+def _process_chunk(job: ClassificationJobORM, db: Session) -> int:
+    items = db.execute(
+        select(ClassificationJobItemORM)
+        .where(ClassificationJobItemORM.job_id == job.job_id, ClassificationJobItemORM.seq >= job.processed_items)
+        .order_by(ClassificationJobItemORM.seq)
+        .limit(config.CLASSIFY_JOB_CHUNK_SIZE)
+    ).scalars().all()
+    if not items:
+        return 0
+
+    BATCH_SIZE.observe("job", len(items))
+    valid = [item for item in items if item.error is None]
+    requests = [ClassificationRequest.model_validate(item.payload) for item in valid]
+    version = get_snapshot().version
+    results = classify_validated(requests, db)
+
+    updates = []
+    failed = sum(1 for item in items if item.error is not None)
+    for item, result in zip(valid, results):
+        if result.error:
+            failed += 1
+            updates.append({"job_id": job.job_id, "seq": item.seq, "result": None, "error": result.error})
+        else:
+            updates.append({"job_id": job.job_id, "seq": item.seq,
+                            "result": result.model_dump(exclude_none=True), "error": None})
+    # Results, stored categories and the cursor move together, so a restart resumes exactly after this chunk
+    if updates:
+        db.execute(update(ClassificationJobItemORM), updates)
+    save_classification_results(results, db, version, commit=False)
+    job.processed_items += len(items)
+    job.failed_items += failed
+    job.heartbeat_at = datetime.utcnow()
+    job.attempts = 0
+    db.commit()
+    return len(items)
+
+def run_job(job_id: str, db: Session):
+    job = db.get(ClassificationJobORM, job_id)
+    logger.info(f"Job started: {job_id} (resuming at item {job.processed_items} of {job.total_items})")
+    while True:
+        db.refresh(job)
+        if _stop_event.is_set():
+            # Shutting down: hand the job back so it resumes from its cursor after the restart
+            job.status = "queued"
+            db.commit()
+            logger.info(f"Job released on shutdown: {job_id} at item {job.processed_items}")
+            return
+        if job.cancel_requested:
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            logger.info(f"Job cancelled: {job_id} after {job.processed_items} items")
+            return
+        if job.processed_items >= job.total_items or not _process_chunk(job, db):
+            job.status = "completed"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            logger.info(f"Job completed: {job_id} (items={job.processed_items}, failed={job.failed_items})")
+            return
+        logger.info(f"Job progress: {job_id} {job.processed_items}/{job.total_items}")
+
+_stop_event = threading.Event()
+_worker_threads: List[threading.Thread] = []
+
+def _reap_stale_uploads(db: Session) -> int:
+    """
+    Fails jobs still "receiving" whose upload stopped sending batches, e.g. because the
+    process crashed mid-upload, and deletes their items. Returns the number of jobs reaped.
+    """
+    stale = and_(
+        ClassificationJobORM.status == "receiving",
+        func.coalesce(ClassificationJobORM.heartbeat_at, ClassificationJobORM.created_at)
+        < datetime.utcnow() - timedelta(seconds=config.CLASSIFY_JOB_UPLOAD_TIMEOUT),
+    )
+    job_ids = db.execute(select(ClassificationJobORM.job_id).where(stale)).scalars().all()
+    reaped = 0
+    for job_id in job_ids:
+        # Conditional on still being stale, so only one worker reaps each job
+        reaped_job = db.execute(
+            update(ClassificationJobORM)
+            .where(ClassificationJobORM.job_id == job_id, stale)
+            .values(status="failed", error="Upload did not complete", finished_at=datetime.utcnow())
+        ).rowcount
+        if reaped_job:
+            db.execute(delete(ClassificationJobItemORM).where(ClassificationJobItemORM.job_id == job_id))
+            logger.warning(f"Stale upload reaped: {job_id}")
+            reaped += 1
+        db.commit()
+    return reaped
+
+def _is_transient(error: Exception) -> bool:
+    # OperationalError covers a locked or briefly unavailable database; services wrap it in HTTPException
+    return isinstance(error, OperationalError) or isinstance(error.__cause__, OperationalError)
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        db = SessionLocal()
+        job_id = None
+        try:
+            _reap_stale_uploads(db)
+            job_id = _claim_job(db)
+            if job_id:
+                run_job(job_id, db)
+        except Exception as e:
+            db.rollback()
+            if job_id and _is_transient(e):
+                logger.warning(f"Job worker database error (job={job_id}): {e.__cause__ or e}")
+                try:
+                    retry_job_service(job_id, "Database error while processing job", db)
+                except SQLAlchemyError:
+                    # The lease expires and another worker takes the job over
+                    db.rollback()
+                    logger.exception(f"Could not release job for retry: {job_id}")
+                # Waits a poll interval before the retry
+                job_id = None
+            else:
+                logger.exception(f"Job worker error (job={job_id}): {e}")
+                if job_id:
+                    fail_job_service(job_id, "Unexpected error while processing job", db)
+        finally:
+            db.close()
+        if not job_id:
+            _stop_event.wait(config.CLASSIFY_JOB_POLL_INTERVAL)
+
+def start_job_workers(count: int = config.CLASSIFY_JOB_WORKERS):
+    _stop_event.clear()
+    for i in range(count - len(_worker_threads)):
+        thread = threading.Thread(target=_worker_loop, name=f"classify-job-worker-{i}", daemon=True)
+        thread.start()
+        _worker_threads.append(thread)
+    logger.info(f"Classification job workers started: {len(_worker_threads)}")
+
+def stop_job_workers():
+    # A job interrupted here is resumed by the next worker once its lease expires
+    _stop_event.set()
+    for thread in _worker_threads:
+        thread.join(timeout=30)
+    _worker_threads.clear()
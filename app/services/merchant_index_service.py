@@ -0,0 +1,178 @@
+import logging
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import and_, column, delete, exists, func, insert, select, table, text
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models import MerchantAliasORM, MerchantMccORM, MerchantORM
+
+logger = logging.getLogger(__name__)
+
+# FTS5 trigram index over merchant_aliases.alias_key (external content, kept in sync by triggers),
+# so substring searches are index lookups instead of a scan of every alias
+ALIAS_FTS_TABLE = "merchant_alias_fts"
+ALIAS_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {ALIAS_FTS_TABLE} USING fts5("
+    f"alias_key, content='merchant_aliases', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS merchant_aliases_fts_insert AFTER INSERT ON merchant_aliases BEGIN "
+    f"INSERT INTO {ALIAS_FTS_TABLE}(rowid, alias_key) VALUES (new.id, new.alias_key); END",
+    f"CREATE TRIGGER IF NOT EXISTS merchant_aliases_fts_delete AFTER DELETE ON merchant_aliases BEGIN "
+    f"INSERT INTO {ALIAS_FTS_TABLE}({ALIAS_FTS_TABLE}, rowid, alias_key) VALUES ('delete', old.id, old.alias_key); END",
+)
+alias_fts = table(ALIAS_FTS_TABLE, column("rowid"), column("alias_key"))
+# Trigram MATCH needs at least three characters; shorter substrings scan the alias_key index
+FTS_MIN_LENGTH = 3
+# Merchants read per chunk when (re)building the index
+REBUILD_CHUNK_SIZE = 10000
+
+# Whether the database has the FTS table; looked up once per process
+_fts_available: Optional[bool] = None
+
+
+def alias_key(alias: str) -> str:
+    return " ".join(alias.lower().split())
+
+
+def _alias_rows(merchant_id: str, aliases: Optional[Iterable[str]]) -> List[dict]:
+    keys: Set[str] = {alias_key(alias) for alias in aliases or () if alias and alias.strip()}
+    return [{"merchant_id": merchant_id, "alias_key": key} for key in sorted(keys)]
+
+
+def _mcc_rows(merchant_id: str, mccs: Optional[Iterable[str]]) -> List[dict]:
+    return [{"merchant_id": merchant_id, "mcc": mcc} for mcc in sorted({str(mcc) for mcc in mccs or () if mcc})]
+
+
+# --- Maintenance ---
+def remove_merchant_index(db: Session, merchant_ids: List[str]):
+    """Drops the merchants' alias and MCC rows inside the caller's DB transaction."""
+    if not merchant_ids:
+        return
+    db.execute(delete(MerchantAliasORM).where(MerchantAliasORM.merchant_id.in_(merchant_ids)))
+    db.execute(delete(MerchantMccORM).where(MerchantMccORM.merchant_id.in_(merchant_ids)))
+
+
+def index_merchants(db: Session, merchants: Iterable, replace: bool = True):
+    """
+    Writes the alias/MCC rows of merchants (ORM objects or dicts) inside the caller's DB
+    transaction (the caller commits). With replace, the merchants' previous rows are removed first.
+    """
+    alias_rows, mcc_rows, merchant_ids = [], [], []
+    for merchant in merchants:
+        get = merchant.get if isinstance(merchant, dict) else lambda name: getattr(merchant, name)
+        merchant_ids.append(get("merchant_id"))
+        alias_rows.extend(_alias_rows(get("merchant_id"), get("aliases")))
+        mcc_rows.extend(_mcc_rows(get("merchant_id"), get("typical_mccs")))
+    if replace:
+        remove_merchant_index(db, merchant_ids)
+    if alias_rows:
+        db.execute(insert(MerchantAliasORM), alias_rows)
+    if mcc_rows:
+        db.execute(insert(MerchantMccORM), mcc_rows)
+
+
+def _fts_table_exists(db: Session) -> bool:
+    return db.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                      {"name": ALIAS_FTS_TABLE}).first() is not None
+
+
+def _install_alias_fts(db: Session) -> bool:
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    if _fts_table_exists(db):
+        return True
+    try:
+        for statement in ALIAS_FTS_DDL:
+            db.execute(text(statement))
+        # Index the alias rows written before the table existed
+        db.execute(text(f"INSERT INTO {ALIAS_FTS_TABLE}({ALIAS_FTS_TABLE}) VALUES ('rebuild')"))
+    except OperationalError as e:
+        # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer)
+        db.rollback()
+        logger.warning(f"Alias substring index unavailable, falling back to scans: {e}")
+        return False
+    return True
+
+
+def rebuild_merchant_index(db: Session) -> int:
+    """Recomputes merchant_aliases / merchant_mccs (and the FTS index) from the merchants table, then commits."""
+    logger.info("Rebuilding merchant alias/MCC index")
+    # Installed first: a failed install rolls back, and from here on the triggers keep it in sync
+    if _install_alias_fts(db):
+        db.commit()
+    db.execute(delete(MerchantAliasORM))
+    db.execute(delete(MerchantMccORM))
+    last_id = None
+    indexed = 0
+    while True:
+        q = select(MerchantORM.merchant_id, MerchantORM.aliases, MerchantORM.typical_mccs)
+        if last_id is not None:
+            q = q.where(MerchantORM.merchant_id > last_id)
+        rows = db.execute(q.order_by(MerchantORM.merchant_id).limit(REBUILD_CHUNK_SIZE)).mappings().all()
+        if not rows:
+            break
+        index_merchants(db, rows, replace=False)
+        indexed += len(rows)
+        last_id = rows[-1]["merchant_id"]
+    db.commit()
+    logger.info(f"Merchant index rebuilt: merchants={indexed}")
+    return indexed
+
+
+def ensure_merchant_index(db: Session):
+    """Creates the FTS index and builds the alias/MCC rows once for databases that predate them."""
+    global _fts_available
+    if db.execute(select(MerchantAliasORM.id).limit(1)).first() is None \
+            and db.execute(select(MerchantMccORM.mcc).limit(1)).first() is None \
+            and db.execute(select(MerchantORM.merchant_id).limit(1)).first() is not None:
+        rebuild_merchant_index(db)
+    elif _install_alias_fts(db):
+        db.commit()
+    _fts_available = None
+
+
+# --- Lookups ---
+def _has_alias_fts(db: Session) -> bool:
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = db.get_bind().dialect.name == "sqlite" and _fts_table_exists(db)
+    return _fts_available
+
+
+def _prefix_range(column, key: str):
+    # Range on the alias_key index; LIKE would not use it under SQLite's default case-insensitive LIKE
+    return and_(column >= key, column < key + "\U0010ffff")
+
+
+def first_alias_by_prefix(alias: str):
+    """
+    Subquery of (merchant_id, alias_key): each merchant's first alias starting with `alias`.
+    Read in alias_key order straight from the index, so a page over a common prefix stops
+    after `limit` rows instead of collecting every match first.
+    """
+    key = alias_key(alias)
+    earlier = aliased(MerchantAliasORM)
+    return select(MerchantAliasORM.merchant_id, MerchantAliasORM.alias_key).where(
+        _prefix_range(MerchantAliasORM.alias_key, key),
+        ~exists().where(earlier.merchant_id == MerchantAliasORM.merchant_id,
+                        _prefix_range(earlier.alias_key, key), earlier.alias_key < MerchantAliasORM.alias_key),
+    ).subquery()
+
+
+def merchant_ids_by_alias(db: Session, alias: str, match: str = "contains"):
+    """Subquery of merchant_ids with an alias equal to, starting with, or containing `alias` (case-insensitive)."""
+    key = alias_key(alias)
+    q = select(MerchantAliasORM.merchant_id)
+    if match == "exact":
+        return q.where(MerchantAliasORM.alias_key == key)
+    if match == "prefix":
+        return q.where(_prefix_range(MerchantAliasORM.alias_key, key))
+    if len(key) >= FTS_MIN_LENGTH and _has_alias_fts(db):
+        phrase = '"' + key.replace('"', '""') + '"'
+        return q.where(MerchantAliasORM.id.in_(select(alias_fts.c.rowid).where(alias_fts.c.alias_key.op("MATCH")(phrase))))
+    return q.where(func.instr(MerchantAliasORM.alias_key, key) > 0)
+
+
+def merchant_ids_by_mcc(mcc: str):
+    return select(MerchantMccORM.merchant_id).where(MerchantMccORM.mcc == mcc)
@@ -2,11 +2,18 @@ import logging
 from typing import Optional
 
 from fastapi import HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.models import MerchantORM, TransactionORM
+from app.classifier.overrides import SCOPE_MERCHANT
+from app.classifier.snapshot import record_merchant_changes, sync_merchants
+from app.models import ClassificationOverrideORM, MerchantORM, TransactionORM
 from app.schemas.merchant_schema import MerchantCreate, MerchantUpdate
+from app.services.merchant_index_service import (
+    first_alias_by_prefix, index_merchants, merchant_ids_by_alias, merchant_ids_by_mcc, remove_merchant_index,
+)
+from app.services.override_service import remove_overrides_where
 from app.services.transaction_service import delete_transaction_cascade
 from app.validators.merchant_validator import validate_merchant_id, validate_merchant_payload
 
@@ -21,6 +28,9 @@ def create_merchant_service(payload: MerchantCreate, db: Session):
     merchant = MerchantORM(**payload.dict())
     db.add(merchant)
     try:
+        db.flush()
+        index_merchants(db, [merchant], replace=False)
+        record_merchant_changes(db, [merchant.merchant_id])
         db.commit()
         logger.info(f"Merchant created: {merchant.merchant_id}")
     except SQLAlchemyError:
@@ -28,6 +38,7 @@ def create_merchant_service(payload: MerchantCreate, db: Session):
         logger.error(f"SQLAlchemyError on merchant creation: {payload.merchant_id}")
         raise HTTPException(status_code=500, detail="Database error")
     db.refresh(merchant)
+    sync_merchants(db)
     return merchant
 
 def get_merchant_service(merchant_id: str, db: Session):
@@ -46,9 +57,13 @@ def update_merchant_service(merchant_id: str, payload: MerchantUpdate, db: Sessi
     if not merchant:
         logger.error(f"Merchant not found for update: {merchant_id}")
         raise HTTPException(status_code=404, detail="Merchant not found")
-    for field, value in payload.dict(exclude_unset=True).items():
+    changes = payload.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(merchant, field, value)
     try:
+        if "aliases" in changes or "typical_mccs" in changes:
+            index_merchants(db, [merchant])
+        record_merchant_changes(db, [merchant_id])
         db.commit()
         logger.info(f"Merchant updated: {merchant_id}")
     except SQLAlchemyError:
@@ -56,6 +71,7 @@ def update_merchant_service(merchant_id: str, payload: MerchantUpdate, db: Sessi
         logger.error(f"SQLAlchemyError on merchant update: {merchant_id}")
         raise HTTPException(status_code=500, detail="Database error")
     db.refresh(merchant)
+    sync_merchants(db)
     return merchant
 
 def delete_merchant_service(merchant_id: str, db: Session):
@@ -63,20 +79,46 @@ def delete_merchant_service(merchant_id: str, db: Session):
     validate_merchant_id(merchant_id)
     merchant = db.get(MerchantORM, merchant_id)
     if merchant:
-        transactions = db.query(TransactionORM).filter(TransactionORM.merchant_id == merchant_id).all()
-        delete_transaction_cascade(db, merchant, transactions)
-        logger.info(f"Merchant deleted: {merchant_id}")
+        remove_merchant_index(db, [merchant_id])
+        remove_overrides_where(db, [ClassificationOverrideORM.scope == SCOPE_MERCHANT,
+                                    ClassificationOverrideORM.key == merchant_id])
+        deleted = delete_transaction_cascade(db, merchant, [TransactionORM.merchant_id == merchant_id])
+        # Logged once the merchant is gone: the cascade commits chunk by chunk, and a process
+        # applying the change earlier would reload the merchant while it still exists
+        try:
+            record_merchant_changes(db, [merchant_id])
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.error(f"SQLAlchemyError logging merchant delete: {merchant_id}")
+            raise HTTPException(status_code=500, detail="Database error")
+        sync_merchants(db)
+        logger.info(f"Merchant deleted: {merchant_id}, transactions deleted: {deleted}")
     else:
         logger.warning(f"Merchant not found for delete: {merchant_id}")
     return
 
-def list_merchants_service(db: Session, aliases: Optional[str] = None, mccs: Optional[str] = None, limit: int = 50, offset: int = 0):
-    logger.info(f"Listing merchants: aliases={aliases}, mcc={mccs}, limit={limit}, offset={offset}")
-    query = db.query(MerchantORM)
-    if aliases:
-        query = query.filter(MerchantORM.aliases.ilike(f"%{aliases}%"))
-    if mccs:
-        query = query.filter(MerchantORM.typical_mccs == mccs)
-    merchants = query.offset(offset).limit(limit).all()
+def list_merchants_service(db: Session, aliases: Optional[str] = None, mccs: Optional[str] = None, limit: int = 50,
+                           offset: int = 0, alias_match: str = "contains"):
+    logger.info(f"Listing merchants: aliases={aliases}, alias_match={alias_match}, mcc={mccs}, limit={limit}, offset={offset}")
+    # Alias and MCC filters are answered from the merchant_aliases / merchant_mccs indexes
+    q = select(MerchantORM)
+    order_by = [MerchantORM.merchant_id]
+    if aliases and alias_match == "prefix":
+        # Autocomplete: ordered by the matching alias, streamed from the alias_key index
+        matches = first_alias_by_prefix(aliases)
+        q = q.join(matches, matches.c.merchant_id == MerchantORM.merchant_id)
+        order_by = [matches.c.alias_key, matches.c.merchant_id]
+    elif aliases:
+        q = q.where(MerchantORM.merchant_id.in_(merchant_ids_by_alias(db, aliases, alias_match)))
+    if mccs and aliases:
+        q = q.where(MerchantORM.merchant_id.in_(merchant_ids_by_mcc(mccs)))
+    elif mccs:
+        # (mcc, merchant_id) is the primary key: rows come out in merchant_id order, so the page stops early
+        mcc_ids = merchant_ids_by_mcc(mccs).subquery()
+        q = q.join(mcc_ids, mcc_ids.c.merchant_id == MerchantORM.merchant_id)
+        order_by = [mcc_ids.c.merchant_id]
+    q = q.order_by(*order_by)
+    merchants = db.execute(q.offset(offset).limit(limit)).scalars().all()
     logger.info(f"Merchants listed: count={len(merchants)}")
-    return merchants
\ No newline at end of file
+    return merchants
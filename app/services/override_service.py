@@ -0,0 +1,131 @@
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.classifier.normalize import normalize_description
+from app.classifier.overrides import SCOPE_MERCHANT, override_reason, sync_overrides
+from app.classifier.snapshot import get_snapshot
+from app.models import ClassificationOverrideORM, TransactionORM, UserORM
+from app.schemas.classification_schema import CorrectionRequest, CorrectionResult, OverrideOut
+from app.schemas.transaction_schema import TransactionOut
+from app.services.rollup_service import apply_rollup_changes, rollup_entry
+
+logger = logging.getLogger(__name__)
+
+# Merchant of transactions whose merchant could not be resolved; an override on it would
+# catch every such transaction of the user
+FALLBACK_MERCHANT_ID = "m_uncategorized"
+
+
+def _next_seq():
+    # Evaluated inside the writing statement, under SQLite's write lock, so the sequence
+    # follows commit order and processes syncing "change_seq > last seen" miss nothing
+    return select(func.coalesce(func.max(ClassificationOverrideORM.change_seq), 0) + 1).scalar_subquery()
+
+
+def _override_key(transaction: TransactionORM, scope: str) -> str:
+    if scope == SCOPE_MERCHANT:
+        if transaction.merchant_id == FALLBACK_MERCHANT_ID:
+            raise HTTPException(status_code=422, detail="The transaction has no resolved merchant; use scope=descriptor")
+        return transaction.merchant_id
+    key = transaction.normalized_description or normalize_description(transaction.raw_description)
+    if not key:
+        raise HTTPException(status_code=422, detail="The transaction's description is empty once normalized")
+    return key
+
+
+def correct_transaction_service(payload: CorrectionRequest, db: Session) -> CorrectionResult:
+    """
+    Stores the user's category on the transaction and records it as an override for the
+    transaction's merchant or normalized description, so their future transactions get it
+    without running the pipeline.
+    """
+    logger.info(f"Correcting transaction: {payload.transaction_id} -> {payload.category} (scope={payload.scope})")
+    transaction = db.get(TransactionORM, payload.transaction_id)
+    if not transaction:
+        logger.warning(f"Transaction not found for correction: {payload.transaction_id}")
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    category = payload.category.strip()
+    if not category:
+        raise HTTPException(status_code=422, detail="category must not be blank")
+    key = _override_key(transaction, payload.scope)
+
+    now = datetime.utcnow()
+    override = db.execute(select(ClassificationOverrideORM).where(
+        ClassificationOverrideORM.user_id == transaction.user_id,
+        ClassificationOverrideORM.scope == payload.scope,
+        ClassificationOverrideORM.key == key,
+    )).scalar_one_or_none()
+    if override is None:
+        override = ClassificationOverrideORM(user_id=transaction.user_id, scope=payload.scope, key=key, created_at=now)
+        db.add(override)
+    override.category = category
+    override.transaction_id = transaction.id
+    override.updated_at = now
+    override.change_seq = _next_seq()
+
+    before = rollup_entry(transaction)
+    transaction.category = category
+    transaction.category_confidence = 1.0
+    transaction.category_reasons = [override_reason(payload.scope, key)]
+    transaction.classifier_version = get_snapshot().version
+    transaction.classified_at = now
+    try:
+        after = rollup_entry(transaction)
+        if after != before:
+            apply_rollup_changes(db, added=[after], removed=[before])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.error(f"Database error during correction: {payload.transaction_id}")
+        raise HTTPException(status_code=500, detail="Database error during correction")
+    db.refresh(override)
+    db.refresh(transaction)
+    # Applied here right away; other processes pick it up from their reload watcher
+    sync_overrides(db)
+    logger.info(f"Override {override.id} stored: user={override.user_id}, {override.scope}='{key}' -> {category}")
+    return CorrectionResult(override=OverrideOut.model_validate(override),
+                            transaction=TransactionOut.model_validate(transaction))
+
+
+def list_overrides_service(db: Session, user_id: str, scope: Optional[str] = None, limit: int = 50,
+                           offset: int = 0) -> List[ClassificationOverrideORM]:
+    logger.info(f"Listing overrides: user_id={user_id}, scope={scope}, limit={limit}, offset={offset}")
+    if not db.get(UserORM, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    q = select(ClassificationOverrideORM).where(ClassificationOverrideORM.user_id == user_id,
+                                                ClassificationOverrideORM.category.isnot(None))
+    if scope:
+        q = q.where(ClassificationOverrideORM.scope == scope)
+    return db.execute(q.order_by(ClassificationOverrideORM.id).limit(limit).offset(offset)).scalars().all()
+
+
+def remove_overrides_where(db: Session, conditions: list) -> int:
+    """Marks the matching overrides removed inside the caller's DB transaction (the caller commits)."""
+    return db.execute(
+        update(ClassificationOverrideORM)
+        .where(*conditions, ClassificationOverrideORM.category.isnot(None))
+        .values(category=None, change_seq=_next_seq(), updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def delete_override_service(override_id: int, db: Session):
+    logger.info(f"Deleting override: {override_id}")
+    override = db.get(ClassificationOverrideORM, override_id)
+    if not override or override.category is None:
+        logger.warning(f"Override not found for delete: {override_id}")
+        raise HTTPException(status_code=404, detail="Override not found")
+    try:
+        remove_overrides_where(db, [ClassificationOverrideORM.id == override_id])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.error(f"Database error deleting override: {override_id}")
+        raise HTTPException(status_code=500, detail="Database error")
+    sync_overrides(db)
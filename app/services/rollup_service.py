@@ -0,0 +1,199 @@
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import SpendingRollupORM, TransactionORM, UserORM
+from app.schemas.analytics_schema import SpendingRollupOut, SpendingSummary
+
+logger = logging.getLogger(__name__)
+
+# Rollup bucket for transactions without a stored classification
+UNCLASSIFIED = "Unclassified"
+
+RollupKey = Tuple[str, str, str]
+# (user_id, posted_at, category, amount) of one transaction, as it counts towards the rollups
+RollupEntry = Tuple[str, datetime, Optional[str], float]
+
+
+def rollup_entry(transaction) -> RollupEntry:
+    return transaction.user_id, transaction.posted_at, transaction.category, transaction.amount
+
+
+def _key(entry: RollupEntry) -> RollupKey:
+    user_id, posted_at, category, _ = entry
+    return user_id, posted_at.strftime("%Y-%m"), category or UNCLASSIFIED
+
+
+# --- Incremental maintenance ---
+def apply_rollup_changes(db: Session, added: Iterable[RollupEntry] = (), removed: Iterable[RollupEntry] = ()):
+    """
+    Folds added/removed transactions into spending_rollups inside the caller's DB transaction
+    (the caller commits). Sums and counts are adjusted in place; min/max are recomputed from
+    the group's transactions only when a removed amount was the group's min or max.
+    """
+    additions: Dict[RollupKey, List[float]] = {}
+    for entry in added:
+        amount = entry[3]
+        agg = additions.get(_key(entry))
+        if agg is None:
+            additions[_key(entry)] = [amount, 1, amount, amount]
+        else:
+            agg[0] += amount
+            agg[1] += 1
+            agg[2] = min(agg[2], amount)
+            agg[3] = max(agg[3], amount)
+    removals: Dict[RollupKey, List] = {}
+    for entry in removed:
+        agg = removals.setdefault(_key(entry), [0.0, 0, []])
+        agg[0] += entry[3]
+        agg[1] += 1
+        agg[2].append(entry[3])
+    if not additions and not removals:
+        return
+
+    # Pending ORM changes must be visible to the min/max recomputation below
+    db.flush()
+    table = SpendingRollupORM.__table__
+    rows = [
+        {"user_id": key[0], "month": key[1], "category": key[2], "total_amount": total,
+         "txn_count": count, "min_amount": low, "max_amount": high}
+        for key, (total, count, low, high) in additions.items()
+    ]
+    if rows:
+        # executemany of one cached statement; a multi-row VALUES would be recompiled per row count
+        stmt = sqlite_insert(table)
+        excluded = stmt.excluded
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.month, table.c.category],
+            set_={
+                "total_amount": table.c.total_amount + excluded.total_amount,
+                "txn_count": table.c.txn_count + excluded.txn_count,
+                "min_amount": func.min(func.coalesce(table.c.min_amount, excluded.min_amount), excluded.min_amount),
+                "max_amount": func.max(func.coalesce(table.c.max_amount, excluded.max_amount), excluded.max_amount),
+            },
+        ), rows)
+
+    if removals:
+        db.execute(
+            update(table)
+            .where(table.c.user_id == bindparam("k_user_id"), table.c.month == bindparam("k_month"),
+                   table.c.category == bindparam("k_category"))
+            .values(total_amount=table.c.total_amount - bindparam("d_total"),
+                    txn_count=table.c.txn_count - bindparam("d_count")),
+            [{"k_user_id": key[0], "k_month": key[1], "k_category": key[2], "d_total": total, "d_count": count}
+             for key, (total, count, _) in removals.items()],
+        )
+        _settle_removals(db, removals)
+
+
+def _settle_removals(db: Session, removals: Dict[RollupKey, List]):
+    table = SpendingRollupORM.__table__
+    current = db.execute(
+        select(table.c.user_id, table.c.month, table.c.category, table.c.txn_count,
+               table.c.min_amount, table.c.max_amount)
+        .where(tuple_(table.c.user_id, table.c.month, table.c.category).in_(list(removals)))
+    ).all()
+    empty = []
+    for user_id, month, category, count, low, high in current:
+        key = (user_id, month, category)
+        if count <= 0:
+            empty.append(key)
+            continue
+        removed_amounts = removals[key][2]
+        if any(amount <= low or amount >= high for amount in removed_amounts):
+            low, high = _group_min_max(db, key)
+            db.execute(
+                update(table)
+                .where(table.c.user_id == user_id, table.c.month == month, table.c.category == category)
+                .values(min_amount=low, max_amount=high)
+            )
+    if empty:
+        db.execute(delete(table).where(tuple_(table.c.user_id, table.c.month, table.c.category).in_(empty)))
+
+
+def _group_min_max(db: Session, key: RollupKey):
+    user_id, month, category = key
+    month_start = datetime.strptime(month, "%Y-%m")
+    month_end = month_start.replace(year=month_start.year + 1, month=1) if month_start.month == 12 \
+        else month_start.replace(month=month_start.month + 1)
+    category_filter = TransactionORM.category.is_(None) if category == UNCLASSIFIED \
+        else TransactionORM.category == category
+    # Served by ix_transactions_user_id_category_posted_at
+    return db.execute(
+        select(func.min(TransactionORM.amount), func.max(TransactionORM.amount))
+        .where(TransactionORM.user_id == user_id, category_filter,
+               and_(TransactionORM.posted_at >= month_start, TransactionORM.posted_at < month_end))
+    ).one()
+
+
+# --- Rebuild ---
+def rebuild_rollups(db: Session, user_id: Optional[str] = None) -> int:
+    """Recomputes the rollups (of one user, or all) from the transactions table in one INSERT ... SELECT."""
+    logger.info(f"Rebuilding spending rollups: user_id={user_id or 'all'}")
+    month = func.strftime("%Y-%m", TransactionORM.posted_at)
+    category = func.coalesce(TransactionORM.category, UNCLASSIFIED)
+    grouped = select(
+        TransactionORM.user_id, month, category, func.sum(TransactionORM.amount), func.count(),
+        func.min(TransactionORM.amount), func.max(TransactionORM.amount),
+    ).group_by(TransactionORM.user_id, month, category)
+    clear = delete(SpendingRollupORM)
+    if user_id:
+        grouped = grouped.where(TransactionORM.user_id == user_id)
+        clear = clear.where(SpendingRollupORM.user_id == user_id)
+    db.execute(clear)
+    db.execute(insert(SpendingRollupORM).from_select(
+        ["user_id", "month", "category", "total_amount", "txn_count", "min_amount", "max_amount"], grouped,
+    ))
+    db.commit()
+    count = db.execute(select(func.count()).select_from(SpendingRollupORM)).scalar_one()
+    logger.info(f"Spending rollups rebuilt: rows={count}")
+    return count
+
+
+def ensure_rollups(db: Session):
+    """Builds the rollups once for databases that had transactions before the table existed."""
+    if db.execute(select(SpendingRollupORM.user_id).limit(1)).first() is None \
+            and db.execute(select(TransactionORM.id).limit(1)).first() is not None:
+        rebuild_rollups(db)
+
+
+# --- Analytics ---
+def get_spending_service(user_id: str, db: Session, month_from: Optional[str] = None,
+                         month_to: Optional[str] = None, category: Optional[str] = None) -> SpendingSummary:
+    logger.info(f"Spending rollup query: user_id={user_id}, month_from={month_from}, month_to={month_to}, "
+                f"category={category}")
+    if not db.get(UserORM, user_id):
+        logger.warning(f"user_id does not exist for spending: {user_id}")
+        raise HTTPException(status_code=404, detail="user_id does not exist")
+    # Primary key prefix scan: cost grows with months x categories, not transactions
+    q = select(SpendingRollupORM).where(SpendingRollupORM.user_id == user_id)
+    if month_from:
+        q = q.where(SpendingRollupORM.month >= month_from)
+    if month_to:
+        q = q.where(SpendingRollupORM.month <= month_to)
+    if category:
+        q = q.where(SpendingRollupORM.category == category)
+    rows = db.execute(q.order_by(SpendingRollupORM.month, SpendingRollupORM.category)).scalars().all()
+    items = [
+        SpendingRollupOut(
+            month=row.month,
+            category=row.category,
+            total_amount=round(row.total_amount, 2),
+            txn_count=row.txn_count,
+            min_amount=row.min_amount,
+            max_amount=row.max_amount,
+            avg_amount=round(row.total_amount / row.txn_count, 2) if row.txn_count else 0.0,
+        )
+        for row in rows
+    ]
+    return SpendingSummary(
+        user_id=user_id,
+        total_amount=round(sum(item.total_amount for item in items), 2),
+        txn_count=sum(item.txn_count for item in items),
+        items=items,
+    )
@@ -0,0 +1,116 @@
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import column, delete, insert, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models import TransactionORM
+
+logger = logging.getLogger(__name__)
+
+# FTS5 index over the transaction descriptions, one row per transaction keyed by the transaction's
+# rowid. It keeps its own copy of the text, so removing an entry that is not there is harmless.
+# Maintained set-based by the transaction write paths (index_transactions / unindex_transactions
+# per statement or chunk): per-row triggers made bulk ingest about 5x slower than this.
+# transactions has no INTEGER PRIMARY KEY, so a VACUUM may renumber its rowids: run
+# `python -m app.db.rebuild_search_index` after one.
+SEARCH_FTS_TABLE = "transaction_fts"
+SEARCH_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} "
+    f"USING fts5(raw_description, normalized_description, tokenize='unicode61')"
+)
+SEARCH_COLUMNS = ["rowid", "raw_description", "normalized_description"]
+transaction_fts = table(SEARCH_FTS_TABLE, *(column(name) for name in SEARCH_COLUMNS))
+transaction_rowid = literal_column("transactions.rowid")
+# bm25 column weights: raw_description, normalized_description
+BM25_WEIGHTS = (1.0, 0.5)
+# Transactions indexed per statement when rebuilding
+REBUILD_CHUNK_SIZE = 50000
+_WORD = re.compile(r"[^\W_]+\*?", re.UNICODE)
+
+# Whether the database has the FTS table; looked up once per process
+_search_available: Optional[bool] = None
+
+
+def _search_table_exists(db: Session) -> bool:
+    return db.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                      {"name": SEARCH_FTS_TABLE}).first() is not None
+
+
+def search_available(db: Session) -> bool:
+    global _search_available
+    if _search_available is None:
+        _search_available = db.get_bind().dialect.name == "sqlite" and _search_table_exists(db)
+    return _search_available
+
+
+def _indexed_rows():
+    return select(transaction_rowid, TransactionORM.raw_description, TransactionORM.normalized_description)
+
+
+# --- Maintenance ---
+def unindex_transactions(db: Session, ids: List[str]):
+    """Drops the transactions' index entries; runs before their rows are deleted (the caller commits)."""
+    if not ids or not search_available(db):
+        return
+    db.execute(delete(transaction_fts).where(transaction_fts.c.rowid.in_(
+        select(transaction_rowid).select_from(TransactionORM).where(TransactionORM.id.in_(ids)))))
+
+
+def index_transactions(db: Session, ids: List[str], replace: bool = False):
+    """
+    Indexes the transactions' stored descriptions with one INSERT ... SELECT inside the caller's
+    DB transaction (the caller commits); pending ORM changes are flushed first. With replace,
+    their previous entries are dropped first.
+    """
+    if not ids or not search_available(db):
+        return
+    db.flush()
+    if replace:
+        unindex_transactions(db, ids)
+    db.execute(insert(transaction_fts).from_select(SEARCH_COLUMNS, _indexed_rows().where(TransactionORM.id.in_(ids))))
+
+
+def ensure_search_index(db: Session, rebuild: bool = False):
+    """Creates the FTS table, indexing the existing transactions once; rebuild re-indexes everything."""
+    global _search_available
+    if db.get_bind().dialect.name != "sqlite" or (_search_table_exists(db) and not rebuild):
+        return
+    try:
+        db.execute(text(SEARCH_FTS_DDL))
+        db.execute(delete(transaction_fts))
+    except OperationalError as e:
+        # SQLite built without FTS5
+        db.rollback()
+        logger.warning(f"Transaction search index unavailable: {e}")
+        return
+    logger.info("Building the transaction search index")
+    last_rowid = 0
+    while True:
+        # rowid ranges of REBUILD_CHUNK_SIZE transactions, each indexed and committed on its own
+        upper = db.execute(select(transaction_rowid).select_from(TransactionORM).where(transaction_rowid > last_rowid)
+                           .order_by(transaction_rowid).offset(REBUILD_CHUNK_SIZE - 1).limit(1)).scalar()
+        rows = _indexed_rows().where(transaction_rowid > last_rowid)
+        if upper is not None:
+            rows = rows.where(transaction_rowid <= upper)
+        db.execute(insert(transaction_fts).from_select(SEARCH_COLUMNS, rows))
+        db.commit()
+        if upper is None:
+            break
+        last_rowid = upper
+    _search_available = True
+    logger.info("Transaction search index built")
+
+
+# --- Queries ---
+def match_expression(q: str) -> str:
+    """Every word must match; a trailing * makes it a prefix. Quoting keeps FTS5 syntax out of user input."""
+    terms = []
+    for word in _WORD.findall(q):
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
@@ -0,0 +1,175 @@
+import logging
+from datetime import datetime
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.classifier.normalize import normalize_description
+from app.classifier.snapshot import latest_taxonomy_version, reload_taxonomy
+from app.models import TaxonomyMccORM, TaxonomyRuleORM, TaxonomyVersionORM
+from app.schemas.taxonomy_schema import (
+    MccCategoryOut, MccCategoryUpdate, TaxonomyOut, TaxonomyReplace, TaxonomyRuleCreate, TaxonomyRuleOut,
+    TaxonomyRuleUpdate,
+)
+from app.taxonomy import MCC_CATEGORY_MAP, REGEX_RULES
+from app.validators.taxonomy_validator import validate_category, validate_keyword, validate_mcc, validate_mcc_categories
+
+logger = logging.getLogger(__name__)
+
+
+def _keyword(keyword: str) -> str:
+    # Stored the way descriptions are matched, so e.g. "POS Target #12" becomes "target"
+    return normalize_description(keyword)
+
+
+def _rule_row(rule: TaxonomyRuleCreate) -> dict:
+    validate_keyword(rule.keyword)
+    validate_category(rule.category)
+    keyword = _keyword(rule.keyword)
+    return {"keyword": keyword, "category": rule.category.strip(),
+            "reason": rule.reason or f"Regex rule: '{keyword}'", "boundary": rule.boundary}
+
+
+# --- Versions ---
+def ensure_taxonomy(db: Session):
+    """Seeds the taxonomy tables with the defaults from app/taxonomy.py once, as version 1."""
+    if latest_taxonomy_version(db) is not None:
+        return
+    db.execute(insert(TaxonomyMccORM), [{"mcc": mcc, "category": category} for mcc, category in MCC_CATEGORY_MAP.items()])
+    db.execute(insert(TaxonomyRuleORM), [
+        {"keyword": rule[0], "category": rule[1], "reason": rule[2], "boundary": rule[3] if len(rule) > 3 else None}
+        for rule in REGEX_RULES
+    ])
+    db.add(TaxonomyVersionORM(version=1, change="Seeded from app/taxonomy.py", created_at=datetime.utcnow()))
+    db.commit()
+    logger.info(f"Taxonomy seeded: mccs={len(MCC_CATEGORY_MAP)}, rules={len(REGEX_RULES)}")
+
+
+def _commit_change(db: Session, change: str) -> int:
+    """
+    Records a new taxonomy version in the same commit as the edit, then installs it in this
+    process; other processes pick it up from their taxonomy watcher.
+    """
+    version = (latest_taxonomy_version(db) or 0) + 1
+    db.add(TaxonomyVersionORM(version=version, change=change, created_at=datetime.utcnow()))
+    try:
+        db.commit()
+    except SQLAlchemyError:
+        # Includes a concurrent edit taking the same version number
+        db.rollback()
+        logger.error(f"Database error on taxonomy change: {change}")
+        raise HTTPException(status_code=500, detail="Database error")
+    logger.info(f"Taxonomy v{version}: {change}")
+    reload_taxonomy(db)
+    return version
+
+
+def get_taxonomy_service(db: Session) -> TaxonomyOut:
+    return TaxonomyOut(
+        version=latest_taxonomy_version(db) or 0,
+        mcc_categories=dict(db.execute(select(TaxonomyMccORM.mcc, TaxonomyMccORM.category)
+                                       .order_by(TaxonomyMccORM.mcc)).all()),
+        rules=db.execute(select(TaxonomyRuleORM).order_by(TaxonomyRuleORM.id)).scalars().all(),
+    )
+
+
+def list_taxonomy_versions_service(db: Session, limit: int = 50) -> List[TaxonomyVersionORM]:
+    return db.execute(select(TaxonomyVersionORM).order_by(TaxonomyVersionORM.version.desc()).limit(limit)).scalars().all()
+
+
+# --- MCC map ---
+def put_mcc_category_service(mcc: str, payload: MccCategoryUpdate, db: Session) -> MccCategoryOut:
+    logger.info(f"Setting MCC category: {mcc} -> {payload.category}")
+    validate_mcc(mcc)
+    validate_category(payload.category)
+    ensure_taxonomy(db)
+    entry = db.get(TaxonomyMccORM, mcc)
+    if entry:
+        entry.category = payload.category.strip()
+    else:
+        entry = TaxonomyMccORM(mcc=mcc, category=payload.category.strip())
+        db.add(entry)
+    _commit_change(db, f"Set MCC {mcc} to '{entry.category}'")
+    return MccCategoryOut(mcc=mcc, category=entry.category)
+
+
+def delete_mcc_category_service(mcc: str, db: Session):
+    logger.info(f"Deleting MCC category: {mcc}")
+    validate_mcc(mcc)
+    ensure_taxonomy(db)
+    entry = db.get(TaxonomyMccORM, mcc)
+    if not entry:
+        logger.warning(f"MCC not in taxonomy: {mcc}")
+        raise HTTPException(status_code=404, detail="MCC not found in taxonomy")
+    db.delete(entry)
+    _commit_change(db, f"Removed MCC {mcc}")
+
+
+# --- Rules ---
+def _get_rule(rule_id: int, db: Session) -> TaxonomyRuleORM:
+    rule = db.get(TaxonomyRuleORM, rule_id)
+    if not rule:
+        logger.warning(f"Taxonomy rule not found: {rule_id}")
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return rule
+
+
+def create_rule_service(payload: TaxonomyRuleCreate, db: Session) -> TaxonomyRuleOut:
+    logger.info(f"Creating taxonomy rule: {payload.keyword} -> {payload.category}")
+    ensure_taxonomy(db)
+    rule = TaxonomyRuleORM(**_rule_row(payload))
+    db.add(rule)
+    db.flush()
+    _commit_change(db, f"Added rule {rule.id} '{rule.keyword}' -> '{rule.category}'")
+    return TaxonomyRuleOut.model_validate(rule)
+
+
+def update_rule_service(rule_id: int, payload: TaxonomyRuleUpdate, db: Session) -> TaxonomyRuleOut:
+    logger.info(f"Updating taxonomy rule: {rule_id}")
+    ensure_taxonomy(db)
+    rule = _get_rule(rule_id, db)
+    changes = payload.model_dump(exclude_unset=True)
+    if "keyword" in changes:
+        validate_keyword(changes["keyword"])
+        changes["keyword"] = _keyword(changes["keyword"])
+    if "category" in changes:
+        validate_category(changes["category"])
+        changes["category"] = changes["category"].strip()
+    for field, value in changes.items():
+        setattr(rule, field, value)
+    if not rule.keyword or not rule.category:
+        db.rollback()
+        raise HTTPException(status_code=422, detail="keyword and category are required")
+    if not rule.reason:
+        rule.reason = f"Regex rule: '{rule.keyword}'"
+    _commit_change(db, f"Updated rule {rule_id}: {', '.join(sorted(changes)) or 'no fields'}")
+    return TaxonomyRuleOut.model_validate(rule)
+
+
+def delete_rule_service(rule_id: int, db: Session):
+    logger.info(f"Deleting taxonomy rule: {rule_id}")
+    ensure_taxonomy(db)
+    rule = _get_rule(rule_id, db)
+    db.delete(rule)
+    _commit_change(db, f"Removed rule {rule_id} '{rule.keyword}'")
+
+
+# --- Whole taxonomy ---
+def replace_taxonomy_service(payload: TaxonomyReplace, db: Session) -> TaxonomyOut:
+    """Replaces the MCC map and every rule as one version (rule ids are reassigned)."""
+    logger.info(f"Replacing taxonomy: mccs={len(payload.mcc_categories)}, rules={len(payload.rules)}")
+    validate_mcc_categories(payload.mcc_categories)
+    rows = [_rule_row(rule) for rule in payload.rules]
+    ensure_taxonomy(db)
+    db.execute(delete(TaxonomyMccORM))
+    db.execute(delete(TaxonomyRuleORM))
+    if payload.mcc_categories:
+        db.execute(insert(TaxonomyMccORM), [{"mcc": mcc, "category": category.strip()}
+                                           for mcc, category in payload.mcc_categories.items()])
+    if rows:
+        db.execute(insert(TaxonomyRuleORM), rows)
+    _commit_change(db, f"Replaced taxonomy: mccs={len(payload.mcc_categories)}, rules={len(rows)}")
+    return get_taxonomy_service(db)
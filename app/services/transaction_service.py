@@ -1,31 +1,58 @@
+import base64
+import json
 import logging
 from fastapi import HTTPException
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, asc, desc
+from sqlalchemy import select, func, asc, desc, tuple_, literal, literal_column, insert, delete, update
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Set
 from datetime import datetime
 
+from app import config
 from app.models import TransactionORM, UserORM, MerchantORM
-from app.schemas.transaction_schema import TransactionOut, TransactionCreate, TransactionUpdate
+from app.classifier.engine import classify_bulk
+from app.classifier.normalize import normalize_description
+from app.classifier.snapshot import get_snapshot
+from app.schemas.classification_schema import ClassificationRequest
+from app.schemas.transaction_schema import (
+    TransactionOut, TransactionCreate, TransactionUpdate, BulkIngestError, BulkIngestResult,
+    TransactionBulkDelete, TransactionBulkUpdate, BulkMutationResult, TransactionSearchHit, TransactionSearchResult,
+)
+from app.services.rollup_service import apply_rollup_changes, rollup_entry
+from app.services.search_service import (
+    BM25_WEIGHTS, SEARCH_FTS_TABLE, index_transactions, match_expression, search_available, transaction_fts,
+    transaction_rowid, unindex_transactions,
+)
 from pydantic import BaseModel
 
 from app.validators.transaction_validator import validate_transaction_create, validate_transaction_update
 
 logger = logging.getLogger(__name__)
 
+# Fields the classification pipeline reads, and the columns holding its stored result
+CLASSIFIED_FIELDS = ("merchant_id", "raw_description", "mcc")
+CLASSIFICATION_COLUMNS = ("category", "category_confidence", "category_reasons", "classifier_version", "classified_at")
+
 class PaginatedTransactions(BaseModel):
-    total_count: int
+    # None when count=none; a lower bound when count_is_estimate
+    total_count: Optional[int]
+    count_is_estimate: bool = False
     limit: int
     offset: int
+    # Pass as ?cursor= to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
     items: List[TransactionOut]
 
 def create_transaction_service(payload: TransactionCreate, db: Session) -> TransactionOut:
     logger.info(f"Creating transaction: {payload.id}")
     validate_transaction_create(db, payload)
-    transaction = TransactionORM(**payload.dict())
+    transaction = TransactionORM(**payload.dict(), normalized_description=normalize_description(payload.raw_description))
     db.add(transaction)
     try:
+        apply_rollup_changes(db, added=[rollup_entry(transaction)])
+        index_transactions(db, [transaction.id])
         db.commit()
         logger.info(f"Transaction created: {transaction.id}")
     except SQLAlchemyError:
@@ -36,6 +63,107 @@ def create_transaction_service(payload: TransactionCreate, db: Session) -> Trans
     return transaction
 
 
+def _parse_transaction(raw) -> TransactionCreate:
+    if isinstance(raw, (bytes, str)):
+        return TransactionCreate.model_validate_json(raw)
+    return TransactionCreate.model_validate(raw)
+
+def _existing_ids(db: Session, column, ids: Set[str]) -> Set[str]:
+    if not ids:
+        return set()
+    return set(db.execute(select(column).where(column.in_(list(ids)))).scalars())
+
+def ingest_transactions_service(items: List, start_index: int, db: Session, classify: bool = False) -> BulkIngestResult:
+    """
+    Validates and inserts one chunk of submitted transactions and commits it.
+    Duplicates and missing users/merchants are found with one IN query each, valid rows go in
+    with one executemany INSERT, and rejected rows are reported by their index in the request.
+    With classify=True the rows are classified on the worker pool and stored with their category.
+    """
+    errors: List[BulkIngestError] = []
+    payloads = []
+    seen = set()
+    for offset, raw in enumerate(items):
+        index = start_index + offset
+        try:
+            payload = _parse_transaction(raw)
+        except ValidationError as e:
+            details = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            transaction_id = raw.get("id") if isinstance(raw, dict) else None
+            errors.append(BulkIngestError(index=index, transaction_id=transaction_id,
+                                          error=f"Invalid transaction: {details}"))
+            continue
+        if payload.id in seen:
+            errors.append(BulkIngestError(index=index, transaction_id=payload.id,
+                                          error="transaction_id is repeated in the request"))
+            continue
+        seen.add(payload.id)
+        payloads.append((index, payload))
+
+    existing = _existing_ids(db, TransactionORM.id, seen)
+    users = _existing_ids(db, UserORM.user_id, {payload.user_id for _, payload in payloads})
+    merchants = _existing_ids(db, MerchantORM.merchant_id, {payload.merchant_id for _, payload in payloads})
+    valid = []
+    for index, payload in payloads:
+        if payload.id in existing:
+            error = "transaction_id already exists"
+        elif payload.user_id not in users:
+            error = "user_id does not exist"
+        elif payload.merchant_id not in merchants:
+            error = "merchant_id does not exist"
+        else:
+            valid.append((index, payload))
+            continue
+        errors.append(BulkIngestError(index=index, transaction_id=payload.id, error=error))
+
+    # Normalized once here and stored, so classification (now or later) reuses it
+    rows = [dict(payload.model_dump(), normalized_description=normalize_description(payload.raw_description))
+            for _, payload in valid]
+    classified = 0
+    if classify and rows:
+        version = get_snapshot().version
+        results = classify_bulk([
+            ClassificationRequest(id=payload.id, user_id=payload.user_id, merchant_id=payload.merchant_id,
+                                  amount=payload.amount, currency=payload.currency,
+                                  raw_description=payload.raw_description,
+                                  normalized_description=row["normalized_description"], mcc=payload.mcc)
+            for (_, payload), row in zip(valid, rows)
+        ], None)
+        classified_at = datetime.utcnow()
+        for row, result in zip(rows, results):
+            ok = result.error is None
+            # Same keys on every row keep the INSERT a single executemany
+            row.update(
+                category=result.category if ok else None,
+                category_confidence=result.confidence if ok else None,
+                category_reasons=result.why if ok else None,
+                classifier_version=version if ok else None,
+                classified_at=classified_at if ok else None,
+            )
+            classified += int(ok)
+
+    inserted = len(rows)
+    try:
+        if rows:
+            # Core executemany on the table: one statement for the chunk, no per-row ORM bookkeeping
+            db.execute(insert(TransactionORM.__table__), rows)
+            apply_rollup_changes(db, added=[
+                (row["user_id"], row["posted_at"], row.get("category"), row["amount"]) for row in rows
+            ])
+            index_transactions(db, [row["id"] for row in rows])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.error(f"Database error during bulk ingest: rows={len(rows)}, start_index={start_index}")
+        errors.extend(BulkIngestError(index=index, transaction_id=payload.id, error="Database error during insert")
+                      for index, payload in valid)
+        inserted = classified = 0
+    errors.sort(key=lambda error: error.index)
+    logger.info(f"Bulk ingest chunk: received={len(items)}, inserted={inserted}, failed={len(errors)}")
+    return BulkIngestResult(received=len(items), inserted=inserted, classified=classified,
+                            failed=len(errors), errors=errors)
+
+
 def get_transaction_service(transaction_id: int, db: Session) -> TransactionOut:
     logger.info(f"Fetching transaction: {transaction_id}")
     transaction = db.get(TransactionORM, transaction_id)
@@ -44,13 +172,36 @@ def get_transaction_service(transaction_id: int, db: Session) -> TransactionOut:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return transaction
 
+async def get_transaction_service_async(transaction_id: str, db: AsyncSession) -> TransactionOut:
+    logger.info(f"Fetching transaction (async): {transaction_id}")
+    transaction = await db.get(TransactionORM, transaction_id)
+    if not transaction:
+        logger.warning(f"Transaction not found: {transaction_id}")
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction
+
 def update_transaction_service(transaction_id: int, payload: TransactionUpdate, db: Session) -> TransactionOut:
     logger.info(f"Updating transaction: {transaction_id}")
     transaction = db.get(TransactionORM, transaction_id)
     validate_transaction_update(db, payload, transaction, transaction_id)
-    for field, value in payload.dict(exclude_unset=True).items():
+    changes = payload.dict(exclude_unset=True)
+    before = rollup_entry(transaction)
+    reindex = changes.get("raw_description", transaction.raw_description) != transaction.raw_description
+    # A stored classification no longer describes the transaction once its inputs change
+    if any(changes.get(field, getattr(transaction, field)) != getattr(transaction, field)
+           for field in CLASSIFIED_FIELDS):
+        for field in CLASSIFICATION_COLUMNS:
+            setattr(transaction, field, None)
+    for field, value in changes.items():
         setattr(transaction, field, value)
+    if reindex:
+        transaction.normalized_description = normalize_description(transaction.raw_description)
     try:
+        after = rollup_entry(transaction)
+        if after != before:
+            apply_rollup_changes(db, added=[after], removed=[before])
+        if reindex:
+            index_transactions(db, [transaction_id], replace=True)
         db.commit()
         logger.info(f"Transaction updated: {transaction_id}")
     except SQLAlchemyError:
@@ -67,8 +218,10 @@ def delete_transaction_service(transaction_id: int, db: Session):
     if not transaction:
         logger.warning(f"Transaction not found for delete: {transaction_id}")
         raise HTTPException(status_code=404, detail="Transaction not found")
-    db.delete(transaction)
     try:
+        unindex_transactions(db, [transaction_id])
+        db.delete(transaction)
+        apply_rollup_changes(db, removed=[rollup_entry(transaction)])
         db.commit()
         logger.info(f"Transaction deleted: {transaction_id}")
     except SQLAlchemyError:
@@ -76,6 +229,102 @@ def delete_transaction_service(transaction_id: int, db: Session):
         logger.error(f"Database error during transaction delete: {transaction_id}")
         raise HTTPException(status_code=500, detail="Database error during delete")
 
+def _encode_cursor(sort_by: str, sort_order: str, transaction: TransactionORM) -> str:
+    value = getattr(transaction, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_by, sort_order, value, transaction.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str, sort_by: str, sort_order: str):
+    try:
+        cursor_sort_by, cursor_order, value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort_by in ("posted_at", "created_at"):
+            value = datetime.fromisoformat(value)
+        else:
+            value = float(value)
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid transactions cursor: {cursor}")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (cursor_sort_by, cursor_order) != (sort_by, sort_order):
+        logger.warning(f"Cursor does not match sort: cursor={cursor_sort_by} {cursor_order}, "
+                       f"request={sort_by} {sort_order}")
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort_by/sort_order")
+    return value, last_id
+
+def transaction_filters(user_id: Optional[str] = None, merchant_id: Optional[str] = None,
+                        category: Optional[str] = None, date_from: Optional[datetime] = None,
+                        date_to: Optional[datetime] = None, amount_min: Optional[float] = None,
+                        amount_max: Optional[float] = None) -> list:
+    filters = []
+    if user_id:
+        filters.append(TransactionORM.user_id == user_id)
+    if merchant_id:
+        filters.append(TransactionORM.merchant_id == merchant_id)
+    if category:
+        # Stored classification, served by the (user_id, category, posted_at) / category indexes
+        filters.append(TransactionORM.category == category)
+    if date_from:
+        filters.append(TransactionORM.posted_at >= date_from)
+    if date_to:
+        filters.append(TransactionORM.posted_at <= date_to)
+    if amount_min is not None:
+        filters.append(TransactionORM.amount >= amount_min)
+    if amount_max is not None:
+        filters.append(TransactionORM.amount <= amount_max)
+    return filters
+
+def _list_owners(user_id: Optional[str], merchant_id: Optional[str]):
+    """The (ORM, id, field) rows a listing's user_id/merchant_id filters must exist as."""
+    return [(orm, key, field) for orm, key, field in ((UserORM, user_id, "user_id"), (MerchantORM, merchant_id, "merchant_id"))
+            if key]
+
+def _owner_not_found(field: str, key: str) -> HTTPException:
+    logger.warning(f"{field} does not exist for listing: {key}")
+    return HTTPException(status_code=404, detail=f"{field} does not exist")
+
+def _list_statements(filters: list, limit: int, offset: int, sort_by: str, sort_order: str,
+                     cursor: Optional[str], count: str):
+    """The count statement (None for count=none) and the page statement of a listing."""
+    count_stmt = None
+    if count == "exact":
+        count_stmt = select(func.count(TransactionORM.id)).where(*filters)
+    elif count == "estimate":
+        # Stops counting at the cap instead of scanning every matching row
+        capped = select(TransactionORM.id).where(*filters).limit(config.LIST_COUNT_ESTIMATE_CAP).subquery()
+        count_stmt = select(func.count()).select_from(capped)
+
+    # Keyset pagination on (sort column, id): the id breaks ties so no row is skipped or repeated
+    sort_col = getattr(TransactionORM, sort_by)
+    keyset = tuple_(sort_col, TransactionORM.id)
+    q = select(TransactionORM).where(*filters)
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_by, sort_order)
+        bound = tuple_(literal(value, sort_col.type), literal(last_id))
+        q = q.where(keyset > bound if sort_order == "asc" else keyset < bound)
+    if sort_order == "asc":
+        q = q.order_by(asc(sort_col), asc(TransactionORM.id))
+    else:
+        q = q.order_by(desc(sort_col), desc(TransactionORM.id))
+    # One extra row tells whether there is a next page
+    return count_stmt, q.offset(offset).limit(limit + 1)
+
+def _list_page(items: list, total_count: Optional[int], limit: int, offset: int, sort_by: str, sort_order: str,
+               count: str) -> PaginatedTransactions:
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(sort_by, sort_order, items[-1])
+    logger.info(f"Transactions listed: count={len(items)}")
+    return PaginatedTransactions(
+        total_count=total_count,
+        count_is_estimate=count == "estimate" and total_count >= config.LIST_COUNT_ESTIMATE_CAP,
+        limit=limit,
+        offset=offset,
+        next_cursor=next_cursor,
+        items=items
+    )
+
 def list_transactions_service(
         db: Session,
         user_id: Optional[str] = None,
@@ -88,59 +337,241 @@ def list_transactions_service(
         limit: int = 50,
         offset: int = 0,
         sort_by: str = "posted_at",
-        sort_order: str = "desc"
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        count: str = "exact"
 ) -> PaginatedTransactions:
     logger.info(f"Listing transactions: user_id={user_id}, merchant_id={merchant_id}, category={category}, "
                 f"date_from={date_from}, date_to={date_to}, amount_min={amount_min}, amount_max={amount_max}, "
-                f"limit={limit}, offset={offset}, sort_by={sort_by}, sort_order={sort_order}")
+                f"limit={limit}, offset={offset}, sort_by={sort_by}, sort_order={sort_order}, "
+                f"cursor={cursor is not None}, count={count}")
+    if cursor and offset:
+        logger.warning("Both cursor and offset given for listing")
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    for orm, key, field in _list_owners(user_id, merchant_id):
+        if not db.get(orm, key):
+            raise _owner_not_found(field, key)
+    filters = transaction_filters(user_id, merchant_id, category, date_from, date_to, amount_min, amount_max)
+    count_stmt, page_stmt = _list_statements(filters, limit, offset, sort_by, sort_order, cursor, count)
+    total_count = db.execute(count_stmt).scalar_one() if count_stmt is not None else None
+    items = db.execute(page_stmt).scalars().all()
+    return _list_page(items, total_count, limit, offset, sort_by, sort_order, count)
+
+async def list_transactions_service_async(
+        db: AsyncSession,
+        user_id: Optional[str] = None,
+        merchant_id: Optional[str] = None,
+        category: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        amount_min: Optional[float] = None,
+        amount_max: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+        sort_by: str = "posted_at",
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        count: str = "exact"
+) -> PaginatedTransactions:
+    """list_transactions_service on an AsyncSession (DB_ASYNC=1): the same statements, awaited."""
+    logger.info(f"Listing transactions (async): user_id={user_id}, merchant_id={merchant_id}, category={category}, "
+                f"limit={limit}, offset={offset}, sort_by={sort_by}, sort_order={sort_order}, "
+                f"cursor={cursor is not None}, count={count}")
+    if cursor and offset:
+        logger.warning("Both cursor and offset given for listing")
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    for orm, key, field in _list_owners(user_id, merchant_id):
+        if not await db.get(orm, key):
+            raise _owner_not_found(field, key)
+    filters = transaction_filters(user_id, merchant_id, category, date_from, date_to, amount_min, amount_max)
+    count_stmt, page_stmt = _list_statements(filters, limit, offset, sort_by, sort_order, cursor, count)
+    total_count = (await db.execute(count_stmt)).scalar_one() if count_stmt is not None else None
+    items = (await db.execute(page_stmt)).scalars().all()
+    return _list_page(items, total_count, limit, offset, sort_by, sort_order, count)
+
+def search_transactions_service(
+        db: Session,
+        q: str,
+        user_id: Optional[str] = None,
+        merchant_id: Optional[str] = None,
+        category: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        amount_min: Optional[float] = None,
+        amount_max: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+) -> TransactionSearchResult:
+    logger.info(f"Searching transactions: q={q!r}, user_id={user_id}, merchant_id={merchant_id}, category={category}, "
+                f"date_from={date_from}, date_to={date_to}, amount_min={amount_min}, amount_max={amount_max}, "
+                f"limit={limit}, offset={offset}")
+    expression = match_expression(q)
+    if not expression:
+        raise HTTPException(status_code=422, detail="q has no searchable words")
     if user_id and not db.get(UserORM, user_id):
-        logger.warning(f"user_id does not exist for listing: {user_id}")
+        logger.warning(f"user_id does not exist for search: {user_id}")
         raise HTTPException(status_code=404, detail="user_id does not exist")
     if merchant_id and not db.get(MerchantORM, merchant_id):
-        logger.warning(f"merchant_id does not exist for listing: {merchant_id}")
+        logger.warning(f"merchant_id does not exist for search: {merchant_id}")
         raise HTTPException(status_code=404, detail="merchant_id does not exist")
-    q = select(TransactionORM)
-    count_q = select(func.count(TransactionORM.id))
-    if user_id:
-        q = q.where(TransactionORM.user_id == user_id)
-        count_q = count_q.where(TransactionORM.user_id == user_id)
-    if merchant_id:
-        q = q.where(TransactionORM.merchant_id == merchant_id)
-        count_q = count_q.where(TransactionORM.merchant_id == merchant_id)
-    if date_from:
-        q = q.where(TransactionORM.posted_at >= date_from)
-        count_q = count_q.where(TransactionORM.posted_at >= date_from)
-    if date_to:
-        q = q.where(TransactionORM.posted_at <= date_to)
-        count_q = count_q.where(TransactionORM.posted_at <= date_to)
-    if amount_min is not None:
-        q = q.where(TransactionORM.amount >= amount_min)
-        count_q = count_q.where(TransactionORM.amount >= amount_min)
-    if amount_max is not None:
-        q = q.where(TransactionORM.amount <= amount_max)
-        count_q = count_q.where(TransactionORM.amount <= amount_max)
-    sort_col = getattr(TransactionORM, sort_by)
-    q = q.order_by(asc(sort_col) if sort_order == "asc" else desc(sort_col))
-    total_count = db.execute(count_q).scalar_one()
-    q = q.offset(offset).limit(limit)
-    items = db.execute(q).scalars().all()
-    logger.info(f"Transactions listed: count={len(items)}")
-    return PaginatedTransactions(
-        total_count=total_count,
-        limit=limit,
-        offset=offset,
-        items=items
+    if not search_available(db):
+        raise HTTPException(status_code=503, detail="Transaction search index is not available")
+
+    # bm25 is lower for better matches; ties go to the most recent transaction
+    rank = func.bm25(literal_column(SEARCH_FTS_TABLE), *BM25_WEIGHTS).label("rank")
+    q = (
+        select(TransactionORM, rank)
+        .select_from(transaction_fts)
+        .join(TransactionORM, transaction_rowid == transaction_fts.c.rowid)
+        .where(literal_column(SEARCH_FTS_TABLE).op("MATCH")(expression))
+        .where(*transaction_filters(user_id, merchant_id, category, date_from, date_to, amount_min, amount_max))
+        .order_by(rank, TransactionORM.posted_at.desc(), TransactionORM.id)
+        .offset(offset)
+        .limit(limit)
     )
+    items = [
+        TransactionSearchHit.model_validate(transaction).model_copy(update={"score": round(-score, 4)})
+        for transaction, score in db.execute(q).all()
+    ]
+    logger.info(f"Transactions found: count={len(items)}")
+    return TransactionSearchResult(query=expression, limit=limit, offset=offset, items=items)
 
-def delete_transaction_cascade(db, merchant, transactions):
-    logger.info(f"Deleting entity and cascading transactions: transaction_count={len(transactions)}")
-    for transaction in transactions:
-        db.delete(transaction)
-    db.delete(merchant)
+# --- Set-based mutations ---
+# Rows are handled in keyset-ordered chunks of MUTATION_CHUNK_SIZE, each its own DB transaction,
+# so a large delete/update never holds SQLite's write lock (or the session) for the whole set.
+# A failure leaves the committed chunks in place; repeating the request finishes the rest.
+def _mutate_in_chunks(db: Session, conditions: list, mutate, action: str, chunk_size: int = None):
+    chunk_size = chunk_size or config.MUTATION_CHUNK_SIZE
+    affected = chunks = 0
+    last_id = None
+    while True:
+        q = select(TransactionORM.id, TransactionORM.user_id, TransactionORM.posted_at,
+                   TransactionORM.category, TransactionORM.amount).where(*conditions)
+        if last_id is not None:
+            q = q.where(TransactionORM.id > last_id)
+        rows = db.execute(q.order_by(TransactionORM.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        try:
+            affected += mutate([row.id for row in rows], [tuple(row)[1:] for row in rows])
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.error(f"Database error during {action} after {affected} rows")
+            raise HTTPException(status_code=500, detail=f"Database error during {action} after {affected} rows")
+        chunks += 1
+        last_id = rows[-1].id
+        if len(rows) < chunk_size:
+            break
+    return affected, chunks
+
+def delete_transactions_where(db: Session, conditions: list, chunk_size: int = None):
+    """Deletes the matching transactions with chunked DELETE ... WHERE id IN (...); returns (deleted, chunks)."""
+    def delete_chunk(ids, entries):
+        unindex_transactions(db, ids)
+        deleted = db.execute(delete(TransactionORM).where(TransactionORM.id.in_(ids))
+                             .execution_options(synchronize_session=False)).rowcount
+        apply_rollup_changes(db, removed=entries)
+        return deleted
+    return _mutate_in_chunks(db, conditions, delete_chunk, "bulk delete", chunk_size)
+
+def update_transactions_where(db: Session, conditions: list, changes: dict, chunk_size: int = None):
+    """Applies `changes` to the matching transactions with chunked UPDATEs; returns (updated, chunks)."""
+    values = dict(changes)
+    reclassify = any(field in values for field in CLASSIFIED_FIELDS)
+    if reclassify:
+        # Same rule as a single update: the stored classification no longer describes the transaction
+        values.update({field: None for field in CLASSIFICATION_COLUMNS})
+
+    def update_chunk(ids, entries):
+        updated = db.execute(update(TransactionORM).where(TransactionORM.id.in_(ids)).values(**values)
+                             .execution_options(synchronize_session=False)).rowcount
+        if reclassify:
+            apply_rollup_changes(db, added=[(user_id, posted_at, None, amount)
+                                            for user_id, posted_at, _, amount in entries],
+                                 removed=entries)
+        return updated
+    return _mutate_in_chunks(db, conditions, update_chunk, "bulk update", chunk_size)
+
+def _bulk_conditions(payload: TransactionBulkDelete, db: Session) -> list:
+    transaction_filter = payload.filter.model_dump(exclude_none=True) if payload.filter else {}
+    if not payload.ids and not transaction_filter:
+        logger.warning("Bulk mutation without ids or filter")
+        raise HTTPException(status_code=422, detail="Provide ids or a non-empty filter")
+    if transaction_filter.get("user_id") and not db.get(UserORM, transaction_filter["user_id"]):
+        raise HTTPException(status_code=404, detail="user_id does not exist")
+    if transaction_filter.get("merchant_id") and not db.get(MerchantORM, transaction_filter["merchant_id"]):
+        raise HTTPException(status_code=404, detail="merchant_id does not exist")
+    conditions = transaction_filters(**transaction_filter)
+    if payload.ids:
+        conditions.append(TransactionORM.id.in_(set(payload.ids)))
+    return conditions
+
+def bulk_delete_transactions_service(payload: TransactionBulkDelete, db: Session) -> BulkMutationResult:
+    conditions = _bulk_conditions(payload, db)
+    logger.info(f"Bulk deleting transactions: ids={len(payload.ids or [])}, filter={payload.filter}")
+    deleted, chunks = delete_transactions_where(db, conditions)
+    logger.info(f"Bulk delete finished: deleted={deleted}, chunks={chunks}")
+    return BulkMutationResult(affected=deleted, chunks=chunks)
+
+def bulk_update_transactions_service(payload: TransactionBulkUpdate, db: Session) -> BulkMutationResult:
+    conditions = _bulk_conditions(payload, db)
+    changes = payload.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=422, detail="changes is empty")
+    if "merchant_id" in changes and not (changes["merchant_id"] and db.get(MerchantORM, changes["merchant_id"])):
+        logger.warning(f"Bulk update to unknown merchant_id: {changes['merchant_id']}")
+        raise HTTPException(status_code=404, detail="merchant_id does not exist")
+    logger.info(f"Bulk updating transactions: ids={len(payload.ids or [])}, filter={payload.filter}, changes={changes}")
+    updated, chunks = update_transactions_where(db, conditions, changes)
+    logger.info(f"Bulk update finished: updated={updated}, chunks={chunks}")
+    return BulkMutationResult(affected=updated, chunks=chunks)
+
+def delete_transaction_cascade(db: Session, entity, conditions: list) -> int:
+    """Deletes the entity's transactions chunk by chunk, then the entity itself; returns the transactions deleted."""
+    deleted, chunks = delete_transactions_where(db, conditions)
+    logger.info(f"Cascade deleted transactions: transaction_count={deleted}, chunks={chunks}")
+    db.delete(entity)
     try:
         db.commit()
         logger.info(f"Entity and related transactions deleted")
     except SQLAlchemyError:
         db.rollback()
-        logger.error(f"Database error during merchant cascade delete")
-        raise HTTPException(status_code=500, detail="Database error")
\ No newline at end of file
+        logger.error(f"Database error during cascade delete")
+        raise HTTPException(status_code=500, detail="Database error")
+    return deleted
+
+# --- Normalized descriptions ---
+def renormalize_transactions(db: Session, only_missing: bool = False, chunk_size: int = None) -> int:
+    """
+    Recomputes normalized_description from raw_description in keyset-ordered chunks (one
+    commit each), writing only the rows whose value changes and re-indexing them for search.
+    Returns the number of rows changed.
+    """
+    chunk_size = chunk_size or config.MUTATION_CHUNK_SIZE
+    changed = 0
+    last_id = None
+    while True:
+        q = select(TransactionORM.id, TransactionORM.raw_description, TransactionORM.normalized_description)
+        if only_missing:
+            q = q.where(TransactionORM.normalized_description.is_(None))
+        if last_id is not None:
+            q = q.where(TransactionORM.id > last_id)
+        rows = db.execute(q.order_by(TransactionORM.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        updates = [
+            {"id": row.id, "normalized_description": normalized}
+            for row in rows
+            if (normalized := normalize_description(row.raw_description)) != row.normalized_description
+        ]
+        if updates:
+            db.execute(update(TransactionORM), updates)
+            index_transactions(db, [row["id"] for row in updates], replace=True)
+            db.commit()
+            changed += len(updates)
+        last_id = rows[-1].id
+        logger.info(f"Normalized descriptions: scanned up to {last_id}, changed={changed}")
+        if len(rows) < chunk_size:
+            break
+    return changed
@@ -6,8 +6,9 @@ from sqlalchemy import select, func
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.models import UserORM, TransactionORM
+from app.models import ClassificationOverrideORM, UserORM, TransactionORM
 from app.schemas.user_schema import UserCreate, UserUpdate
+from app.services.override_service import remove_overrides_where
 from app.services.transaction_service import delete_transaction_cascade
 
 from app.validators.user_validator import validate_user_id, validate_limit_offset, validate_sort, validate_user_create, \
@@ -85,9 +86,9 @@ def delete_user_service(user_id: str, db: Session):
     if not user:
         logger.warning(f"User not found for delete: {user_id}")
         return
-    transactions = db.query(TransactionORM).filter(TransactionORM.user_id == user_id).all()
-    delete_transaction_cascade(db, user, transactions)
-    logger.info(f"User deleted: {user_id}")
+    remove_overrides_where(db, [ClassificationOverrideORM.user_id == user_id])
+    deleted = delete_transaction_cascade(db, user, [TransactionORM.user_id == user_id])
+    logger.info(f"User deleted: {user_id}, transactions deleted: {deleted}")
     return
 
 def list_users_service(
@@ -49,7 +49,9 @@ MCC_CATEGORY_MAP = {
     "8062": "Healthcare > Medical Services",
 }
 
-# Regex-based rules
+# Regex-based rules: (keyword, category, reason[, boundary])
+# Keywords match as substrings of the normalized description unless a boundary mode
+# from app.classifier.matcher is given ("word", "start" or "end").
 REGEX_RULES = [
     # Transport
     ("uber", "Transport > Rideshare", "Regex rule: 'uber'"),
@@ -63,7 +65,7 @@ REGEX_RULES = [
     # Shopping
     ("bestbuy", "Shopping > Electronics", "Regex rule: 'bestbuy'"),
     ("apple store", "Shopping > Electronics", "Regex rule: 'apple store'"),
-    ("gap", "Shopping > Apparel", "Regex rule: 'gap'"),
+    ("gap", "Shopping > Apparel", "Regex rule: 'gap'", "word"),
     ("ikea", "Shopping > Home & Furniture", "Regex rule: 'ikea'"),
     ("walmart", "Shopping > General Retail", "Regex rule: 'walmart'"),
     ("target", "Shopping > General Retail", "Regex rule: 'target'"),
@@ -83,7 +85,7 @@ REGEX_RULES = [
 
     # Bills & Utilities
     ("verizon", "Bills & Utilities > Internet/Mobile", "Regex rule: 'verizon'"),
-    ("att", "Bills & Utilities > Internet/Mobile", "Regex rule: 'att'"),
+    ("att", "Bills & Utilities > Internet/Mobile", "Regex rule: 'att'", "word"),
     ("comcast", "Bills & Utilities > Internet/Mobile", "Regex rule: 'comcast'"),
     ("coned", "Bills & Utilities > Electricity", "Regex rule: 'coned'"),
     ("pg&e", "Bills & Utilities > Electricity", "Regex rule: 'pg&e'"),
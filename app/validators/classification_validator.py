@@ -1,10 +1,15 @@
 import logging
 from fastapi import HTTPException
 
+from app.logging_config import TransactionLogger
+
 logger = logging.getLogger("ClassificationValidator")
+txn_log = TransactionLogger(logger)
 
 def validate_transaction(payload, db, transaction_id, transaction_orm):
-    logger.info(f"Validating transaction {transaction_id}")
+    log_txn = txn_log.sample()
+    if log_txn:
+        txn_log.log(logging.INFO, "Validating transaction %s", transaction_id, transaction_id=transaction_id)
     errors = []
     try:
         txn = db.get(transaction_orm, transaction_id)
@@ -18,7 +23,9 @@ def validate_transaction(payload, db, transaction_id, transaction_orm):
                 if value not in [None, ""] and value != getattr(txn, field, None)
             ]
             if mismatches:
-                logger.info(f"Attribute mismatches for transaction {transaction_id}: {mismatches}")
+                if log_txn:
+                    txn_log.log(logging.INFO, "Attribute mismatches for transaction %s: %s",
+                                transaction_id, mismatches, transaction_id=transaction_id)
                 errors.extend([f"Attribute mismatch for {m}" for m in mismatches])
         if errors:
             logger.error(f"Validation failed for transaction {transaction_id}: {'; '.join(errors)}")
@@ -26,7 +33,9 @@ def validate_transaction(payload, db, transaction_id, transaction_orm):
                 status_code=400,
                 detail="; ".join(errors)
             )
-        logger.info(f"Validation passed for transaction {transaction_id}")
+        if log_txn:
+            txn_log.log(logging.INFO, "Validation passed for transaction %s", transaction_id,
+                        transaction_id=transaction_id)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise
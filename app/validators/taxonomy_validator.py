@@ -0,0 +1,35 @@
+import re
+import logging
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from app.classifier.normalize import normalize_description
+
+logger = logging.getLogger(__name__)
+
+MCC_PATTERN = r"^[0-9]{3,4}$"
+
+def validate_mcc(mcc: str):
+    if not mcc or not re.match(MCC_PATTERN, mcc):
+        logger.error(f"Invalid MCC: {mcc}")
+        raise HTTPException(status_code=422, detail=f"Invalid MCC: {mcc}")
+
+def validate_mcc_categories(mcc_categories: Dict[str, str]):
+    for mcc, category in mcc_categories.items():
+        validate_mcc(mcc)
+        validate_category(category)
+
+def validate_category(category: Optional[str]):
+    if category is not None and not category.strip():
+        raise HTTPException(status_code=422, detail="category must not be blank")
+
+def validate_keyword(keyword: Optional[str]):
+    # Keywords are matched against normalized descriptions, so a keyword that normalizes to nothing never matches
+    if keyword is None:
+        return
+    if not keyword.strip():
+        raise HTTPException(status_code=422, detail="keyword must not be blank")
+    if not normalize_description(keyword):
+        logger.error(f"Keyword is empty after normalization: {keyword}")
+        raise HTTPException(status_code=422, detail=f"keyword is empty after normalization: {keyword}")
@@ -0,0 +1,156 @@
+"""
+Concurrency benchmark: the sync routes (thread pool) against the async stack (DB_ASYNC=1).
+
+    python -m benchmarks.bench_concurrency [--rows 50000] [--concurrency 10,50,100,200] [--requests 2000] [--output results.json]
+
+Seeds a throwaway SQLite database, then starts the app with uvicorn once per stack
+and sends the same request mix at each concurrency level from an httpx.AsyncClient:
+- a slow read: GET /transactions with an exact count over one user's rows
+- a fast read: GET /transactions/{id}
+- a CPU-bound batch: POST /classify/bulk with 100 transactions
+Reports requests/s, p50/p95/p99 latency in ms and failed requests per stack and level.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.report import latency_summary, write_results
+from benchmarks.synthetic import generate_merchants, generate_transactions
+
+REQUEST_FIELDS = ("id", "user_id", "merchant_id", "amount", "currency", "raw_description", "mcc")
+
+
+def _seed(rows: int, merchant_count: int, seed: int):
+    # Imported late: the app must pick up the benchmark's DATABASE_URL
+    import app.models  # noqa: F401  (registers the tables)
+    from app.db.db import SessionLocal, engine
+    from app.db.migrations import ensure_schema
+    from benchmarks.synthetic import seed_database
+
+    merchants = generate_merchants(merchant_count, seed)
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        seed_database(db, merchants, generate_transactions(rows, merchants, seed))
+    finally:
+        db.close()
+    engine.dispose()
+    txns = list(generate_transactions(rows, merchants, seed))
+    bodies = [{field: txn[field] for field in REQUEST_FIELDS if txn[field] is not None} for txn in txns]
+    return txns, bodies
+
+
+def _start_server(port: int, db_async: bool, env: Dict) -> subprocess.Popen:
+    env = dict(env, DB_ASYNC="1" if db_async else "0", LOG_LEVEL="ERROR", CLASSIFY_JOB_WORKERS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    import httpx
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+async def _run_level(base_url: str, concurrency: int, total: int, txns: List[Dict], bodies: List[Dict],
+                     mix: List[str], rng: random.Random) -> Dict:
+    import httpx
+
+    plan = [rng.choice(mix) for _ in range(total)]
+    latencies: List[float] = []
+    failures = 0
+    next_index = 0
+
+    async def worker(client):
+        nonlocal next_index, failures
+        while next_index < len(plan):
+            kind = plan[next_index]
+            next_index += 1
+            txn = rng.choice(txns)
+            start = time.perf_counter()
+            try:
+                if kind == "slow_read":
+                    response = await client.get("/transactions/", params={
+                        "user_id": txn["user_id"], "count": "exact", "limit": 50})
+                elif kind == "fast_read":
+                    response = await client.get(f"/transactions/{txn['id']}")
+                else:
+                    offset = rng.randrange(0, max(1, len(bodies) - 100))
+                    response = await client.post("/classify/bulk", json=bodies[offset:offset + 100])
+                if response.status_code >= 400:
+                    failures += 1
+            except httpx.HTTPError:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    summary = dict(concurrency=concurrency, failed=failures, **latency_summary(latencies, "ms"))
+    summary["requests_per_second"] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+def run(rows: int, merchant_count: int, seed: int, levels: List[int], total: int, mix: List[str], port: int) -> List[Dict]:
+    txns, bodies = _seed(rows, merchant_count, seed)
+    results = []
+    for stack, db_async in (("sync", False), ("async", True)):
+        server = _start_server(port, db_async, dict(os.environ))
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            # Warm-up: pool workers, connections and caches outside the measurements
+            asyncio.run(_run_level(base_url, 8, 200, txns, bodies, mix, random.Random(seed)))
+            for concurrency in levels:
+                summary = asyncio.run(_run_level(base_url, concurrency, total, txns, bodies, mix, random.Random(seed)))
+                summary["stack"] = stack
+                results.append(summary)
+                print(f"{stack:<6} concurrency={concurrency:>4}  {summary['requests_per_second']:>8.1f} req/s  "
+                      f"p50={summary['p50_ms']:>8.1f}ms  p95={summary['p95_ms']:>8.1f}ms  "
+                      f"p99={summary['p99_ms']:>8.1f}ms  failed={summary['failed']}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--concurrency", default="10,50,100,200", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--mix", default="slow_read,slow_read,fast_read,fast_read,bulk",
+                        help="Request kinds drawn uniformly: slow_read, fast_read, bulk")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    mix = args.mix.split(",")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        results = run(args.rows, args.merchants, args.seed, levels, args.requests, mix, args.port)
+    if args.output:
+        write_results(args.output, "concurrency", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
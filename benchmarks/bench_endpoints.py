@@ -0,0 +1,119 @@
+"""
+In-process end-to-end benchmarks for /classify, /classify/bulk and /classify/bulk/stream.
+
+    python -m benchmarks.bench_endpoints [--rows 10000] [--batch-size 500] [--stream-size 5000] [--output results.json]
+
+The app runs against a throwaway SQLite database (DATABASE_URL) seeded with synthetic
+users, merchants and transactions, and is driven through FastAPI's TestClient, so the
+numbers include routing, validation, serialization, the worker pool and result storage,
+but no network. Reports per-request p50/p95/p99 latency in ms and transactions/s.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from itertools import islice
+from typing import Dict, List
+
+from benchmarks.report import latency_summary, write_results
+from benchmarks.synthetic import generate_merchants, generate_transactions
+
+# Also runs in the spawned pool workers (they re-import this module), keeping their logging quiet
+logging.disable(logging.WARNING)
+
+REQUEST_FIELDS = ("id", "user_id", "merchant_id", "amount", "currency", "raw_description", "mcc")
+
+
+def _request_body(txn: Dict) -> Dict:
+    return {field: txn[field] for field in REQUEST_FIELDS if txn[field] is not None}
+
+
+def _summary(endpoint: str, latencies: List[float], transactions: int, elapsed: float) -> Dict:
+    summary = dict(endpoint=endpoint, requests=len(latencies), transactions=transactions, **latency_summary(latencies, "ms"))
+    summary["txn_per_second"] = round(transactions / elapsed, 1) if elapsed else 0.0
+    print(f"{endpoint:<24} requests={len(latencies):>6}  p50={summary['p50_ms']:>9.2f}ms  "
+          f"p95={summary['p95_ms']:>9.2f}ms  p99={summary['p99_ms']:>9.2f}ms  {summary['txn_per_second']:>10.1f} txn/s")
+    return summary
+
+
+def run(rows: int, merchant_count: int, seed: int, batch_size: int, stream_size: int, single_count: int) -> List[Dict]:
+    # Imported late: the app must pick up the benchmark's DATABASE_URL
+    from fastapi.testclient import TestClient
+    from app.db.db import SessionLocal, engine
+    from app.db.migrations import ensure_schema
+    from benchmarks.synthetic import seed_database
+    from main import app
+
+    merchants = generate_merchants(merchant_count, seed)
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        seed_database(db, merchants, generate_transactions(rows, merchants, seed))
+    finally:
+        db.close()
+    # Requests carry the stored merchant id, as /classify rejects mismatches with the DB
+    bodies = [
+        _request_body(dict(txn, merchant_id=txn["merchant_id"] or merchants[0]["merchant_id"]))
+        for txn in generate_transactions(rows, merchants, seed)
+    ]
+
+    results = []
+    with TestClient(app) as client:
+        # Start the pool workers and import their modules outside the measurements
+        client.post("/classify/bulk", json=[{"id": f"warmup_{i}", "raw_description": f"warmup {i}"}
+                                            for i in range(64)]).raise_for_status()
+
+        latencies = []
+        start = time.perf_counter()
+        for body in islice(bodies, single_count):
+            call_start = time.perf_counter()
+            response = client.post("/classify/", json=body)
+            latencies.append(time.perf_counter() - call_start)
+            response.raise_for_status()
+        results.append(_summary("/classify", latencies, len(latencies), time.perf_counter() - start))
+
+        latencies = []
+        start = time.perf_counter()
+        for i in range(0, len(bodies), batch_size):
+            call_start = time.perf_counter()
+            response = client.post("/classify/bulk", json=bodies[i:i + batch_size])
+            latencies.append(time.perf_counter() - call_start)
+            response.raise_for_status()
+        results.append(_summary(f"/classify/bulk[{batch_size}]", latencies, len(bodies), time.perf_counter() - start))
+
+        latencies = []
+        start = time.perf_counter()
+        for i in range(0, len(bodies), stream_size):
+            payload = "".join(json.dumps(body) + "\n" for body in bodies[i:i + stream_size])
+            call_start = time.perf_counter()
+            response = client.post("/classify/bulk/stream", content=payload,
+                                   headers={"content-type": "application/x-ndjson"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - call_start)
+        results.append(_summary(f"/classify/bulk/stream[{stream_size}]", latencies, len(bodies),
+                                time.perf_counter() - start))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=500, help="Transactions per /classify/bulk request (max 1000)")
+    parser.add_argument("--stream-size", type=int, default=5000, help="Lines per /classify/bulk/stream request")
+    parser.add_argument("--single-count", type=int, default=2000, help="Requests sent to /classify")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        results = run(args.rows, args.merchants, args.seed, args.batch_size, args.stream_size, args.single_count)
+    if args.output:
+        write_results(args.output, "endpoints", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Regex stage benchmark: naive per-rule substring scan vs. the compiled KeywordMatcher.
+
+    python -m benchmarks.bench_matcher [--rules 50 500 5000 50000] [--output results.json]
+
+The matcher cost should stay roughly flat as the rule count grows, while the naive
+scan grows linearly with it.
+"""
+import argparse
+import random
+import string
+import time
+
+from app.classifier.matcher import KeywordMatcher
+from app.taxonomy import REGEX_RULES
+from benchmarks.report import write_results
+
+DESCRIPTIONS = [
+    "uber trip 987654 san francisco",
+    "starbucks store #123 seattle",
+    "amzn mktp us purchase ref 44120",
+    "netflix.com monthly subscription",
+    "pos debit walmart supercenter 0042",
+    "zelle transfer to j smith",
+    "atm withdrawal - nyc 5th ave",
+    "gap outlet singapore changi",
+    "monthly fee charge",
+    "delta air lines 0062 atlanta",
+]
+
+
+def synthetic_keywords(count: int, seed: int):
+    rng = random.Random(seed)
+    keywords = [rule[0] for rule in REGEX_RULES]
+    while len(keywords) < count:
+        length = rng.randint(5, 12)
+        keywords.append("".join(rng.choice(string.ascii_lowercase) for _ in range(length)))
+    return keywords[:count]
+
+
+def _time_per_call(fn, descriptions, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for desc in descriptions:
+            fn(desc)
+    return (time.perf_counter() - start) / (repeat * len(descriptions))
+
+
+def run(rule_counts, repeat: int, seed: int):
+    results = []
+    for count in rule_counts:
+        keywords = synthetic_keywords(count, seed)
+        start = time.perf_counter()
+        matcher = KeywordMatcher((kw, None) for kw in keywords)
+        build_s = time.perf_counter() - start
+
+        def naive(desc):
+            return [i for i, kw in enumerate(keywords) if kw in desc]
+
+        # Keep the naive side affordable on large rule sets
+        naive_repeat = max(1, repeat * 50 // count)
+        naive_us = _time_per_call(naive, DESCRIPTIONS, naive_repeat) * 1e6
+        matcher_us = _time_per_call(matcher.find, DESCRIPTIONS, repeat) * 1e6
+        assert all(naive(d) == matcher.find(d) for d in DESCRIPTIONS)
+        results.append({
+            "rules": count,
+            "build_seconds": round(build_s, 4),
+            "naive_us_per_txn": round(naive_us, 2),
+            "matcher_us_per_txn": round(matcher_us, 2),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[50, 500, 5000, 50000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.rules, args.repeat, args.seed)
+    for row in results:
+        print(f"rules={row['rules']:>6}  naive={row['naive_us_per_txn']:>10.2f} us/txn  "
+              f"matcher={row['matcher_us_per_txn']:>7.2f} us/txn  build={row['build_seconds']:.3f}s")
+    if args.output:
+        write_results(args.output, "regex_stage", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
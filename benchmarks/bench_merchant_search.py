@@ -0,0 +1,119 @@
+"""
+Merchant search benchmark: the old JSON-column filters against the alias/MCC indexes behind GET /merchants.
+
+    python -m benchmarks.bench_merchant_search [--merchants 1000000] [--queries 200] [--output results.json]
+
+Seeds a throwaway SQLite database with synthetic merchants and builds the merchant_aliases /
+merchant_mccs tables and the alias trigram index, then times list_merchants_service for
+substring, prefix and exact alias queries and MCC membership, next to the previous
+`aliases ILIKE '%x%'` scan. Reports p50/p95/p99 latency in ms per query kind.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List
+
+from benchmarks.report import latency_summary, write_results
+from benchmarks.synthetic import generate_merchants
+
+
+def _seed(count: int, seed: int, chunk_size: int = 50000):
+    # Imported late: the app must pick up the benchmark's DATABASE_URL
+    from sqlalchemy import insert
+    from app.db.db import SessionLocal, engine
+    from app.db.migrations import ensure_schema
+    from app.models import MerchantORM
+    from app.services.merchant_index_service import ensure_merchant_index, index_merchants
+
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        ensure_merchant_index(db)
+        merchants = iter(generate_merchants(count, seed))
+        while True:
+            chunk = list(islice(merchants, chunk_size))
+            if not chunk:
+                break
+            db.execute(insert(MerchantORM), [dict(merchant, created_at=datetime(2025, 1, 1)) for merchant in chunk])
+            index_merchants(db, chunk, replace=False)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _terms(count: int, seed: int, queries: int) -> Dict[str, List[str]]:
+    rng = random.Random(seed + 1)
+    merchants = generate_merchants(count, seed)
+    sample = [rng.choice(merchants) for _ in range(queries)]
+    aliases = [rng.choice(merchant["aliases"]) for merchant in sample]
+    return {
+        "contains": [alias[1:-1] if len(alias) > 5 else alias for alias in aliases],
+        "prefix": [alias[:4] for alias in aliases],
+        "exact": aliases,
+        # Matches nothing: the legacy filter has to scan every merchant
+        "miss": ["zzqx"] * queries,
+        "mcc": [rng.choice(merchant["typical_mccs"]) for merchant in sample],
+    }
+
+
+def run(count: int, seed: int, queries: int, legacy_queries: int) -> List[Dict]:
+    _seed(count, seed)
+    from sqlalchemy import select
+    from app.db.db import SessionLocal
+    from app.models import MerchantORM
+    from app.services.merchant_service import list_merchants_service
+
+    terms = _terms(count, seed, queries)
+    db = SessionLocal()
+    results = []
+    try:
+        def timed(kind, fn, values):
+            samples = []
+            for value in values:
+                start = time.perf_counter()
+                fn(value)
+                samples.append(time.perf_counter() - start)
+            results.append(dict(kind=kind, merchants=count, **latency_summary(samples, "ms")))
+
+        # Previous implementation: a text cast and scan of the JSON column per query
+        timed("legacy_contains", lambda term: db.execute(
+            select(MerchantORM).where(MerchantORM.aliases.ilike(f"%{term}%")).limit(50)).scalars().all(),
+            terms["contains"][:legacy_queries])
+        timed("legacy_miss", lambda term: db.execute(
+            select(MerchantORM).where(MerchantORM.aliases.ilike(f"%{term}%")).limit(50)).scalars().all(),
+            terms["miss"][:legacy_queries])
+        for kind, match in (("contains", "contains"), ("prefix", "prefix"), ("exact", "exact"), ("miss", "contains")):
+            timed(kind, lambda term: list_merchants_service(db, aliases=term, alias_match=match), terms[kind])
+        timed("mcc", lambda mcc: list_merchants_service(db, mccs=mcc), terms["mcc"])
+    finally:
+        db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--merchants", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200, help="Queries per kind")
+    parser.add_argument("--legacy-queries", type=int, default=10, help="Queries for the (slow) legacy scan")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        results = run(args.merchants, args.seed, args.queries, args.legacy_queries)
+    for row in results:
+        print(f"{row['kind']:<16} merchants={row['merchants']}  p50={row['p50_ms']:>8.2f}ms  "
+              f"p95={row['p95_ms']:>8.2f}ms  p99={row['p99_ms']:>8.2f}ms")
+    if args.output:
+        write_results(args.output, "merchant_search", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
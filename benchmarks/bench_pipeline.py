@@ -0,0 +1,99 @@
+"""
+Microbenchmarks for the classification pipeline stages, on synthetic data and without a database.
+
+    python -m benchmarks.bench_pipeline [--rows 10000] [--merchants 500] [--output results.json]
+
+Measures normalize_description, semantic_similarity, the regex stage (compiled keyword
+matcher), pipeline_classify_service with and without the result cache, and
+classify_batch_service. Reports per-call mean/p50/p95/p99 in microseconds and calls/s.
+Logging is limited to errors so console output does not dominate the timings.
+"""
+import argparse
+import logging
+import time
+from typing import Callable, Dict, List
+
+from app.classifier.cache import classification_cache
+from app.classifier.snapshot import install_snapshot, snapshot_from_merchants
+from app.schemas.classification_schema import ClassificationRequest
+from app.services.classification_service import (
+    classify_batch_service,
+    normalize_description,
+    pipeline_classify_service,
+    semantic_similarity,
+)
+from benchmarks.report import latency_summary, write_results
+from benchmarks.synthetic import generate_merchants, generate_transactions, merchant_rows
+
+_clock = time.perf_counter
+
+
+def _time_each(fn: Callable, items: List) -> Dict:
+    samples = []
+    start = _clock()
+    for item in items:
+        call_start = _clock()
+        fn(item)
+        samples.append(_clock() - call_start)
+    elapsed = _clock() - start
+    summary = latency_summary(samples)
+    summary["calls_per_second"] = round(len(items) / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+def run(rows: int, merchant_count: int, seed: int, batch_size: int) -> List[Dict]:
+    merchants = generate_merchants(merchant_count, seed)
+    snapshot = snapshot_from_merchants(merchant_rows(merchants), version=1)
+    install_snapshot(snapshot)
+    payloads = [ClassificationRequest(**txn) for txn in generate_transactions(rows, merchants, seed)]
+    normalized = [normalize_description(p.raw_description) for p in payloads]
+    semantic_inputs = [
+        (desc, snapshot.merchants[p.merchant_id])
+        for desc, p in zip(normalized, payloads) if p.merchant_id in snapshot.merchants
+    ]
+
+    results = []
+
+    def record(stage: str, summary: Dict):
+        results.append(dict(stage=stage, **summary))
+        print(f"{stage:<24} p50={summary['p50_us']:>9.2f}us  p95={summary['p95_us']:>9.2f}us  "
+              f"p99={summary['p99_us']:>9.2f}us  {summary['calls_per_second']:>12.1f}/s")
+
+    record("normalize_description", _time_each(normalize_description, [p.raw_description for p in payloads]))
+    record("semantic_similarity", _time_each(
+        lambda item: semantic_similarity(item[0], item[1].names, candidates_lower=item[1].names_lower),
+        semantic_inputs,
+    ))
+    record("regex_stage", _time_each(snapshot.rule_matcher.find, normalized))
+
+    classification_cache.clear()
+    record("pipeline_uncached", _time_each(
+        lambda p: pipeline_classify_service(p, None, check_cache=False), payloads))
+    # Second pass over the same payloads: repeated descriptors are served from the cache
+    record("pipeline_cached", _time_each(lambda p: pipeline_classify_service(p, None), payloads))
+
+    classification_cache.clear()
+    batches = [payloads[i:i + batch_size] for i in range(0, len(payloads), batch_size)]
+    summary = _time_each(lambda batch: classify_batch_service(batch, None), batches)
+    summary["txn_per_second"] = round(summary["calls_per_second"] * len(payloads) / len(batches), 1)
+    record(f"classify_batch[{batch_size}]", summary)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    results = run(args.rows, args.merchants, args.seed, args.batch_size)
+    if args.output:
+        write_results(args.output, "pipeline_stages", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_samples:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_samples))
+    return sorted_samples[max(0, min(len(sorted_samples), rank) - 1)]
+
+
+def latency_summary(samples: List[float], unit: str = "us") -> Dict:
+    """Summarizes per-call durations given in seconds."""
+    scale = {"us": 1e6, "ms": 1e3}[unit]
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        "count": count,
+        f"mean_{unit}": round(sum(ordered) / count * scale, 3) if count else 0.0,
+        f"p50_{unit}": round(percentile(ordered, 50) * scale, 3),
+        f"p95_{unit}": round(percentile(ordered, 95) * scale, 3),
+        f"p99_{unit}": round(percentile(ordered, 99) * scale, 3),
+        f"max_{unit}": round(ordered[-1] * scale, 3) if count else 0.0,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def write_results(path: str, benchmark: str, params: Dict, results: List[Dict]):
+    """Writes one run as JSON, tagged with the commit and machine so runs can be compared."""
+    payload = {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
@@ -0,0 +1,201 @@
+"""
+Seeded synthetic merchants and transactions for benchmarks.
+
+    python -m benchmarks.synthetic --rows 1000000 --output txns.ndjson [--merchants 500] [--seed 42]
+
+Transactions are generated lazily, so any row count (1k .. 10M+) runs in constant memory.
+Descriptors repeat the way real bank feeds do: merchant popularity is Zipf-like, each
+merchant has a few store numbers and descriptor templates, and only some lines carry a
+unique reference, so a large share of normalized descriptions recur.
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+from app.taxonomy import MCC_CATEGORY_MAP
+
+# The seeded merchants from app/db/seed_data.py, so real aliases show up too
+KNOWN_MERCHANTS = [
+    ("Amazon", ["AMZN", "Amazon Mktp", "AMAZON.COM"], "5942"),
+    ("Starbucks", ["STARBUCKS", "SBX", "STARBUCKS STORE"], "5811"),
+    ("Uber", ["UBER", "UBER TRIP"], "4121"),
+    ("McDonalds", ["MCDONALDS", "MCD"], "5814"),
+    ("Netflix", ["NETFLIX"], "7841"),
+    ("Airbnb", ["AIRBNB"], "6513"),
+    ("CVS Pharmacy", ["CVS", "CVS PHARMACY"], "5912"),
+    ("AT&T", ["AT&T", "ATT WIRELESS"], "4814"),
+]
+
+_NAME_PARTS = [
+    ["blue", "golden", "north", "river", "summit", "urban", "green", "silver", "maple", "harbor",
+     "prime", "metro", "sunset", "coastal", "pioneer", "red", "oak", "crown", "liberty", "union"],
+    ["bay", "peak", "side", "stone", "field", "point", "ridge", "gate", "way", "view"],
+    ["coffee", "market", "grill", "pharmacy", "fuel", "electric", "water", "airlines", "hotel",
+     "books", "outfitters", "grocers", "transit", "wireless", "streaming", "software", "clinic", "furniture"],
+]
+
+# Descriptor shapes seen on card and ACH feeds
+_TEMPLATES = [
+    "{alias}",
+    "{alias} #{store}",
+    "POS DEBIT {alias} {store}",
+    "{alias}*{ref}",
+    "SQ *{alias}",
+    "{alias} {city}",
+    "ACH {alias} PAYMENT {ref}",
+    "CHECKCARD {date} {alias} {city}",
+]
+_CITIES = ["NEW YORK NY", "SEATTLE WA", "AUSTIN TX", "SAN FRANCISCO CA", "CHICAGO IL", "MIAMI FL"]
+# Descriptions without a merchant, hitting the keyword rules
+_GENERIC = [
+    ("ATM WITHDRAWAL - {city}", "6011"),
+    ("MONTHLY FEE CHARGE", "6013"),
+    ("ZELLE TRANSFER TO {ref}", "4829"),
+    ("INTERNAL TRANSFER {ref}", "6012"),
+    ("ELECTRICITY BILL PAYMENT", "4900"),
+    ("INTEREST CHARGE", "7995"),
+]
+_MCC_BY_CATEGORY: Dict[str, List[str]] = {}
+for _mcc, _category in MCC_CATEGORY_MAP.items():
+    _MCC_BY_CATEGORY.setdefault(_category, []).append(_mcc)
+
+
+def generate_merchants(count: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    merchants = []
+    for i, (name, aliases, mcc) in enumerate(KNOWN_MERCHANTS[:count]):
+        merchants.append({
+            "merchant_id": f"bench_m_{i}",
+            "display_name": name,
+            "aliases": aliases,
+            "typical_mccs": [mcc],
+            "default_category": MCC_CATEGORY_MAP[mcc],
+        })
+    categories = sorted(_MCC_BY_CATEGORY)
+    seen = {m["display_name"].lower() for m in merchants}
+    while len(merchants) < count:
+        words = [rng.choice(part) for part in _NAME_PARTS]
+        if rng.random() < 0.5:
+            words = [words[0] + words[1], words[2]]
+        name = " ".join(words).title()
+        if name.lower() in seen:
+            name = f"{name} {len(merchants)}"
+        seen.add(name.lower())
+        category = rng.choice(categories)
+        short = "".join(word[0] for word in words).upper() + "".join(rng.choice("XYZ") for _ in range(2))
+        merchants.append({
+            "merchant_id": f"bench_m_{len(merchants)}",
+            "display_name": name,
+            "aliases": [name.upper(), short, f"{words[0].upper()}.COM"],
+            "typical_mccs": list(_MCC_BY_CATEGORY[category]),
+            "default_category": category,
+        })
+    return merchants
+
+
+def merchant_rows(merchants: List[Dict]):
+    """Attribute-style rows, as accepted by snapshot_from_merchants."""
+    return [SimpleNamespace(**merchant) for merchant in merchants]
+
+
+def generate_transactions(count: int, merchants: List[Dict], seed: int = 42, users: int = 100,
+                          start: datetime = datetime(2025, 1, 1)) -> Iterator[Dict]:
+    """Yields ClassificationRequest/TransactionCreate-shaped dicts."""
+    rng = random.Random(seed)
+    # Zipf-like popularity: a few merchants make up most of the volume
+    weights = [1.0 / (rank + 1) for rank in range(len(merchants))]
+    cum_weights = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cum_weights.append(total)
+    for i in range(count):
+        posted_at = start + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        ref = f"{rng.randrange(10 ** 8):08d}"
+        city = rng.choice(_CITIES)
+        if rng.random() < 0.1:
+            template, mcc = rng.choice(_GENERIC)
+            merchant_id = None
+            description = template.format(city=city, ref=ref)
+        else:
+            merchant = rng.choices(merchants, cum_weights=cum_weights)[0]
+            alias = rng.choice([merchant["display_name"].upper()] + merchant["aliases"])
+            # Few store numbers per merchant, so descriptors repeat
+            store = 100 + rng.randrange(5)
+            template = rng.choice(_TEMPLATES)
+            description = template.format(alias=alias, store=store, ref=ref, city=city,
+                                          date=posted_at.strftime("%m/%d"))
+            mcc = rng.choice(merchant["typical_mccs"]) if rng.random() < 0.8 else None
+            # Some feeds lose the merchant id; detection has to find it in the text
+            merchant_id = merchant["merchant_id"] if rng.random() < 0.9 else None
+        yield {
+            "id": f"bench_txn_{i}",
+            "user_id": f"bench_user_{i % users}",
+            "merchant_id": merchant_id,
+            "posted_at": posted_at.isoformat(),
+            "amount": round(rng.lognormvariate(3, 1), 2),
+            "currency": "USD",
+            "raw_description": description,
+            "mcc": mcc,
+        }
+
+
+def seed_database(db, merchants: List[Dict], transactions: Iterator[Dict], users: int = 100,
+                  chunk_size: int = 5000) -> int:
+    """Bulk-loads synthetic users, merchants and transactions (without merchant_id they get the first merchant)."""
+    from sqlalchemy import insert
+    from app.classifier.normalize import normalize_description
+    from app.models import MerchantORM, TransactionORM, UserORM
+    from app.services.merchant_index_service import index_merchants
+    from app.services.search_service import index_transactions
+
+    db.execute(insert(UserORM), [
+        {"user_id": f"bench_user_{i}", "name": f"Bench User {i}", "email": f"bench_user_{i}@example.com",
+         "created_at": datetime(2025, 1, 1)}
+        for i in range(users)
+    ])
+    db.execute(insert(MerchantORM), [dict(merchant, created_at=datetime(2025, 1, 1)) for merchant in merchants])
+    index_merchants(db, merchants, replace=False)
+    loaded = 0
+    while True:
+        chunk = list(islice(transactions, chunk_size))
+        if not chunk:
+            break
+        db.execute(insert(TransactionORM), [
+            dict(txn, merchant_id=txn["merchant_id"] or merchants[0]["merchant_id"],
+                 posted_at=datetime.fromisoformat(txn["posted_at"]), geo={}, created_at=datetime(2025, 1, 1),
+                 normalized_description=normalize_description(txn["raw_description"]))
+            for txn in chunk
+        ])
+        index_transactions(db, [txn["id"] for txn in chunk])
+        loaded += len(chunk)
+    db.commit()
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", required=True, help="NDJSON file for the transactions")
+    parser.add_argument("--merchants-output", help="JSON file for the merchants")
+    args = parser.parse_args()
+
+    merchants = generate_merchants(args.merchants, args.seed)
+    with open(args.output, "w") as f:
+        for txn in generate_transactions(args.rows, merchants, args.seed, args.users):
+            f.write(json.dumps(txn) + "\n")
+    if args.merchants_output:
+        with open(args.merchants_output, "w") as f:
+            json.dump(merchants, f, indent=2)
+    print(f"Wrote {args.rows} transactions ({args.merchants} merchants) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
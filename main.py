@@ -1,20 +1,33 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException
 
-from app.db.db import engine, Base, get_db
+from app import config
+from app.classifier.engine import start_engine, stop_engine
+from app.classifier.overrides import sync_overrides
+from app.classifier.snapshot import load_snapshot, start_reload_watcher, stop_reload_watcher
+from app.db.db import SessionLocal, engine, get_db, get_read_db, pool_stats
+from app.db.migrations import ensure_schema
+from app.metrics import MetricsMiddleware, render_metrics
 from app.routes.users_route import router as users_router
 from app.routes.merchants_route import router as merchants_router
 from app.routes.transactions_route import router as transactions_router
 from app.routes.classify_route import router as classification_router
+from app.routes.jobs_route import router as jobs_router
+from app.routes.analytics_route import router as analytics_router
+from app.routes.taxonomy_route import router as taxonomy_router
+from app.services.job_service import start_job_workers, stop_job_workers
+from app.services.merchant_index_service import ensure_merchant_index
+from app.services.rollup_service import ensure_rollups
+from app.services.search_service import ensure_search_index
+from app.services.taxonomy_service import ensure_taxonomy
+from app.logging_config import configure_logging
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(name)s %(message)s"
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Bank Transaction Categorization Service", version="0.1.0")
@@ -26,20 +39,59 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(
+    MetricsMiddleware,
+    endpoints={path: path for path in ("/classify", "/classify/bulk", "/classify/bulk/stream", "/classify/jobs")}
+)
 
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        ensure_rollups(db)
+        ensure_merchant_index(db)
+        ensure_search_index(db)
+        ensure_taxonomy(db)
+        sync_overrides(db)
+    finally:
+        db.close()
+    load_snapshot()
+    start_reload_watcher()
+    start_engine()
+    start_job_workers()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_job_workers()
+    stop_reload_watcher()
+    stop_engine()
 
 @app.get("/health")
-def health(db: Session = Depends(get_db)):
+def health(db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
     try:
         db.execute(text("SELECT 1"))
-        return {"status": "ok"}
+        read_db.execute(text("SELECT 1"))
+        # Checked out while answering: the health check itself holds one connection per engine
+        return {"status": "ok", "database": pool_stats()}
     except Exception as e:
         raise HTTPException(status_code=503, detail=str(e))
 
-app.include_router(users_router)
-app.include_router(merchants_router)
-app.include_router(transactions_router)
-app.include_router(classification_router)
\ No newline at end of file
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+ROUTERS = (users_router, merchants_router, transactions_router, classification_router, jobs_router, analytics_router,
+           taxonomy_router)
+if config.DB_ASYNC:
+    # Optional async stack: imported only here, so aiosqlite is not needed otherwise
+    from app.db.async_db import dispose_async_engines
+    from app.routes.async_routes import build_async_router
+
+    for router in ROUTERS:
+        app.include_router(build_async_router(router))
+    app.add_event_handler("shutdown", dispose_async_engines)
+else:
+    for router in ROUTERS:
+        app.include_router(router)
\ No newline at end of file
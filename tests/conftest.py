@@ -0,0 +1,81 @@
+import os
+import tempfile
+import uuid
+
+# Configuration is read at import time, so the test database and settings go in before the app loads:
+# no worker processes, job workers or reload watcher, so every test drives them explicitly.
+_db_dir = tempfile.mkdtemp(prefix="txn-categorization-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["CLASSIFY_POOL_SIZE"] = "0"
+os.environ["CLASSIFY_JOB_WORKERS"] = "0"
+os.environ["CLASSIFIER_RELOAD_INTERVAL"] = "0"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.db import SessionLocal
+from main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Entering the client runs the startup handlers (schema, snapshot, overrides)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _unique_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def unique_id():
+    return _unique_id
+
+
+@pytest.fixture
+def user(client) -> str:
+    user_id = _unique_id("usr")
+    response = client.post("/users/", json={"user_id": user_id, "name": "Test User",
+                                            "email": f"{user_id}@example.com", "password": "s3cret-pass"})
+    assert response.status_code == 201, response.text
+    return user_id
+
+
+@pytest.fixture
+def merchant(client) -> str:
+    merchant_id = _unique_id("m")
+    response = client.post("/merchants/", json={"merchant_id": merchant_id, "display_name": "Corner Grocer",
+                                                "aliases": ["CORNER GROCER"], "default_category": "Food & Drink > Grocery"})
+    assert response.status_code == 201, response.text
+    return merchant_id
+
+
+@pytest.fixture
+def make_transaction(client, user, merchant):
+    """Creates a transaction for the test's user and merchant; keyword arguments override the defaults."""
+    def make(**fields) -> dict:
+        payload = {
+            "id": _unique_id("txn"),
+            "user_id": user,
+            "merchant_id": merchant,
+            "posted_at": "2024-03-15T12:00:00",
+            "amount": 10.0,
+            "currency": "USD",
+            "raw_description": "CORNER GROCER #12",
+            **fields,
+        }
+        response = client.post("/transactions/", json=payload)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make
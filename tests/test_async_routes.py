@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.classifier import engine
+from app.routes import async_routes
+from app.routes.classify_route import router as classification_router
+from app.routes.transactions_route import router as transactions_router
+
+
+@pytest.fixture(scope="module")
+def async_client(client):
+    # The DB_ASYNC=1 variants of the routers; the session's client has already set up the database
+    app = FastAPI()
+    for router in (classification_router, transactions_router):
+        app.include_router(async_routes.build_async_router(router))
+    return TestClient(app)
+
+
+@pytest.fixture
+def loop_calls(monkeypatch):
+    """Records, per sync service, whether it was called on the event loop's thread."""
+    calls = {}
+
+    def recording(name, service):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                calls.setdefault(name, []).append(True)
+            except RuntimeError:
+                calls.setdefault(name, []).append(False)
+            return service(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(async_routes, "validate_transaction",
+                        recording("validate_transaction", async_routes.validate_transaction))
+    monkeypatch.setattr(async_routes, "save_classification_results",
+                        recording("save_classification_results", async_routes.save_classification_results))
+    monkeypatch.setattr(engine, "validate_and_hydrate", recording("validate_and_hydrate", engine.validate_and_hydrate))
+    return calls
+
+
+def test_classify_stores_the_result_off_the_event_loop(client, async_client, make_transaction, loop_calls):
+    txn = make_transaction()
+
+    response = async_client.post("/classify/", json={"id": txn["id"], "amount": txn["amount"],
+                                                     "raw_description": txn["raw_description"]})
+
+    assert response.status_code == 200, response.text
+    assert client.get(f"/transactions/{txn['id']}").json()["category"] == response.json()["category"]
+    assert loop_calls == {"validate_transaction": [False], "save_classification_results": [False]}
+
+
+def test_classify_rejects_mismatched_attributes(async_client, make_transaction):
+    txn = make_transaction(amount=25.0)
+
+    response = async_client.post("/classify/", json={"id": txn["id"], "amount": 99.0})
+
+    assert response.status_code == 400
+    assert "Attribute mismatch for amount" in response.json()["detail"]
+
+
+def test_bulk_keeps_order_and_item_errors_off_the_event_loop(client, async_client, make_transaction, loop_calls):
+    good, bad = make_transaction(), make_transaction(amount=5.0)
+
+    response = async_client.post("/classify/bulk", json=[{"id": good["id"]}, {"id": bad["id"], "amount": 6.0}])
+
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [result["transaction_id"] for result in results] == [good["id"], bad["id"]]
+    assert "Attribute mismatch for amount" in results[1]["error"]
+    assert client.get(f"/transactions/{good['id']}").json()["category"] == results[0]["category"]
+    assert loop_calls == {"validate_and_hydrate": [False], "save_classification_results": [False]}
+
+
+def test_transaction_reads_match_the_sync_routes(client, async_client, user, make_transaction):
+    txn = make_transaction()
+
+    assert async_client.get(f"/transactions/{txn['id']}").json() == client.get(f"/transactions/{txn['id']}").json()
+    params = {"user_id": user, "limit": 10}
+    assert async_client.get("/transactions/", params=params).json() == client.get("/transactions/", params=params).json()
+    assert async_client.get("/transactions/txn_missing_async").status_code == 404
@@ -0,0 +1,41 @@
+def _classify(client, transaction_id: str) -> dict:
+    response = client.post("/classify/bulk", json=[{"id": transaction_id}])
+    assert response.status_code == 200, response.text
+    return response.json()[0]
+
+
+def test_merchant_change_clears_the_stored_classification(client, make_transaction, unique_id):
+    txn = make_transaction()
+    _classify(client, txn["id"])
+    assert client.get(f"/transactions/{txn['id']}").json()["category"]
+    new_merchant = unique_id("m")
+    assert client.post("/merchants/", json={"merchant_id": new_merchant, "display_name": "Other Shop"}).status_code == 201
+
+    response = client.post("/transactions/bulk/update", json={"ids": [txn["id"]], "changes": {"merchant_id": new_merchant}})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["affected"] == 1
+    stored = client.get(f"/transactions/{txn['id']}").json()
+    assert (stored["merchant_id"], stored["category"]) == (new_merchant, None)
+
+
+def test_channel_change_keeps_the_stored_classification(client, make_transaction):
+    txn = make_transaction()
+    category = _classify(client, txn["id"])["category"]
+
+    response = client.post("/transactions/bulk/update", json={"ids": [txn["id"]], "changes": {"channel": "online"}})
+
+    assert response.status_code == 200, response.text
+    stored = client.get(f"/transactions/{txn['id']}").json()
+    assert (stored["channel"], stored["category"]) == ("online", category)
+
+
+def test_bulk_delete_removes_rows_and_rollups(client, user, make_transaction):
+    txns = [make_transaction(amount=amount) for amount in (3.0, 4.0)]
+
+    response = client.post("/transactions/bulk/delete", json={"ids": [txn["id"] for txn in txns]})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["affected"] == 2
+    assert all(client.get(f"/transactions/{txn['id']}").status_code == 404 for txn in txns)
+    assert client.get(f"/analytics/spending/{user}").json()["items"] == []
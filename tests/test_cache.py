@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.classifier import cache as cache_module
+from app.classifier.cache import ClassificationCache, classification_cache
+from app.schemas.classification_schema import ClassificationResult
+
+
+def _result(category: str) -> ClassificationResult:
+    return ClassificationResult(transaction_id="txn_cached", category=category, confidence=0.9, why=[])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = ClassificationCache(max_size=2)
+    cache.put("a", 1, _result("A"))
+    cache.put("b", 1, _result("B"))
+    assert cache.get("a", 1).category == "A"
+
+    cache.put("c", 1, _result("C"))
+
+    assert cache.get("b", 1) is None
+    assert (cache.get("a", 1).category, cache.get("c", 1).category) == ("A", "C")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ClassificationCache(max_size=10, ttl_seconds=30)
+    cache.put("a", 1, _result("A"))
+
+    clock.value += 29
+    assert cache.get("a", 1).category == "A"
+    clock.value += 2
+    assert cache.get("a", 1) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_newer_version_drops_every_entry():
+    cache = ClassificationCache(max_size=10)
+    cache.put("a", 1, _result("A"))
+
+    assert cache.get("a", 2) is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.get("a", 1) is None
+
+
+def test_results_of_an_older_version_are_not_stored():
+    cache = ClassificationCache(max_size=10)
+    cache.get("warm", 3)
+
+    cache.put("a", 2, _result("A"))
+
+    assert cache.get("a", 3) is None
+    assert cache.get("a", 2) is None
+
+
+def test_size_zero_disables_the_cache():
+    cache = ClassificationCache(max_size=0)
+    cache.put("a", 1, _result("A"))
+
+    assert cache.get("a", 1) is None
+    assert cache.stats()["misses"] == 0
+
+
+def _classify(client, txn_id: str, description: str) -> dict:
+    response = client.post("/classify/bulk", json=[{"id": txn_id, "raw_description": description}])
+    assert response.status_code == 200, response.text
+    return response.json()[0]
+
+
+def test_repeat_description_is_served_from_the_cache(client):
+    first = _classify(client, "txn_cache_1", "DUNMORE DELI 0042")
+    hits = classification_cache.stats()["hits"]
+
+    second = _classify(client, "txn_cache_2", "DUNMORE DELI 0042")
+
+    assert classification_cache.stats()["hits"] == hits + 1
+    # Cached per description, but the result carries the request's own id
+    assert second == {**first, "transaction_id": "txn_cache_2"}
+
+
+def test_merchant_write_invalidates_cached_results(client, unique_id):
+    before = _classify(client, "txn_cache_3", "EVERGLADE ESPRESSO 7")
+    assert before["category"] != "Food & Drink > Coffee Shop"
+
+    response = client.post("/merchants/", json={"merchant_id": unique_id("m"), "display_name": "Everglade Espresso",
+                                                "aliases": ["EVERGLADE ESPRESSO"],
+                                                "default_category": "Food & Drink > Coffee Shop"})
+    assert response.status_code == 201, response.text
+
+    assert _classify(client, "txn_cache_4", "EVERGLADE ESPRESSO 7")["category"] == "Food & Drink > Coffee Shop"
@@ -0,0 +1,93 @@
+import pytest
+
+from app import config
+from app.classifier import engine
+from app.classifier.cache import classification_cache
+from app.schemas.classification_schema import ClassificationRequest
+from app.services.classification_service import classify_batch_service
+
+DESCRIPTIONS = ["STARBUCKS STORE 0042", "UBER TRIP HELP.UBER.COM", "WALMART SUPERCENTER", "NETFLIX.COM",
+                "SHELL OIL 5531", "GAP STORE 12", "UNKNOWN VENDOR 991"]
+
+
+@pytest.fixture(scope="module")
+def pool(client):
+    # Small chunks, so a batch is spread over both workers in several chunks
+    chunk_size = config.CLASSIFY_CHUNK_SIZE
+    config.CLASSIFY_CHUNK_SIZE = 4
+    engine.start_engine(2)
+    try:
+        yield engine._executor
+    finally:
+        engine.stop_engine()
+        config.CLASSIFY_CHUNK_SIZE = chunk_size
+
+
+def _payloads(prefix: str, count: int):
+    return [ClassificationRequest(id=f"{prefix}_{i}", raw_description=DESCRIPTIONS[i % len(DESCRIPTIONS)],
+                                  amount=float(i)) for i in range(count)]
+
+
+def test_results_come_back_in_input_order(pool, db):
+    payloads = _payloads("txn_pool_order", 37)
+
+    results = engine.classify_bulk(payloads, db)
+
+    assert [result.transaction_id for result in results] == [payload.id for payload in payloads]
+    classification_cache.clear()
+    assert results == classify_batch_service(payloads, db)
+
+
+def test_both_workers_take_chunks(pool, db):
+    # Which idle worker takes a chunk is up to the pool; a few batches reach both
+    for attempt in range(20):
+        engine.classify_bulk(_payloads(f"txn_pool_spread_{attempt}", 40), db)
+        if len(engine._worker_cache_stats) == 2:
+            break
+
+    assert len(engine._worker_cache_stats) == 2
+
+
+def test_failed_chunk_only_fails_its_own_transactions(pool, db):
+    payloads = _payloads("txn_pool_isolation", 12)
+    # Cannot be pickled to the worker, so the middle chunk (items 4-7) fails as a whole
+    payloads[5] = payloads[5].model_copy(update={"geo": {"unpicklable": lambda: None}})
+
+    results = engine.classify_bulk(payloads, db)
+
+    assert [result.transaction_id for result in results] == [payload.id for payload in payloads]
+    failed = [i for i, result in enumerate(results) if result.error]
+    assert failed == [4, 5, 6, 7]
+    assert all(results[i].error == "Classification worker failed" for i in failed)
+    # The pool is still usable afterwards
+    assert not any(result.error for result in engine.classify_bulk(_payloads("txn_pool_after", 8), db))
+
+
+def test_merchant_changes_reach_the_workers(pool, client, db, unique_id):
+    merchant_id = unique_id("m")
+    description = "MARIGOLD MILLINERY 0042"
+    payloads = [ClassificationRequest(id=f"txn_pool_merchant_{i}", raw_description=description) for i in range(8)]
+
+    response = client.post("/merchants/", json={"merchant_id": merchant_id, "display_name": "Marigold Millinery",
+                                                "aliases": ["MARIGOLD MILLINERY"],
+                                                "default_category": "Shopping > Hats"})
+    assert response.status_code == 201, response.text
+    assert {result.category for result in engine.classify_bulk(payloads, db)} == {"Shopping > Hats"}
+
+    response = client.put(f"/merchants/{merchant_id}", json={"default_category": "Shopping > Accessories"})
+    assert response.status_code == 200, response.text
+    assert {result.category for result in engine.classify_bulk(payloads, db)} == {"Shopping > Accessories"}
+
+    assert client.delete(f"/merchants/{merchant_id}").status_code == 204
+    assert "Shopping > Accessories" not in {result.category for result in engine.classify_bulk(payloads, db)}
+
+
+def test_bulk_endpoint_uses_the_pool(pool, client):
+    body = [{"id": f"txn_pool_endpoint_{i}", "raw_description": DESCRIPTIONS[i % len(DESCRIPTIONS)]}
+            for i in range(20)]
+
+    response = client.post("/classify/bulk", json=body)
+
+    assert response.status_code == 200, response.text
+    assert [result["transaction_id"] for result in response.json()] == [item["id"] for item in body]
+    assert any(name.startswith("worker-") for name in client.get("/classify/cache/stats").json()["processes"])
@@ -0,0 +1,86 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.db import importer
+from app.services.transaction_service import ingest_transactions_service
+
+
+def _write_ndjson(path, records: list):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path)
+
+
+def _rows(unique_id, user: str, merchant: str, count: int) -> list:
+    return [{"id": unique_id("txn"), "user_id": user, "merchant_id": merchant, "posted_at": "2024-03-15T12:00:00",
+             "amount": float(i + 1), "currency": "USD", "raw_description": "CORNER GROCER #12"} for i in range(count)]
+
+
+def test_resume_continues_after_the_last_committed_chunk(client, user, merchant, unique_id, tmp_path, monkeypatch):
+    rows = _rows(unique_id, user, merchant, 5)
+    rows[3]["user_id"] = unique_id("usr")
+    path = _write_ndjson(tmp_path / "txns.ndjson", rows)
+    errors_path = str(tmp_path / "errors.ndjson")
+    calls = []
+
+    def crashing_ingest(*args, **kwargs):
+        calls.append(args[1])
+        if len(calls) == 2:
+            raise OperationalError("INSERT INTO transactions", {}, Exception("disk I/O error"))
+        return ingest_transactions_service(*args, **kwargs)
+    monkeypatch.setattr(importer, "ingest_transactions_service", crashing_ingest)
+
+    with pytest.raises(SystemExit):
+        importer.run_import("transactions", path, chunk_size=2, errors_path=errors_path)
+    assert json.loads((tmp_path / "txns.ndjson.import-state.json").read_text())["records"] == 2
+
+    monkeypatch.setattr(importer, "ingest_transactions_service", ingest_transactions_service)
+    summary = importer.run_import("transactions", path, chunk_size=2, resume=True, errors_path=errors_path)
+
+    assert (summary["records"], summary["inserted"], summary["failed"]) == (5, 4, 1)
+    assert [client.get(f"/transactions/{row['id']}").status_code for row in rows] == [200, 200, 200, 404, 200]
+    [error] = [json.loads(line) for line in (tmp_path / "errors.ndjson").read_text().splitlines()]
+    assert (error["index"], error["id"], error["error"]) == (3, rows[3]["id"], "user_id does not exist")
+
+
+def test_reimport_reports_duplicates(client, user, merchant, unique_id, tmp_path):
+    path = _write_ndjson(tmp_path / "txns.ndjson", _rows(unique_id, user, merchant, 3))
+    importer.run_import("transactions", path)
+
+    summary = importer.run_import("transactions", path)
+
+    assert (summary["inserted"], summary["failed"]) == (0, 3)
+
+
+def test_missing_merchant_is_resolved_from_the_description(client, user, merchant, unique_id, tmp_path):
+    merchant_id = unique_id("m")
+    response = client.post("/merchants/", json={"merchant_id": merchant_id, "display_name": "Saffron Skillet",
+                                                "aliases": ["SAFFRON SKILLET"],
+                                                "default_category": "Food & Drink > Restaurants"})
+    assert response.status_code == 201, response.text
+    [row] = _rows(unique_id, user, merchant, 1)
+    del row["merchant_id"]
+    row["raw_description"] = "SQ *SAFFRON SKILLET 0042"
+    path = _write_ndjson(tmp_path / "txns.ndjson", [row])
+
+    assert importer.run_import("transactions", path)["inserted"] == 1
+
+    assert client.get(f"/transactions/{row['id']}").json()["merchant_id"] == merchant_id
+
+
+def test_csv_users_and_merchants(client, unique_id, tmp_path):
+    user_id, merchant_id = unique_id("usr"), unique_id("m")
+    users = tmp_path / "users.csv"
+    users.write_text(f"user_id,name,email\n{user_id},Csv User,{user_id}@example.com\n")
+    merchants = tmp_path / "merchants.csv.gz"
+    with gzip.open(merchants, "wt") as f:
+        f.write(f"merchant_id,display_name,aliases,default_category\n"
+                f"{merchant_id},Quill & Quire,QUILL AND QUIRE|QUILL QUIRE,Shopping > Books\n")
+
+    assert importer.run_import("users", str(users))["inserted"] == 1
+    assert importer.run_import("merchants", str(merchants))["inserted"] == 1
+
+    assert client.get(f"/users/{user_id}").status_code == 200
+    assert client.get(f"/merchants/{merchant_id}").json()["aliases"] == ["QUILL AND QUIRE", "QUILL QUIRE"]
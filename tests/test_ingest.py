@@ -0,0 +1,70 @@
+import json
+
+from app import config
+
+
+def _row(unique_id, user: str, merchant: str, **fields) -> dict:
+    return {"id": unique_id("txn"), "user_id": user, "merchant_id": merchant, "posted_at": "2024-03-15T12:00:00",
+            "amount": 10.0, "currency": "USD", "raw_description": "CORNER GROCER #12", **fields}
+
+
+def _ingest(client, body, **params) -> dict:
+    if isinstance(body, list):
+        response = client.post("/transactions/bulk", json=body, params=params)
+    else:
+        response = client.post("/transactions/bulk", content=body.encode(), params=params,
+                               headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_rejected_rows_are_reported_by_position(client, user, merchant, make_transaction, unique_id):
+    existing = make_transaction()
+    good = _row(unique_id, user, merchant)
+    rows = [
+        good,
+        {**_row(unique_id, user, merchant), "amount": "lots"},
+        dict(good),
+        _row(unique_id, user, merchant, id=existing["id"]),
+        _row(unique_id, unique_id("usr"), merchant),
+        _row(unique_id, user, unique_id("m")),
+    ]
+
+    result = _ingest(client, rows)
+
+    assert (result["received"], result["inserted"], result["failed"]) == (6, 1, 5)
+    errors = {error["index"]: error["error"] for error in result["errors"]}
+    assert errors[1].startswith("Invalid transaction")
+    assert [errors[i] for i in range(2, 6)] == [
+        "transaction_id is repeated in the request", "transaction_id already exists", "user_id does not exist",
+        "merchant_id does not exist",
+    ]
+    assert client.get(f"/transactions/{good['id']}").status_code == 200
+
+
+def test_positions_continue_across_chunks(client, user, merchant, unique_id, monkeypatch):
+    monkeypatch.setattr(config, "TRANSACTION_INGEST_CHUNK_SIZE", 2)
+    rows = [_row(unique_id, user, merchant) for _ in range(5)]
+    rows[3]["user_id"] = unique_id("usr")
+
+    result = _ingest(client, "\n".join(json.dumps(row) for row in rows))
+
+    assert (result["received"], result["inserted"]) == (5, 4)
+    assert [(error["index"], error["transaction_id"]) for error in result["errors"]] == [(3, rows[3]["id"])]
+
+
+def test_classify_stores_the_category(client, user, merchant, unique_id):
+    row = _row(unique_id, user, merchant, raw_description="POS CORNER GROCER #12")
+
+    result = _ingest(client, [row], classify="true")
+
+    assert (result["inserted"], result["classified"]) == (1, 1)
+    stored = client.get(f"/transactions/{row['id']}").json()
+    assert stored["category"] == "Food & Drink > Grocery"
+    assert stored["normalized_description"] == "corner grocer"
+
+
+def test_unsupported_content_type_is_rejected(client):
+    response = client.post("/transactions/bulk", content=b"id,amount\n", headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 415
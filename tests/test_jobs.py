@@ -0,0 +1,202 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+
+from app import config
+from app.models import ClassificationJobItemORM, ClassificationJobORM
+from app.services import job_service
+from app.services.job_service import (
+    FINISHED_STATUSES, _claim_job, _reap_stale_uploads, add_job_items_service, create_job_service,
+    enqueue_job_service, run_job,
+)
+
+
+@pytest.fixture(autouse=True)
+def finish_leftover_jobs(db):
+    # Workers claim the oldest claimable job, so a job left queued by one test must not reach the next
+    yield
+    db.rollback()
+    db.execute(update(ClassificationJobORM).where(ClassificationJobORM.status.not_in(FINISHED_STATUSES))
+               .values(status="cancelled"))
+    db.commit()
+
+
+def _items(unique_id, count: int) -> list:
+    return [{"id": unique_id("txn"), "raw_description": "STARBUCKS STORE 1234", "amount": 4.5} for _ in range(count)]
+
+
+def _submit(client, items: list) -> dict:
+    response = client.post("/classify/jobs/", json=items)
+    assert response.status_code == 202, response.text
+    return response.json()
+
+
+def _job(client, job_id: str) -> dict:
+    response = client.get(f"/classify/jobs/{job_id}")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_job_runs_to_completion(client, db, unique_id):
+    items = _items(unique_id, 3) + [{"amount": "not a number"}]
+    job = _submit(client, items)
+    assert (job["status"], job["total_items"]) == ("queued", 4)
+
+    assert _claim_job(db) == job["job_id"]
+    run_job(job["job_id"], db)
+
+    job = _job(client, job["job_id"])
+    assert (job["status"], job["processed_items"], job["failed_items"]) == ("completed", 4, 1)
+    results = client.get(f"/classify/jobs/{job['job_id']}/results").json()
+    assert [item["seq"] for item in results["items"]] == [0, 1, 2, 3]
+    assert all(item["result"]["category"] for item in results["items"][:3])
+    assert results["items"][3]["error"].startswith("Invalid transaction")
+    assert results["next_after"] == 3
+
+
+def test_multipart_ndjson_upload(client, unique_id):
+    body = "\n".join(json.dumps(item) for item in _items(unique_id, 2))
+
+    response = client.post("/classify/jobs/", files={"file": ("txns.ndjson", body, "application/x-ndjson")})
+
+    assert response.status_code == 202, response.text
+    assert response.json()["total_items"] == 2
+
+
+def test_unsupported_content_type_is_rejected(client):
+    response = client.post("/classify/jobs/", content=b"id,amount\n1,2\n", headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 415
+
+
+def test_cancel_queued_job(client, db, unique_id):
+    job = _submit(client, _items(unique_id, 2))
+
+    response = client.post(f"/classify/jobs/{job['job_id']}/cancel")
+
+    assert response.status_code == 200, response.text
+    assert (response.json()["status"], response.json()["cancel_requested"]) == ("cancelled", True)
+    assert _claim_job(db) is None
+    assert client.post(f"/classify/jobs/{job['job_id']}/cancel").status_code == 409
+
+
+def test_cancel_during_upload_is_kept(client, db, unique_id):
+    job_id = create_job_service(db).job_id
+    add_job_items_service(job_id, 0, _items(unique_id, 2), db)
+
+    assert client.post(f"/classify/jobs/{job_id}/cancel").json()["status"] == "cancelled"
+    enqueue_job_service(job_id, 2, db)
+
+    job = _job(client, job_id)
+    assert (job["status"], job["total_items"]) == ("cancelled", 2)
+    assert _claim_job(db) is None
+
+
+def test_cancel_running_job_stops_it(client, db, unique_id):
+    job = _submit(client, _items(unique_id, 2))
+    assert _claim_job(db) == job["job_id"]
+
+    response = client.post(f"/classify/jobs/{job['job_id']}/cancel")
+    assert (response.json()["status"], response.json()["cancel_requested"]) == ("running", True)
+    run_job(job["job_id"], db)
+
+    job = _job(client, job["job_id"])
+    assert (job["status"], job["processed_items"]) == ("cancelled", 0)
+
+
+def test_running_job_is_reclaimed_after_lease_expiry(client, db, unique_id):
+    job = _submit(client, _items(unique_id, 2))
+    assert _claim_job(db) == job["job_id"]
+    # A live lease keeps other workers off the job
+    assert _claim_job(db) is None
+
+    # The worker went silent for longer than the lease
+    stale = datetime.utcnow() - timedelta(seconds=config.CLASSIFY_JOB_LEASE_SECONDS + 1)
+    db.execute(update(ClassificationJobORM).where(ClassificationJobORM.job_id == job["job_id"])
+               .values(heartbeat_at=stale))
+    db.commit()
+
+    assert _claim_job(db) == job["job_id"]
+    run_job(job["job_id"], db)
+    assert _job(client, job["job_id"])["status"] == "completed"
+
+
+def _run_worker_once(monkeypatch, error: Exception):
+    def failing_run_job(job_id, db):
+        # Lets the worker loop finish after this one job
+        job_service._stop_event.set()
+        raise error
+    monkeypatch.setattr(job_service, "run_job", failing_run_job)
+    try:
+        job_service._worker_loop()
+    finally:
+        job_service._stop_event.clear()
+        monkeypatch.setattr(job_service, "run_job", run_job)
+
+
+def _stored_job(db, job_id: str) -> ClassificationJobORM:
+    db.expire_all()
+    return db.get(ClassificationJobORM, job_id)
+
+
+def test_database_error_retries_the_job(client, db, monkeypatch, unique_id):
+    monkeypatch.setattr(config, "CLASSIFY_JOB_MAX_ATTEMPTS", 3)
+    job = _submit(client, _items(unique_id, 2))
+    locked = OperationalError("UPDATE classification_jobs", {}, Exception("database is locked"))
+
+    _run_worker_once(monkeypatch, locked)
+
+    stored = _stored_job(db, job["job_id"])
+    assert (stored.status, stored.attempts) == ("queued", 1)
+    # Progress resets the count
+    assert _claim_job(db) == job["job_id"]
+    run_job(job["job_id"], db)
+    stored = _stored_job(db, job["job_id"])
+    assert (stored.status, stored.attempts) == ("completed", 0)
+
+
+def test_job_fails_after_max_attempts(client, db, monkeypatch, unique_id):
+    monkeypatch.setattr(config, "CLASSIFY_JOB_MAX_ATTEMPTS", 3)
+    job = _submit(client, _items(unique_id, 2))
+    locked = OperationalError("UPDATE classification_jobs", {}, Exception("database is locked"))
+
+    for attempt in (1, 2):
+        _run_worker_once(monkeypatch, locked)
+        stored = _stored_job(db, job["job_id"])
+        assert (stored.status, stored.attempts) == ("queued", attempt)
+    _run_worker_once(monkeypatch, locked)
+
+    job = _job(client, job["job_id"])
+    assert (job["status"], job["error"]) == ("failed", "Database error while processing job")
+
+
+def test_other_errors_fail_the_job_at_once(client, monkeypatch, unique_id):
+    job = _submit(client, _items(unique_id, 2))
+
+    _run_worker_once(monkeypatch, RuntimeError("boom"))
+
+    job = _job(client, job["job_id"])
+    assert (job["status"], job["error"]) == ("failed", "Unexpected error while processing job")
+
+
+def test_stale_upload_is_reaped(client, db, unique_id):
+    stale_id = create_job_service(db).job_id
+    add_job_items_service(stale_id, 0, _items(unique_id, 2), db)
+    active_id = create_job_service(db).job_id
+    # The upload stopped sending batches longer ago than the timeout
+    stale = datetime.utcnow() - timedelta(seconds=config.CLASSIFY_JOB_UPLOAD_TIMEOUT + 1)
+    db.execute(update(ClassificationJobORM).where(ClassificationJobORM.job_id == stale_id)
+               .values(heartbeat_at=stale))
+    db.commit()
+
+    assert _reap_stale_uploads(db) == 1
+
+    job = _job(client, stale_id)
+    assert (job["status"], job["error"]) == ("failed", "Upload did not complete")
+    assert db.execute(select(func.count()).select_from(ClassificationJobItemORM)
+                      .where(ClassificationJobItemORM.job_id == stale_id)).scalar() == 0
+    assert _job(client, active_id)["status"] == "receiving"
+    assert _reap_stale_uploads(db) == 0
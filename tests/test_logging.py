@@ -0,0 +1,80 @@
+import json
+import logging
+import queue
+
+import pytest
+
+from app import config
+from app.logging_config import (
+    JsonFormatter, TransactionLogger, _BackgroundQueueHandler, configure_logging, shutdown_logging,
+)
+
+
+class _Unformattable:
+    def __str__(self):
+        raise AssertionError("formatted a message that is not written")
+
+
+@pytest.fixture
+def root_handlers(monkeypatch):
+    # configure_logging replaces the root handlers; put the test session's back afterwards
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_json_lines_carry_the_extra_fields():
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, "Classified %s", ("txn_1",), None)
+    record.transaction_id = "txn_1"
+    record.latency_ms = 1.25
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert (entry["message"], entry["level"], entry["logger"]) == ("Classified txn_1", "INFO", "app.test")
+    assert (entry["transaction_id"], entry["latency_ms"]) == ("txn_1", 1.25)
+
+
+@pytest.mark.parametrize("rate, expected", [(0.0, False), (1.0, True)])
+def test_sampling_rate_bounds(monkeypatch, rate, expected):
+    monkeypatch.setattr(config, "LOG_TXN_SAMPLE_RATE", rate)
+
+    assert {TransactionLogger(logging.getLogger("app.test")).sample() for _ in range(50)} == {expected}
+
+
+def test_disabled_level_is_not_formatted(caplog):
+    caplog.set_level(logging.WARNING, logger="app.test")
+    txn_log = TransactionLogger(logging.getLogger("app.test"))
+
+    txn_log.log(logging.DEBUG, "Adding signal: %s", _Unformattable(), transaction_id="txn_1")
+    txn_log.log(logging.WARNING, "No strong signals for transaction %s", "txn_1", transaction_id="txn_1",
+                started=0.0)
+
+    [record] = caplog.records
+    assert (record.getMessage(), record.transaction_id) == ("No strong signals for transaction txn_1", "txn_1")
+    assert record.latency_ms > 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = _BackgroundQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, "%s", (_Unformattable(),), None)
+
+    handler.emit(record)
+    handler.emit(record)
+
+    assert (handler.queue.qsize(), handler.dropped) == (1, 1)
+
+
+def test_async_mode_writes_json_from_the_writer_thread(monkeypatch, capsys, root_handlers):
+    monkeypatch.setattr(config, "LOG_MODE", "async")
+    monkeypatch.setattr(config, "LOG_LEVEL", "INFO")
+    configure_logging()
+
+    logging.getLogger("app.test").info("Classified %s", "txn_1", extra={"transaction_id": "txn_1"})
+    shutdown_logging()
+
+    [line] = [line for line in capsys.readouterr().err.splitlines() if "app.test" in line]
+    entry = json.loads(line)
+    assert (entry["message"], entry["transaction_id"]) == ("Classified txn_1", "txn_1")
@@ -0,0 +1,89 @@
+import random
+import re
+
+import pytest
+
+from app.classifier.matcher import BOUNDARY_END, BOUNDARY_START, BOUNDARY_WORD, KeywordMatcher
+
+
+def _found(keywords, text):
+    matcher = KeywordMatcher(keywords)
+    return {keywords[pattern_id][0] for pattern_id in matcher.find(text)}
+
+
+def test_substring_match_by_default():
+    assert _found([("gap", None)], "singapore airlines") == {"gap"}
+
+
+def test_word_boundary_needs_both_sides():
+    keywords = [("gap", BOUNDARY_WORD)]
+
+    assert _found(keywords, "singapore airlines") == set()
+    assert _found(keywords, "gaps outlet") == set()
+    assert _found(keywords, "gap outlet") == {"gap"}
+    assert _found(keywords, "old navy/gap") == {"gap"}
+
+
+def test_start_and_end_boundaries_check_one_side():
+    assert _found([("pay", BOUNDARY_START)], "payroll deposit") == {"pay"}
+    assert _found([("pay", BOUNDARY_START)], "repay loan") == set()
+    assert _found([("pay", BOUNDARY_END)], "repay loan") == {"pay"}
+    assert _found([("pay", BOUNDARY_END)], "payroll deposit") == set()
+
+
+def test_later_occurrence_matches_after_a_rejected_one():
+    assert _found([("gap", BOUNDARY_WORD)], "singapore gap store") == {"gap"}
+
+
+def test_overlapping_keywords_are_all_reported():
+    keywords = [("he", None), ("she", None), ("his", None), ("hers", None)]
+
+    assert _found(keywords, "ushers") == {"he", "she", "hers"}
+
+
+def test_boundary_is_ignored_next_to_punctuation_in_the_keyword():
+    # A keyword ending in a non-alphanumeric character has no word edge to check there
+    assert _found([("7-", BOUNDARY_WORD)], "shop 7-eleven") == {"7-"}
+
+
+def test_ids_are_sorted_and_unique():
+    matcher = KeywordMatcher([("coffee", None), ("cafe", None), ("coffee", BOUNDARY_WORD)])
+
+    assert matcher.find("cafe coffee coffee") == [0, 1, 2]
+    assert len(matcher) == 3
+
+
+def test_unknown_boundary_is_rejected():
+    with pytest.raises(ValueError):
+        KeywordMatcher([("gap", "both")])
+
+
+def test_token_keywords_match_token_lists():
+    matcher = KeywordMatcher([(("whole", "foods"), None), (("foods",), None)])
+
+    assert matcher.find(["whole", "foods", "market"]) == [0, 1]
+    assert matcher.find(["wholefoods", "market"]) == []
+
+
+def test_matches_a_regex_scan():
+    rng = random.Random(7)
+    words = ["gap", "pay", "uber", "eats", "shell", "singapore", "repay", "payroll", "ubereats", "x"]
+    modes = {None: "{}", BOUNDARY_WORD: r"(?<![a-z0-9]){}(?![a-z0-9])",
+             BOUNDARY_START: r"(?<![a-z0-9]){}", BOUNDARY_END: r"{}(?![a-z0-9])"}
+    keywords = [(word, mode) for word in words[:5] for mode in modes]
+    matcher = KeywordMatcher(keywords)
+    for _ in range(500):
+        text = rng.choice([" ", "-", ""]).join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+        expected = [pattern_id for pattern_id, (keyword, mode) in enumerate(keywords)
+                    if re.search(modes[mode].format(re.escape(keyword)), text)]
+        assert matcher.find(text) == expected, text
+
+
+def test_word_rule_in_the_pipeline(client):
+    def reasons(description):
+        response = client.post("/classify/bulk", json=[{"id": "txn_matcher_probe", "raw_description": description}])
+        assert response.status_code == 200, response.text
+        return response.json()[0]["why"]
+
+    assert "Regex rule: 'gap'" in reasons("GAP STORE 1234 NEW YORK")
+    assert "Regex rule: 'gap'" not in reasons("SINGAPORE AIRLINES 618")
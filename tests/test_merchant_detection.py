@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.classifier.snapshot import detect_merchants, snapshot_from_merchants
+
+
+def _merchant(merchant_id, display_name, aliases=(), default_category="Shopping > General Retail"):
+    return SimpleNamespace(merchant_id=merchant_id, display_name=display_name, aliases=list(aliases),
+                           typical_mccs=[], default_category=default_category)
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return snapshot_from_merchants([
+        _merchant("m_wholefoods", "Whole Foods Market", ["WHOLE FOODS", "WFM"], "Food & Drink > Grocery"),
+        _merchant("m_shell", "Shell", ["SHELL OIL"], "Transport > Fuel"),
+        _merchant("m_ab", "AB", [], "Shopping > General Retail"),
+    ], version=1)
+
+
+def _detected(snapshot, description):
+    return [(merchant.merchant_id, name) for merchant, name in detect_merchants(snapshot, description)]
+
+
+def test_detects_every_merchant_named_once(snapshot):
+    detected = _detected(snapshot, "whole foods market shell oil 0042 whole foods")
+
+    assert sorted(merchant_id for merchant_id, _ in detected) == ["m_shell", "m_wholefoods"]
+
+
+def test_names_match_whole_tokens_only(snapshot):
+    assert _detected(snapshot, "wholefoods shellfish bar") == []
+    assert [merchant_id for merchant_id, _ in _detected(snapshot, "shell 7781")] == ["m_shell"]
+
+
+def test_short_names_are_not_detected(snapshot):
+    assert _detected(snapshot, "ab testing ltd") == []
+
+
+def _classify(client, **payload):
+    response = client.post("/classify/bulk", json=[{"id": "txn_detection_probe", **payload}])
+    assert response.status_code == 200, response.text
+    return response.json()[0]
+
+
+@pytest.fixture
+def detectable_merchant(client, unique_id):
+    merchant_id = unique_id("m")
+    response = client.post("/merchants/", json={"merchant_id": merchant_id, "display_name": "Tumbleweed Tackle",
+                                                "aliases": ["TUMBLEWEED TACKLE"],
+                                                "default_category": "Shopping > Sporting Goods"})
+    assert response.status_code == 201, response.text
+    return merchant_id
+
+
+def test_missing_merchant_id_is_detected_from_the_description(client, detectable_merchant):
+    result = _classify(client, raw_description="TUMBLEWEED TACKLE #88 AUSTIN")
+
+    assert result["category"] == "Shopping > Sporting Goods"
+    assert any(reason.startswith("Detected merchant") for reason in result["why"])
+
+
+def test_wrong_merchant_id_falls_back_to_detection(client, detectable_merchant, merchant):
+    # merchant is a real merchant, but not the one named in the description
+    result = _classify(client, merchant_id=merchant, raw_description="TUMBLEWEED TACKLE #88 AUSTIN")
+
+    assert result["category"] == "Shopping > Sporting Goods"
+    assert any(reason.startswith("Detected merchant") for reason in result["why"])
+
+
+def test_matching_merchant_id_skips_detection(client, detectable_merchant):
+    result = _classify(client, merchant_id=detectable_merchant, raw_description="TUMBLEWEED TACKLE #88 AUSTIN")
+
+    assert result["category"] == "Shopping > Sporting Goods"
+    assert not any(reason.startswith("Detected merchant") for reason in result["why"])
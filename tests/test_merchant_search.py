@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+
+
+def _ids(client, **params) -> list:
+    response = client.get("/merchants/", params={"limit": 200, **params})
+    assert response.status_code == 200, response.text
+    return [merchant["merchant_id"] for merchant in response.json()]
+
+
+@pytest.fixture
+def token() -> str:
+    # Letters only, so it cannot match the digits of other tests' aliases
+    return "".join(chr(ord("a") + int(c, 16)) for c in uuid.uuid4().hex[:10])
+
+
+@pytest.fixture
+def merchants(client, unique_id, token):
+    created = {}
+    for name, aliases, mccs in (("bakery", [f"{token} BAKERY", f"{token}BAKES"], ["0763"]),
+                                ("books", [f"{token} BOOKS"], ["5942", "0763"]),
+                                ("other", [f"OTHER {token.upper()}"], ["5942"])):
+        merchant_id = unique_id("m")
+        response = client.post("/merchants/", json={"merchant_id": merchant_id, "display_name": name,
+                                                    "aliases": aliases, "typical_mccs": mccs,
+                                                    "default_category": "Shopping > General Retail"})
+        assert response.status_code == 201, response.text
+        created[name] = merchant_id
+    return created
+
+
+def test_exact_alias_is_case_insensitive(client, merchants, token):
+    assert _ids(client, alias=f"{token} bakery".upper(), alias_match="exact") == [merchants["bakery"]]
+    assert _ids(client, alias=f"{token} bak", alias_match="exact") == []
+
+
+def test_prefix_is_ordered_by_the_matching_alias(client, merchants, token):
+    # "<token> bakery" < "<token> books" < "<token>bakes"
+    assert _ids(client, alias=token, alias_match="prefix") == [merchants["bakery"], merchants["books"]]
+    assert _ids(client, alias=token, alias_match="prefix", limit=1) == [merchants["bakery"]]
+
+
+def test_contains_matches_inside_aliases(client, merchants, token):
+    assert sorted(_ids(client, alias=token[2:8])) == sorted(merchants.values())
+    assert _ids(client, alias=f"{token[-2:]}bak") == [merchants["bakery"]]
+
+
+def test_mcc_filter_alone_and_with_alias(client, merchants, token):
+    assert {merchants["bakery"], merchants["books"]} <= set(_ids(client, mcc="0763"))
+    assert merchants["other"] not in _ids(client, mcc="0763")
+    assert sorted(_ids(client, alias=token, mcc="5942")) == sorted([merchants["books"], merchants["other"]])
+
+
+def test_index_follows_updates_and_deletes(client, merchants, token):
+    response = client.put(f"/merchants/{merchants['bakery']}", json={"aliases": [f"{token} PATISSERIE"]})
+    assert response.status_code == 200, response.text
+
+    assert _ids(client, alias=f"{token} bakery", alias_match="exact") == []
+    assert _ids(client, alias=f"{token} patisserie", alias_match="exact") == [merchants["bakery"]]
+
+    assert client.delete(f"/merchants/{merchants['books']}").status_code == 204
+    assert _ids(client, alias=token, alias_match="prefix") == [merchants["bakery"]]
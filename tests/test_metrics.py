@@ -0,0 +1,80 @@
+import math
+import random
+
+from app.metrics import Histogram, LabeledCounter, LabeledHistogram, StageTimings
+
+
+def test_stage_timings_bucket_like_observe():
+    rng = random.Random(1)
+    buckets = (0.001, 0.01, 0.1, 1.0)
+    histogram = LabeledHistogram("test_stage_seconds", "Test.", "stage", buckets)
+    timings = StageTimings(histogram, ("a", "b"), flush_every=50)
+    expected = {"a": Histogram(buckets), "b": Histogram(buckets)}
+    for _ in range(120):
+        # Values on a bucket bound, above every bound, and stages that did not run
+        row = tuple(rng.choice([math.nan, 0.01, 5.0, rng.random() / 10]) for _ in range(2))
+        timings.record(row)
+        for stage, value in zip(("a", "b"), row):
+            if not math.isnan(value):
+                expected[stage].observe(value)
+
+    timings.flush()
+
+    drained = histogram.drain()
+    for stage, child in expected.items():
+        counts, total, count = drained[stage]
+        assert (counts, count) == (child.counts, child.count)
+        assert math.isclose(total, child.sum)
+
+
+def test_drain_and_merge_move_counts_between_processes():
+    worker = LabeledHistogram("test_merge_seconds", "Test.", "stage", (0.1, 1.0))
+    parent = LabeledHistogram("test_merge_seconds", "Test.", "stage", (0.1, 1.0))
+    worker.observe("a", 0.05)
+    parent.observe("a", 2.0)
+
+    parent.merge(worker.drain())
+
+    assert worker.drain() == {}
+    assert parent.drain() == {"a": ([1, 0, 1], 2.05, 2)}
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = LabeledHistogram("test_render_seconds", "Test.", "endpoint", (0.1, 1.0))
+    histogram.observe("/x", 0.05)
+    histogram.observe("/x", 0.5, n=2)
+
+    assert histogram.render()[2:] == [
+        'test_render_seconds_bucket{endpoint="/x",le="0.1"} 1',
+        'test_render_seconds_bucket{endpoint="/x",le="1"} 3',
+        'test_render_seconds_bucket{endpoint="/x",le="+Inf"} 3',
+        'test_render_seconds_sum{endpoint="/x"} 1.05',
+        'test_render_seconds_count{endpoint="/x"} 3',
+    ]
+
+
+def test_counter_renders_labels():
+    counter = LabeledCounter("test_requests_total", "Test.", ("endpoint", "status"))
+    counter.inc("/x", "2xx")
+    counter.inc("/x", "2xx", amount=2)
+
+    assert counter.render()[2:] == ['test_requests_total{endpoint="/x",status="2xx"} 3']
+
+
+def _sample(text: str, name: str) -> float:
+    return next((float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(name + " ")), 0.0)
+
+
+def test_metrics_endpoint_counts_requests(client):
+    requests = 'classify_requests_total{endpoint="/classify/bulk",status="2xx"}'
+    batches = 'classify_batch_size_count{source="bulk"}'
+    before = client.get("/metrics").text
+
+    response = client.post("/classify/bulk/", json=[{"id": "txn_metrics_probe", "raw_description": "UBER TRIP"}])
+    assert response.status_code == 200, response.text
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert _sample(response.text, requests) == _sample(before, requests) + 1
+    assert _sample(response.text, batches) == _sample(before, batches) + 1
+    assert "# TYPE classify_stage_duration_seconds histogram" in response.text
@@ -0,0 +1,31 @@
+import pytest
+
+from app.classifier.normalize import normalize_description, normalize_name
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("POS DEBIT STARBUCKS STORE #1234 05/12 SEATTLE WA REF 88812", "starbucks store seattle wa"),
+    ("PURCHASE AUTHORIZED ON 05/12 TARGET T-1234", "target t"),
+    ("PAYPAL *EBAY 402-935-7733", "paypal ebay"),
+    ("SQ *BLUE BOTTLE - OAKLAND, CA", "blue bottle oakland ca"),
+    ("AMZN MKTP US*2K3JD93 AMZN.COM/BILL WA", "amzn mktp us amzn.com/bill wa"),
+    ("CHECKCARD 0512 SHELL OIL 57442 CARD 4411", "shell oil"),
+    ("UBER TRIP HELP.UBER.COM 2025-05-12", "uber trip help.uber.com"),
+])
+def test_noise_is_removed(raw, expected):
+    assert normalize_description(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [("7-ELEVEN 33012", "7-eleven"), ("WAL-MART #0042", "wal-mart"),
+                                           ("H&M 0231", "h&m")])
+def test_separators_inside_names_are_kept(raw, expected):
+    assert normalize_description(raw) == expected
+
+
+def test_repeat_purchases_collapse():
+    assert normalize_description("TST* JOES PIZZA 05/12 #881") == normalize_description("JOES PIZZA 06/01 #902")
+
+
+def test_name_that_is_all_noise_is_kept():
+    assert normalize_description("POS #1234") == ""
+    assert normalize_name("POS #1234") == "pos #1234"
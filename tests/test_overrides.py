@@ -0,0 +1,75 @@
+def _classify(client, *transaction_ids: str) -> list:
+    response = client.post("/classify/bulk", json=[{"id": txn_id} for txn_id in transaction_ids])
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _correct(client, transaction_id: str, category: str, scope: str) -> dict:
+    response = client.post("/classify/corrections",
+                           json={"transaction_id": transaction_id, "category": category, "scope": scope})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_merchant_override_applies_to_the_users_other_transactions(client, make_transaction):
+    corrected, other = make_transaction(), make_transaction(raw_description="CORNER GROCER ONLINE ORDER")
+
+    correction = _correct(client, corrected["id"], "Shopping > Hobbies", "merchant")
+
+    assert correction["transaction"]["category"] == "Shopping > Hobbies"
+    [result] = _classify(client, other["id"])
+    assert result["category"] == "Shopping > Hobbies"
+    assert result["confidence"] == 1.0
+    assert result["why"] == [f"User override for merchant '{other['merchant_id']}'"]
+
+
+def test_descriptor_override_takes_precedence_over_merchant(client, make_transaction):
+    grocery, online = make_transaction(), make_transaction(raw_description="CORNER GROCER ONLINE ORDER")
+    _correct(client, grocery["id"], "Shopping > Hobbies", "merchant")
+    _correct(client, online["id"], "Shopping > Online", "descriptor")
+
+    by_id = {result["transaction_id"]: result for result in _classify(client, grocery["id"], online["id"])}
+
+    assert by_id[online["id"]]["category"] == "Shopping > Online"
+    assert by_id[online["id"]]["why"][0].startswith("User override for descriptor")
+    assert by_id[grocery["id"]]["category"] == "Shopping > Hobbies"
+
+
+def test_override_is_scoped_to_its_user(client, make_transaction, unique_id):
+    corrected = make_transaction()
+    _correct(client, corrected["id"], "Shopping > Hobbies", "merchant")
+    other_user = unique_id("usr")
+    assert client.post("/users/", json={"user_id": other_user, "name": "Other User",
+                                        "email": f"{other_user}@example.com", "password": "s3cret-pass"}).status_code == 201
+
+    [result] = _classify(client, make_transaction(user_id=other_user)["id"])
+
+    assert result["category"] != "Shopping > Hobbies"
+    assert not any(reason.startswith("User override") for reason in result["why"])
+
+
+def test_override_is_checked_before_the_cache(client, make_transaction):
+    first, second = make_transaction(), make_transaction()
+    [before] = _classify(client, first["id"])
+    assert before["category"] != "Shopping > Hobbies"
+
+    correction = _correct(client, first["id"], "Shopping > Hobbies", "descriptor")
+    # Same description as the cached result, but the user's override wins
+    [result] = _classify(client, second["id"])
+    assert result["category"] == "Shopping > Hobbies"
+
+    assert client.delete(f"/classify/overrides/{correction['override']['id']}").status_code == 204
+    [result] = _classify(client, second["id"])
+    assert result["category"] == before["category"]
+
+
+def test_list_and_delete_overrides(client, user, make_transaction):
+    txn = make_transaction()
+    override_id = _correct(client, txn["id"], "Shopping > Hobbies", "merchant")["override"]["id"]
+
+    listed = client.get("/classify/overrides", params={"user_id": user}).json()
+    assert [override["id"] for override in listed] == [override_id]
+
+    assert client.delete(f"/classify/overrides/{override_id}").status_code == 204
+    assert client.get("/classify/overrides", params={"user_id": user}).json() == []
+    assert client.delete(f"/classify/overrides/{override_id}").status_code == 404
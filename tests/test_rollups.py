@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models import SpendingRollupORM, TransactionORM
+from app.services.rollup_service import UNCLASSIFIED
+
+
+def _rollups(client, user_id: str) -> dict:
+    response = client.get(f"/analytics/spending/{user_id}")
+    assert response.status_code == 200, response.text
+    return {(item["month"], item["category"]): item for item in response.json()["items"]}
+
+
+def _assert_matches_transactions(db, user_id: str):
+    """The maintained rollups equal a full aggregation of the user's transactions."""
+    month = func.strftime("%Y-%m", TransactionORM.posted_at)
+    category = func.coalesce(TransactionORM.category, UNCLASSIFIED)
+    rows = db.execute(
+        select(month, category, func.sum(TransactionORM.amount), func.count(), func.min(TransactionORM.amount),
+               func.max(TransactionORM.amount))
+        .where(TransactionORM.user_id == user_id)
+        .group_by(month, category)
+    ).all()
+    expected = {(month, category): (total, count, low, high) for month, category, total, count, low, high in rows}
+    stored = {
+        (row.month, row.category): (row.total_amount, row.txn_count, row.min_amount, row.max_amount)
+        for row in db.execute(select(SpendingRollupORM).where(SpendingRollupORM.user_id == user_id)).scalars()
+    }
+    assert stored.keys() == expected.keys()
+    for key, (total, count, low, high) in expected.items():
+        assert stored[key][0] == pytest.approx(total)
+        assert stored[key][1:] == (count, low, high)
+
+
+def test_add_updates_sum_count_min_max(client, db, user, make_transaction):
+    for amount in (10.0, 4.0, 25.0):
+        make_transaction(amount=amount)
+    make_transaction(amount=7.0, posted_at="2024-04-02T09:00:00")
+
+    rollups = _rollups(client, user)
+
+    march = rollups[("2024-03", UNCLASSIFIED)]
+    assert (march["total_amount"], march["txn_count"], march["min_amount"], march["max_amount"]) == (39.0, 3, 4.0, 25.0)
+    assert rollups[("2024-04", UNCLASSIFIED)]["txn_count"] == 1
+    _assert_matches_transactions(db, user)
+
+
+def test_removing_the_max_settles_max(client, db, user, make_transaction):
+    make_transaction(amount=10.0)
+    make_transaction(amount=4.0)
+    largest = make_transaction(amount=25.0)
+
+    assert client.delete(f"/transactions/{largest['id']}").status_code == 204
+
+    march = _rollups(client, user)[("2024-03", UNCLASSIFIED)]
+    assert (march["total_amount"], march["txn_count"], march["min_amount"], march["max_amount"]) == (14.0, 2, 4.0, 10.0)
+    _assert_matches_transactions(db, user)
+
+
+def test_removing_the_min_settles_min(client, db, user, make_transaction):
+    smallest = make_transaction(amount=4.0)
+    make_transaction(amount=10.0)
+    make_transaction(amount=25.0)
+
+    assert client.delete(f"/transactions/{smallest['id']}").status_code == 204
+
+    march = _rollups(client, user)[("2024-03", UNCLASSIFIED)]
+    assert (march["min_amount"], march["max_amount"]) == (10.0, 25.0)
+    _assert_matches_transactions(db, user)
+
+
+def test_removing_the_last_transaction_drops_the_row(client, db, user, make_transaction):
+    only = make_transaction(amount=8.0)
+
+    assert client.delete(f"/transactions/{only['id']}").status_code == 204
+
+    assert _rollups(client, user) == {}
+    _assert_matches_transactions(db, user)
+
+
+def test_update_moves_amount_between_months(client, db, user, make_transaction):
+    make_transaction(amount=10.0)
+    moved = make_transaction(amount=30.0)
+
+    response = client.put(f"/transactions/{moved['id']}", json={"amount": 3.0, "posted_at": "2024-05-01T08:00:00"})
+    assert response.status_code == 200, response.text
+
+    rollups = _rollups(client, user)
+    march, may = rollups[("2024-03", UNCLASSIFIED)], rollups[("2024-05", UNCLASSIFIED)]
+    assert (march["total_amount"], march["txn_count"], march["min_amount"], march["max_amount"]) == (10.0, 1, 10.0, 10.0)
+    assert (may["total_amount"], may["txn_count"], may["min_amount"], may["max_amount"]) == (3.0, 1, 3.0, 3.0)
+    _assert_matches_transactions(db, user)
+
+
+def test_classification_moves_the_transaction_to_its_category(client, db, user, make_transaction):
+    txn = make_transaction(amount=12.0)
+
+    response = client.post("/classify/bulk", json=[{"id": txn["id"]}])
+    assert response.status_code == 200, response.text
+    [result] = response.json()
+
+    rollups = _rollups(client, user)
+    assert ("2024-03", UNCLASSIFIED) not in rollups
+    assert rollups[("2024-03", result["category"])]["total_amount"] == 12.0
+    _assert_matches_transactions(db, user)
+
+
+def test_update_transaction(client, make_transaction):
+    txn = make_transaction(amount=10.0)
+
+    response = client.put(f"/transactions/{txn['id']}", json={"amount": 12.5, "channel": "online"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["amount"] == 12.5
+    assert response.json()["channel"] == "online"
+
+
+def test_update_missing_transaction(client, unique_id):
+    response = client.put(f"/transactions/{unique_id('txn')}", json={"amount": 1.0})
+
+    assert response.status_code == 404
@@ -0,0 +1,67 @@
+import uuid
+
+import pytest
+
+from app.services.search_service import match_expression
+
+
+def _search(client, **params) -> list:
+    response = client.get("/transactions/search", params=params)
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()["items"]]
+
+
+@pytest.fixture
+def word() -> str:
+    # A word no other test's description contains
+    return "zz" + uuid.uuid4().hex[:8]
+
+
+def test_match_expression_quotes_user_input():
+    assert match_expression('coffee* "OR" NEAR(x)') == '"coffee"* "OR" "NEAR" "x"'
+    assert match_expression("*** --") == ""
+
+
+def test_every_word_must_match(client, make_transaction, word):
+    both = make_transaction(raw_description=f"{word} COFFEE ROASTERS")
+    tea = make_transaction(raw_description=f"{word} TEA HOUSE")
+
+    assert _search(client, q=f"{word} coffee") == [both["id"]]
+    assert sorted(_search(client, q=f"{word[:6]}*", user_id=both["user_id"])) == sorted([both["id"], tea["id"]])
+
+
+def test_filters_and_recency_break_ties(client, make_transaction, word):
+    older = make_transaction(raw_description=f"{word} MARKET", posted_at="2024-01-10T12:00:00")
+    newer = make_transaction(raw_description=f"{word} MARKET", posted_at="2024-02-10T12:00:00")
+
+    assert _search(client, q=word) == [newer["id"], older["id"]]
+    assert _search(client, q=word, date_to="2024-01-31T00:00:00") == [older["id"]]
+
+
+def test_index_follows_updates_and_deletes(client, make_transaction, word):
+    txn = make_transaction(raw_description=f"{word} BOOKSHOP")
+
+    response = client.put(f"/transactions/{txn['id']}", json={"raw_description": "PLAIN VENDOR"})
+    assert response.status_code == 200, response.text
+    assert _search(client, q=word) == []
+
+    client.put(f"/transactions/{txn['id']}", json={"raw_description": f"{word} BOOKSHOP"})
+    assert _search(client, q=word) == [txn["id"]]
+    assert client.delete(f"/transactions/{txn['id']}").status_code == 204
+    assert _search(client, q=word) == []
+
+
+def test_bulk_ingested_rows_are_searchable(client, user, merchant, word, unique_id):
+    txn_id = unique_id("txn")
+    response = client.post("/transactions/bulk", json=[{
+        "id": txn_id, "user_id": user, "merchant_id": merchant, "posted_at": "2024-03-15T12:00:00",
+        "amount": 3.0, "currency": "USD", "raw_description": f"{word} NEWSSTAND",
+    }])
+    assert response.json()["inserted"] == 1
+
+    assert _search(client, q=word) == [txn_id]
+
+
+def test_unsearchable_query_and_unknown_user_are_rejected(client, unique_id):
+    assert client.get("/transactions/search", params={"q": "***"}).status_code == 422
+    assert client.get("/transactions/search", params={"q": "coffee", "user_id": unique_id("usr")}).status_code == 404
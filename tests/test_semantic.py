@@ -0,0 +1,65 @@
+import random
+
+from app.classifier.cache import classification_cache
+from app.schemas.classification_schema import ClassificationRequest
+from app.services.classification_service import (
+    batch_semantic_similarity, classify_batch_service, pipeline_classify_service, semantic_similarity,
+)
+
+NAMES = ["Starbucks", "Starbucks Coffee", "Walmart", "Amazon Marketplace", "AMZN Mktp", "Shell Oil", "Target",
+         "Uber Eats", "Netflix", ""]
+WORDS = ["starbucks", "coffee", "walmart", "store", "amazon", "amzn", "mktp", "shell", "tgt", "uber", "eats",
+         "netflix.com", "pos", "0042"]
+
+
+def _random_batch(seed: int, size: int):
+    rng = random.Random(seed)
+    descs = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) for _ in range(size)]
+    # Few distinct candidate lists, as with real batches (one list per merchant)
+    lists = [rng.sample(NAMES, rng.randint(0, 3)) for _ in range(8)]
+    return descs, [rng.choice(lists) for _ in range(size)]
+
+
+def test_batch_equals_per_row():
+    descs, candidate_lists = _random_batch(seed=3, size=2000)
+
+    assert batch_semantic_similarity(descs, candidate_lists) == [
+        semantic_similarity(desc, cands) for desc, cands in zip(descs, candidate_lists)
+    ]
+
+
+def test_batch_equals_per_row_at_other_thresholds():
+    descs, candidate_lists = _random_batch(seed=11, size=500)
+    for threshold in (0.5, 0.95, 1.0):
+        assert batch_semantic_similarity(descs, candidate_lists, threshold=threshold) == [
+            semantic_similarity(desc, cands, threshold=threshold) for desc, cands in zip(descs, candidate_lists)
+        ]
+
+
+def test_ties_keep_the_first_candidate():
+    [match] = batch_semantic_similarity(["starbucks"], [["Starbucks", "STARBUCKS"]])
+
+    assert match == ("Starbucks", 1.0) == semantic_similarity("starbucks", ["Starbucks", "STARBUCKS"])
+
+
+def test_empty_inputs():
+    assert batch_semantic_similarity([], []) == []
+    assert batch_semantic_similarity(["walmart"], [[]]) == [None]
+
+
+def test_batch_service_equals_the_per_item_pipeline(client, db, merchant):
+    rng = random.Random(5)
+    payloads = [
+        ClassificationRequest(id=f"txn_semantic_{i}", merchant_id=rng.choice([merchant, None]),
+                              raw_description=rng.choice(["CORNER GROCER #12", "CORNER GROCR 7", "UBER TRIP",
+                                                          "GROCER CORNER", "STARBUCKS 0042"]),
+                              mcc=rng.choice([None, "5411", "5814"]))
+        for i in range(60)
+    ]
+    classification_cache.clear()
+
+    batch = classify_batch_service(payloads, db)
+    classification_cache.clear()
+    single = [pipeline_classify_service(payload, db) for payload in payloads]
+
+    assert batch == single
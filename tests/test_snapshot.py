@@ -0,0 +1,112 @@
+from app import config
+from app.classifier import snapshot as snapshot_module
+from app.classifier.normalize import normalize_description
+from app.classifier.snapshot import build_snapshot, check_merchants, detect_merchants, get_snapshot, record_merchant_changes
+from app.models import MerchantORM
+
+
+def _classify(client, description: str) -> dict:
+    response = client.post("/classify/bulk", json=[{"id": "txn_snapshot_probe", "raw_description": description}])
+    assert response.status_code == 200, response.text
+    return response.json()[0]
+
+
+def _detected(snapshot, description: str) -> set:
+    return {merchant.merchant_id for merchant, _ in detect_merchants(snapshot, normalize_description(description))}
+
+
+def _merchant(client, unique_id, name: str, category: str) -> str:
+    merchant_id = unique_id("m")
+    response = client.post("/merchants/", json={"merchant_id": merchant_id, "display_name": name,
+                                                "aliases": [name.upper()], "default_category": category})
+    assert response.status_code == 201, response.text
+    return merchant_id
+
+
+def test_merchant_writes_reach_the_classifier(client, unique_id):
+    merchant_id = _merchant(client, unique_id, "Quillfeather Stationers", "Shopping > Office Supplies")
+    assert _classify(client, "QUILLFEATHER STATIONERS 0042")["category"] == "Shopping > Office Supplies"
+
+    assert client.put(f"/merchants/{merchant_id}", json={"default_category": "Shopping > Books"}).status_code == 200
+    assert _classify(client, "QUILLFEATHER STATIONERS 0042")["category"] == "Shopping > Books"
+
+    assert client.delete(f"/merchants/{merchant_id}").status_code == 204
+    assert merchant_id not in _detected(get_snapshot(), "QUILLFEATHER STATIONERS 0042")
+
+
+def test_renamed_merchant_is_found_by_its_new_name_only(client, unique_id):
+    merchant_id = _merchant(client, unique_id, "Brambleworth Bakery", "Food & Drink > Bakery")
+
+    response = client.put(f"/merchants/{merchant_id}", json={"display_name": "Thistledown Bakery",
+                                                            "aliases": ["THISTLEDOWN BAKERY"]})
+    assert response.status_code == 200, response.text
+
+    snapshot = get_snapshot()
+    assert merchant_id in _detected(snapshot, "THISTLEDOWN BAKERY LONDON")
+    assert merchant_id not in _detected(snapshot, "BRAMBLEWORTH BAKERY LONDON")
+
+
+def test_patched_snapshot_matches_a_full_rebuild(client, db, unique_id):
+    kept = _merchant(client, unique_id, "Larkspur Cycles", "Transportation > Bicycle")
+    removed = _merchant(client, unique_id, "Mossgrove Florist", "Shopping > Flowers")
+    client.put(f"/merchants/{kept}", json={"default_category": "Shopping > Sporting Goods"})
+    client.delete(f"/merchants/{removed}")
+
+    patched, rebuilt = get_snapshot(), build_snapshot(db, 0)
+
+    assert patched.merchant_seq == rebuilt.merchant_seq
+    assert patched.merchants == rebuilt.merchants
+    for description in ("LARKSPUR CYCLES SERVICE", "MOSSGROVE FLORIST", "QUILLFEATHER STATIONERS"):
+        assert _detected(patched, description) == _detected(rebuilt, description)
+
+
+def test_change_from_another_process_is_picked_up(client, db, unique_id):
+    # Written and logged without syncing this process, as another worker process would
+    merchant_id = unique_id("m")
+    db.add(MerchantORM(merchant_id=merchant_id, display_name="Wrenfield Optics", aliases=["WRENFIELD OPTICS"],
+                       typical_mccs=[], default_category="Health > Eyecare"))
+    record_merchant_changes(db, [merchant_id])
+    db.commit()
+    assert merchant_id not in get_snapshot().merchants
+
+    assert check_merchants(db) is True
+    assert merchant_id in _detected(get_snapshot(), "WRENFIELD OPTICS 7")
+    assert check_merchants(db) is False
+
+
+def test_write_swaps_in_a_new_version_without_touching_the_old_one(client, unique_id):
+    before = get_snapshot()
+
+    merchant_id = _merchant(client, unique_id, "Ashcombe Ironmongers", "Home > Hardware")
+
+    after = get_snapshot()
+    assert after.version > before.version
+    assert merchant_id in after.merchants
+    # Requests still holding the previous snapshot keep a consistent view
+    assert merchant_id not in before.merchants
+    assert merchant_id not in _detected(before, "ASHCOMBE IRONMONGERS")
+
+
+def test_delta_past_the_limit_starts_a_compaction(client, unique_id, monkeypatch):
+    started = []
+    monkeypatch.setattr(config, "MERCHANT_DELTA_LIMIT", 1)
+    monkeypatch.setattr(snapshot_module, "_start_compaction", lambda: started.append(True))
+
+    _merchant(client, unique_id, "Pennyroyal Pantry", "Food & Drink > Grocery")
+    _merchant(client, unique_id, "Hollybush Hosiery", "Shopping > Clothing")
+
+    assert started
+
+
+def test_compaction_folds_the_delta_into_the_main_index(client, unique_id):
+    merchant_id = _merchant(client, unique_id, "Foxglove Framers", "Home > Decor")
+    before = get_snapshot()
+    assert merchant_id in before.changed_merchants
+
+    snapshot_module._compact_merchant_index()
+
+    after = get_snapshot()
+    assert after.changed_merchants == frozenset() and after.delta_names == ()
+    # Same merchants, so the version (and every cached result) stays
+    assert (after.version, after.merchants) == (before.version, before.merchants)
+    assert merchant_id in _detected(after, "FOXGLOVE FRAMERS")
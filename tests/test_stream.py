@@ -0,0 +1,73 @@
+import json
+
+from fastapi import HTTPException
+
+from app.routes import classify_route
+
+
+def _stream(client, lines) -> list:
+    body = "".join(line if isinstance(line, str) else json.dumps(line) + "\n" for line in lines)
+    response = client.post("/classify/bulk/stream", content=body.encode(),
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _record(i: int) -> dict:
+    return {"id": f"txn_stream_{i}", "raw_description": ["STARBUCKS 0042", "UBER TRIP", "WALMART 12"][i % 3]}
+
+
+def test_results_keep_input_order_across_batches(client, monkeypatch):
+    monkeypatch.setattr(classify_route, "CLASSIFY_STREAM_BATCH_SIZE", 7)
+
+    out = _stream(client, [_record(i) for i in range(30)])
+
+    assert [line["transaction_id"] for line in out] == [f"txn_stream_{i}" for i in range(30)]
+
+
+def test_invalid_lines_get_an_error_in_place(client, monkeypatch):
+    monkeypatch.setattr(classify_route, "CLASSIFY_STREAM_BATCH_SIZE", 2)
+
+    out = _stream(client, [_record(0), "{not json\n", _record(2), {"raw_description": "NO ID"}, "\n", _record(4)])
+
+    assert [line.get("transaction_id") for line in out] == ["txn_stream_0", None, "txn_stream_2", None, "txn_stream_4"]
+    assert (out[1]["line"], out[3]["line"]) == (2, 4)
+    assert out[1]["error"].startswith("Invalid transaction") and out[3]["error"].startswith("Invalid transaction")
+
+
+def test_last_line_without_newline(client):
+    out = _stream(client, [_record(0), json.dumps(_record(1))])
+
+    assert [line["transaction_id"] for line in out] == ["txn_stream_0", "txn_stream_1"]
+
+
+def test_too_long_line_ends_the_stream_with_an_error(client, monkeypatch):
+    # Only the partial line is buffered, and it may not grow past the limit
+    monkeypatch.setattr(classify_route.iter_ndjson_lines, "__defaults__", (64,))
+
+    out = _stream(client, [_record(0), json.dumps({"id": "txn_stream_long", "raw_description": "X" * 200})])
+
+    assert [line.get("transaction_id") for line in out] == ["txn_stream_0", None]
+    assert out[1] == {"line": 2, "error": "NDJSON line exceeds 64 bytes"}
+
+
+def test_results_are_stored(client, make_transaction):
+    txn = make_transaction()
+
+    [line] = _stream(client, [{"id": txn["id"]}])
+
+    assert "stored" not in line
+    assert client.get(f"/transactions/{txn['id']}").json()["category"] == line["category"]
+
+
+def test_unsaved_batch_is_marked_not_stored(client, monkeypatch, caplog):
+    def failing_save(*args, **kwargs):
+        raise HTTPException(status_code=500, detail="Database error while saving results")
+    monkeypatch.setattr(classify_route, "save_classification_results", failing_save)
+
+    out = _stream(client, [_record(0), "{bad\n", _record(2)])
+
+    assert [line.get("stored") for line in out] == [False, None, False]
+    assert out[0]["category"]
+    assert "Bulk stream batch not stored: size=2" in caplog.text
@@ -0,0 +1,82 @@
+import pytest
+
+from app.classifier.snapshot import check_taxonomy, get_snapshot
+from app.models import TaxonomyRuleORM, TaxonomyVersionORM
+
+
+def _category(client, description: str, **fields) -> str:
+    response = client.post("/classify/bulk", json=[{"id": "txn_taxonomy_probe", "raw_description": description,
+                                                    **fields}])
+    assert response.status_code == 200, response.text
+    return response.json()[0]["category"]
+
+
+@pytest.fixture
+def rule(client):
+    response = client.post("/taxonomy/rules", json={"keyword": "POS Lantern Lounge #12",
+                                                    "category": "Entertainment > Nightlife"})
+    assert response.status_code == 201, response.text
+    yield response.json()
+    client.delete(f"/taxonomy/rules/{response.json()['id']}")
+
+
+def test_keyword_is_normalized_like_descriptions(rule):
+    assert (rule["keyword"], rule["reason"]) == ("lantern lounge", "Regex rule: 'lantern lounge'")
+
+
+@pytest.mark.parametrize("keyword", ["   ", "REF 88812", "#1234 05/12"])
+def test_keyword_that_normalizes_to_nothing_is_rejected(client, rule, keyword):
+    response = client.post("/taxonomy/rules", json={"keyword": keyword, "category": "Shopping > General Retail"})
+    assert response.status_code == 422
+
+    response = client.put(f"/taxonomy/rules/{rule['id']}", json={"keyword": keyword})
+    assert response.status_code == 422
+
+
+def test_rule_edits_apply_at_once_and_invalidate_cached_results(client):
+    description = "LANTERN LOUNGE 0042 AUSTIN"
+    before = _category(client, description)
+    version = client.get("/taxonomy").json()["version"]
+
+    response = client.post("/taxonomy/rules", json={"keyword": "lantern lounge", "category": "Entertainment > Nightlife"})
+    assert response.status_code == 201, response.text
+    assert client.get("/taxonomy").json()["version"] == version + 1
+    assert _category(client, description) == "Entertainment > Nightlife"
+
+    response = client.put(f"/taxonomy/rules/{response.json()['id']}", json={"category": "Food & Drink > Bars"})
+    assert response.status_code == 200, response.text
+    assert _category(client, description) == "Food & Drink > Bars"
+
+    assert client.delete(f"/taxonomy/rules/{response.json()['id']}").status_code == 204
+    assert _category(client, description) == before
+
+
+def test_mcc_edits_apply_at_once(client):
+    response = client.put("/taxonomy/mcc/0781", json={"category": "Services > Landscaping"})
+    assert response.status_code == 200, response.text
+    try:
+        assert _category(client, "GREENLEAF YARDS", mcc="0781") == "Services > Landscaping"
+    finally:
+        assert client.delete("/taxonomy/mcc/0781").status_code == 204
+    assert _category(client, "GREENLEAF YARDS", mcc="0781") != "Services > Landscaping"
+
+
+def test_change_from_another_process_is_picked_up(client, db):
+    snapshot = get_snapshot()
+    version = max(row.version for row in db.query(TaxonomyVersionORM))
+    # What another process's edit leaves in the database
+    rule = TaxonomyRuleORM(keyword="velvet violin", category="Entertainment > Music", reason="Regex rule: 'velvet violin'")
+    db.add(rule)
+    db.add(TaxonomyVersionORM(version=version + 1, change="Added rule from another process"))
+    db.commit()
+    assert _category(client, "VELVET VIOLIN SHOP") != "Entertainment > Music"
+
+    try:
+        assert check_taxonomy(db)
+        assert not check_taxonomy(db)
+        assert get_snapshot().version > snapshot.version
+        # The merchant structures are shared, only the taxonomy is rebuilt
+        assert get_snapshot().merchants is snapshot.merchants
+        assert _category(client, "VELVET VIOLIN SHOP") == "Entertainment > Music"
+    finally:
+        assert client.delete(f"/taxonomy/rules/{rule.id}").status_code == 204
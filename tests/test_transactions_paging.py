@@ -0,0 +1,83 @@
+import pytest
+
+
+def _page(client, **params) -> dict:
+    response = client.get("/transactions/", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _walk(client, **params) -> list:
+    """Follows next_cursor from the first page to the last; returns the ids in the order served."""
+    ids, cursor = [], None
+    while True:
+        page = _page(client, **params, **({"cursor": cursor} if cursor else {}))
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.fixture
+def transactions(make_transaction):
+    # Ties on posted_at and amount: the id is what keeps the keyset order total
+    posted = ["2024-03-01T10:00:00"] * 3 + ["2024-03-02T10:00:00"] * 2 + ["2024-03-03T10:00:00"] * 2
+    amounts = [5.0, 5.0, 7.5, 1.0, 5.0, 9.0, 7.5]
+    return [make_transaction(posted_at=when, amount=amount) for when, amount in zip(posted, amounts)]
+
+
+@pytest.mark.parametrize("sort_by", ["posted_at", "amount"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_cursor_walk_matches_one_page(client, user, transactions, sort_by, sort_order):
+    params = {"user_id": user, "sort_by": sort_by, "sort_order": sort_order}
+    expected = [item["id"] for item in _page(client, **params, limit=200)["items"]]
+
+    walked = _walk(client, **params, limit=3)
+
+    assert walked == expected
+    assert sorted(walked) == sorted(txn["id"] for txn in transactions)
+
+
+def test_order_breaks_ties_by_id(client, user, transactions):
+    items = _page(client, user_id=user, sort_by="amount", sort_order="asc", limit=200)["items"]
+
+    keys = [(item["amount"], item["id"]) for item in items]
+    assert keys == sorted(keys)
+
+
+def test_last_page_has_no_cursor(client, user, transactions):
+    page = _page(client, user_id=user, limit=len(transactions))
+
+    assert len(page["items"]) == len(transactions)
+    assert page["next_cursor"] is None
+    assert page["total_count"] == len(transactions)
+
+
+def test_cursor_for_another_sort_is_rejected(client, user, transactions):
+    cursor = _page(client, user_id=user, sort_by="amount", limit=2)["next_cursor"]
+
+    response = client.get("/transactions/", params={"user_id": user, "sort_by": "posted_at", "cursor": cursor})
+
+    assert response.status_code == 400
+
+
+def test_cursor_and_offset_are_exclusive(client, user, transactions):
+    cursor = _page(client, user_id=user, limit=2)["next_cursor"]
+
+    response = client.get("/transactions/", params={"user_id": user, "cursor": cursor, "offset": 2})
+
+    assert response.status_code == 400
+
+
+def test_malformed_cursor_is_rejected(client, user):
+    response = client.get("/transactions/", params={"user_id": user, "cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_count_none_skips_the_count(client, user, transactions):
+    page = _page(client, user_id=user, limit=2, count="none")
+
+    assert page["total_count"] is None
+    assert len(page["items"]) == 2
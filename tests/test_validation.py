@@ -0,0 +1,79 @@
+from sqlalchemy import event
+
+from app import config
+from app.schemas.classification_schema import ClassificationRequest
+from app.services.classification_service import validate_and_hydrate
+
+
+def test_classify_rejects_mismatched_attributes(client, make_transaction, monkeypatch):
+    # Per-transaction logging is sampled; the validation errors must not be
+    monkeypatch.setattr(config, "LOG_TXN_SAMPLE_RATE", 0.0)
+    txn = make_transaction(amount=25.0)
+
+    response = client.post("/classify/", json={"id": txn["id"], "amount": 99.0})
+
+    assert response.status_code == 400
+    assert "Attribute mismatch for amount" in response.json()["detail"]
+
+
+def test_classify_rejects_unknown_transaction(client, unique_id):
+    response = client.post("/classify/", json={"id": unique_id("txn"), "raw_description": "CORNER GROCER"})
+
+    assert response.status_code == 400
+    assert "Txn not found" in response.json()["detail"]
+
+
+def test_classify_accepts_matching_attributes(client, make_transaction):
+    txn = make_transaction()
+
+    response = client.post("/classify/", json={"id": txn["id"], "amount": txn["amount"],
+                                               "raw_description": txn["raw_description"]})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["transaction_id"] == txn["id"]
+
+
+def test_bulk_reports_mismatches_per_item(client, make_transaction):
+    good, bad = make_transaction(), make_transaction(amount=5.0)
+
+    response = client.post("/classify/bulk", json=[{"id": good["id"]}, {"id": bad["id"], "amount": 6.0}])
+
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [result["transaction_id"] for result in results] == [good["id"], bad["id"]]
+    assert "error" not in results[0]
+    assert "Attribute mismatch for amount" in results[1]["error"]
+
+
+def test_bulk_classifies_unknown_merchant(client, unique_id):
+    response = client.post("/classify/bulk", json=[{
+        "id": unique_id("txn"), "user_id": "usr_unknown", "merchant_id": unique_id("m_unknown"),
+        "amount": 4.5, "raw_description": "STARBUCKS STORE 1234",
+    }])
+
+    assert response.status_code == 200, response.text
+    [result] = response.json()
+    assert "error" not in result
+    assert result["category"]
+
+
+def test_batch_is_hydrated_with_one_query(db, make_transaction, unique_id):
+    txns = [make_transaction(raw_description=f"CORNER GROCER #{i}") for i in range(5)]
+    requests = [ClassificationRequest(id=txn["id"]) for txn in txns] + [
+        ClassificationRequest(id=unique_id("txn"), raw_description="UBER TRIP"),
+        ClassificationRequest(id=txns[0]["id"], amount=1.0),
+    ]
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        hydrated, errors = validate_and_hydrate(requests, db)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert [txn.raw_description for txn in hydrated[:5]] == [txn["raw_description"] for txn in txns]
+    assert hydrated[5] is requests[5]
+    assert list(errors) == [6] and "Attribute mismatch for amount" in errors[6]